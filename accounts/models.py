@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 from phonenumber_field.modelfields import PhoneNumberField
 from core.mixins import TimeStampedMixin
+from core.storage import content_storage
 
 
 class CustomUserManager(UserManager):
@@ -83,7 +84,7 @@ class UserProfile(TimeStampedMixin):
     gender = models.CharField(
         max_length=10, choices=GENDERS, default='unknown', verbose_name='Пол')
     avatar = models.ImageField(
-        upload_to='avatars/', null=True, blank=True, verbose_name='Аватар')
+        upload_to='avatars/', storage=content_storage, null=True, blank=True, verbose_name='Аватар')
     bio = models.TextField(max_length=500, blank=True, verbose_name='О себе')
 
     class Meta:
@@ -3,6 +3,7 @@ from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
+from django.contrib.auth.signals import user_logged_in
 from django.utils import timezone
 from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserSerializer, PasswordRecoverySerializer
 
@@ -88,6 +89,9 @@ def login_view(request):
 
         user.last_seen = timezone.now()
         user.save(update_fields=['last_seen'])
+        # Вход по токену не вызывает django.contrib.auth.login, сигнал отправляется явно
+        # (перенос анонимной корзины и пр.)
+        user_logged_in.send(sender=user.__class__, request=request, user=user)
 
         return Response({
             'message': 'Успешная авторизация',
@@ -0,0 +1,206 @@
+"""
+Свободное время для записи на прием.
+
+Слот — начало приема длительностью Service.duration_minutes, которое
+попадает в рабочие часы клиники, в период работы ветеринара в клинике
+(ClinicVeterinarian) и не пересекается с его записями в любой клинике.
+
+Clinic.working_hours (свободный JSON вида {"monday": "09:00-18:00"})
+компилируется в 7 списков интервалов в минутах от начала дня. Занятость
+ветеринара хранится в кеше по дням: отсортированные непересекающиеся
+интервалы, недостающие дни диапазона читаются одним запросом. Поиск
+конфликта — bisect по концам интервалов. Изменение записи сбрасывает
+кеш затронутых дней (clinics.signals).
+"""
+
+import json
+import logging
+import re
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from medical.models import Appointment
+from .models import ClinicVeterinarian
+
+logger = logging.getLogger(__name__)
+
+SLOT_STEP_MINUTES = 15
+MAX_RANGE_DAYS = 31
+MINUTES_PER_DAY = 24 * 60
+BUSY_CACHE_KEY = 'clinics:busy:{}:{}'
+# Отмененные записи и неявки время не занимают
+INACTIVE_STATUSES = ('cancelled', 'no_show')
+
+WEEKDAYS = {
+    'monday': 0, 'mon': 0, 'пн': 0, 'понедельник': 0,
+    'tuesday': 1, 'tue': 1, 'вт': 1, 'вторник': 1,
+    'wednesday': 2, 'wed': 2, 'ср': 2, 'среда': 2,
+    'thursday': 3, 'thu': 3, 'чт': 3, 'четверг': 3,
+    'friday': 4, 'fri': 4, 'пт': 4, 'пятница': 4,
+    'saturday': 5, 'sat': 5, 'сб': 5, 'суббота': 5,
+    'sunday': 6, 'sun': 6, 'вс': 6, 'воскресенье': 6,
+}
+_INTERVAL = re.compile(r'(\d{1,2})[:.](\d{2})\s*[-–—]\s*(\d{1,2})[:.](\d{2})')
+
+
+def _parse_intervals(value):
+    """'09:00-13:00, 14:00-18:00' или список строк -> [(540, 780), (840, 1080)]"""
+    if isinstance(value, (list, tuple)):
+        value = ','.join(str(part) for part in value)
+    intervals = []
+    for start_h, start_m, end_h, end_m in _INTERVAL.findall(str(value or '')):
+        start, end = int(start_h) * 60 + int(start_m), int(end_h) * 60 + int(end_m)
+        # "00:00-24:00" — круглосуточно; интервал через полночь обрезается концом дня
+        end = MINUTES_PER_DAY if end == 0 or end > MINUTES_PER_DAY else end
+        if start < end:
+            intervals.append((start, end))
+    return _merge(intervals)
+
+
+def _merge(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+@lru_cache(maxsize=1024)
+def _compile(working_hours_json):
+    schedule = [[] for _ in range(7)]
+    for key, value in json.loads(working_hours_json).items():
+        weekday = WEEKDAYS.get(str(key).strip().lower())
+        if weekday is None:
+            logger.warning('Unknown weekday in working_hours: %r', key)
+            continue
+        schedule[weekday] = _parse_intervals(value)
+    return tuple(tuple(day) for day in schedule)
+
+
+def compile_working_hours(working_hours):
+    """Рабочие часы клиники: кортеж из 7 (пн..вс) списков интервалов в минутах"""
+    return _compile(json.dumps(working_hours or {}, sort_keys=True, ensure_ascii=False))
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _busy_key(veterinarian_id, day):
+    return BUSY_CACHE_KEY.format(veterinarian_id, day.isoformat())
+
+
+def _load_busy(veterinarian_id, first_day, last_day):
+    """Занятость ветеринара по дням [first_day, last_day] одним запросом"""
+    busy = {first_day + timedelta(days=offset): [] for offset in range((last_day - first_day).days + 1)}
+    # Прием накануне может заканчиваться после полуночи
+    appointments = (
+        Appointment.objects.filter(
+            veterinarian_id=veterinarian_id,
+            scheduled_date__gte=_day_start(first_day - timedelta(days=1)),
+            scheduled_date__lt=_day_start(last_day + timedelta(days=1)),
+        )
+        .exclude(status__in=INACTIVE_STATUSES)
+        .values_list('scheduled_date', 'duration_minutes')
+    )
+    for scheduled_date, duration in appointments:
+        local = timezone.localtime(scheduled_date)
+        day, start = local.date(), local.hour * 60 + local.minute
+        end = start + duration
+        while end > 0:
+            if day in busy:
+                busy[day].append((start, min(end, MINUTES_PER_DAY)))
+            day, start, end = day + timedelta(days=1), 0, end - MINUTES_PER_DAY
+    return {day: _merge(intervals) for day, intervals in busy.items()}
+
+
+def get_busy_intervals(veterinarian_id, first_day, last_day):
+    """
+    {день: [(начало, конец), ...]} — занятость ветеринара в минутах от начала дня.
+    Дни берутся из кеша, недостающие читаются одним запросом.
+    """
+    days = [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+    keys = {_busy_key(veterinarian_id, day): day for day in days}
+    cached = cache.get_many(list(keys))
+    busy = {keys[key]: [tuple(interval) for interval in intervals] for key, intervals in cached.items()}
+
+    missing = [day for day in days if day not in busy]
+    if missing:
+        loaded = _load_busy(veterinarian_id, missing[0], missing[-1])
+        cache.set_many(
+            {_busy_key(veterinarian_id, day): intervals for day, intervals in loaded.items()},
+            settings.CACHE_TIMEOUTS['long'],
+        )
+        busy.update(loaded)
+    return busy
+
+
+def invalidate_busy_intervals(veterinarian_id, scheduled_date, duration_minutes):
+    """Сбрасывает кеш занятости дней, которые затрагивает запись"""
+    start = timezone.localtime(scheduled_date)
+    end = start + timedelta(minutes=duration_minutes or 0)
+    days = [start.date() + timedelta(days=offset) for offset in range((end.date() - start.date()).days + 1)]
+    cache.delete_many([_busy_key(veterinarian_id, day) for day in days])
+
+
+def _employment_periods(clinic_id, veterinarian_id, first_day, last_day):
+    return list(
+        ClinicVeterinarian.objects.filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=first_day),
+            clinic_id=clinic_id, veterinarian_id=veterinarian_id,
+            veterinarian__is_active=True, start_date__lte=last_day,
+        ).values_list('start_date', 'end_date')
+    )
+
+
+def _day_slots(working, busy, duration, step, not_before):
+    """Начала слотов (в минутах) одного дня"""
+    ends = [end for _, end in busy]
+    slots = []
+    for open_at, close_at in working:
+        start = max(open_at, not_before)
+        start += -(start - open_at) % step
+        while start + duration <= close_at:
+            # Первый занятый интервал, который заканчивается позже start
+            index = bisect_right(ends, start)
+            if index < len(busy) and busy[index][0] < start + duration:
+                # Перескок сразу за конец занятого интервала, по сетке шага
+                start = busy[index][1] + (-(busy[index][1] - open_at) % step)
+                continue
+            slots.append(start)
+            start += step
+    return slots
+
+
+def get_available_slots(clinic, service, veterinarian_id, first_day, last_day, step=SLOT_STEP_MINUTES, now=None):
+    """
+    Свободные слоты записи по дням: [(день, [datetime начала, ...]), ...].
+    Прошедшее время и дни вне работы ветеринара в клинике пропускаются.
+    """
+    now = timezone.localtime(now or timezone.now())
+    schedule = compile_working_hours(clinic.working_hours)
+    periods = _employment_periods(clinic.pk, veterinarian_id, first_day, last_day)
+    if not periods:
+        return []
+    busy = get_busy_intervals(veterinarian_id, first_day, last_day)
+
+    result = []
+    day = first_day
+    while day <= last_day:
+        employed = any(start <= day and (end is None or day <= end) for start, end in periods)
+        if employed and day >= now.date():
+            not_before = now.hour * 60 + now.minute + 1 if day == now.date() else 0
+            minutes = _day_slots(schedule[day.weekday()], busy[day], service.duration_minutes, step, not_before)
+            if minutes:
+                start = _day_start(day)
+                result.append((day, [start + timedelta(minutes=minute) for minute in minutes]))
+        day += timedelta(days=1)
+    return result
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from .availability import MAX_RANGE_DAYS
+
+
+class AvailabilityParamsSerializer(serializers.Serializer):
+    """Параметры поиска свободного времени"""
+    service = serializers.IntegerField()
+    veterinarian = serializers.IntegerField()
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('start', timezone.localdate())
+        attrs.setdefault('end', attrs['start'] + timedelta(days=6))
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError('start должен быть не позже end')
+        if (attrs['end'] - attrs['start']).days >= MAX_RANGE_DAYS:
+            raise serializers.ValidationError(f'Не больше {MAX_RANGE_DAYS} дней за запрос')
+        return attrs
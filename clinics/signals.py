@@ -0,0 +1,39 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from medical.models import Appointment
+from .availability import invalidate_busy_intervals
+
+
+def _booking(appointment):
+    return appointment.veterinarian_id, appointment.scheduled_date, appointment.duration_minutes
+
+
+def _invalidate_on_commit(bookings):
+    # До коммита параллельный запрос прочитал бы старые записи и вернул их в кеш
+    bookings = [booking for booking in bookings if booking[0] and booking[1]]
+    if not bookings:
+        return
+
+    def invalidate():
+        for booking in bookings:
+            invalidate_busy_intervals(*booking)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_init, sender=Appointment)
+def remember_booking(sender, instance, **kwargs):
+    instance._booking = _booking(instance)
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_saved(sender, instance, created, **kwargs):
+    # Перенос записи освобождает старый день и занимает новый
+    _invalidate_on_commit({instance._booking, _booking(instance)})
+    instance._booking = _booking(instance)
+
+
+@receiver(post_delete, sender=Appointment)
+def appointment_deleted(sender, instance, **kwargs):
+    _invalidate_on_commit([_booking(instance)])
@@ -0,0 +1,56 @@
+import factory
+from decimal import Decimal
+from factory import SubFactory
+from factory.django import DjangoModelFactory
+from accounts.tests.factories import ClinicAdminUserFactory, UserProfileFactory, VeterinarianUserFactory
+from clinics.models import Clinic, Service, ServiceCategory, Veterinarian
+
+
+class ClinicFactory(DjangoModelFactory):
+    """Фабрика для клиник"""
+
+    class Meta:
+        model = Clinic
+
+    admin = SubFactory(ClinicAdminUserFactory)
+    name = factory.Sequence(lambda n: f'Клиника {n}')
+    license_number = factory.Sequence(lambda n: f'CL-{n:05d}')
+    address = 'ул. Ленина, 1'
+    city = 'Москва'
+    phone = '+79990000000'
+    email = factory.Sequence(lambda n: f'clinic{n}@example.com')
+
+
+class VeterinarianFactory(DjangoModelFactory):
+    """Фабрика для ветеринаров"""
+
+    class Meta:
+        model = Veterinarian
+
+    user = SubFactory(VeterinarianUserFactory)
+    profile = SubFactory(UserProfileFactory, user=factory.SelfAttribute('..user'))
+    license_number = factory.Sequence(lambda n: f'VET-{n:05d}')
+    experience_years = 5
+    education = 'МГАВМиБ'
+
+
+class ServiceCategoryFactory(DjangoModelFactory):
+    """Фабрика для категорий услуг"""
+
+    class Meta:
+        model = ServiceCategory
+
+    name = factory.Sequence(lambda n: f'Категория услуг {n}')
+
+
+class ServiceFactory(DjangoModelFactory):
+    """Фабрика для услуг"""
+
+    class Meta:
+        model = Service
+
+    clinic = SubFactory(ClinicFactory)
+    name = factory.Sequence(lambda n: f'Услуга {n}')
+    price = Decimal('1500.00')
+    duration_minutes = 30
+    category = SubFactory(ServiceCategoryFactory)
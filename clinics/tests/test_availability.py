@@ -0,0 +1,130 @@
+import pytest
+from datetime import date, datetime, timedelta
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from clinics.availability import compile_working_hours, get_available_slots, get_busy_intervals
+from clinics.models import ClinicVeterinarian
+from medical.tests.factories import AppointmentFactory
+from .factories import ClinicFactory, ServiceFactory, VeterinarianFactory
+
+pytestmark = pytest.mark.django_db
+
+# Понедельник
+MONDAY = date(2030, 3, 4)
+NOW = timezone.make_aware(datetime(2030, 3, 1, 12))
+
+
+def at(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time())) + timedelta(hours=hour, minutes=minute)
+
+
+def times(slots):
+    return [timezone.localtime(slot).strftime('%H:%M') for slot in slots]
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    from django.core.cache import cache
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.fixture
+def setup():
+    clinic = ClinicFactory(working_hours={'monday': '09:00-11:00', 'Вт': ['10:00-11:00', '12:00-12:30'], 'sunday': ''})
+    service = ServiceFactory(clinic=clinic, duration_minutes=30)
+    vet = VeterinarianFactory()
+    ClinicVeterinarian.objects.create(clinic=clinic, veterinarian=vet, position='Терапевт', start_date=date(2030, 1, 1))
+    return {'clinic': clinic, 'service': service, 'vet': vet}
+
+
+class TestAvailability:
+    """Тесты свободного времени для записи"""
+
+    def test_compile_working_hours(self):
+        schedule = compile_working_hours({'mon': '9:00 - 13:00, 12:00-18:00', 'saturday': '00:00-24:00', 'xyz': '1'})
+
+        assert schedule[0] == ((540, 1080),)
+        assert schedule[5] == ((0, 1440),)
+        assert schedule[1] == ()
+
+    def test_slots_skip_booked_time(self, setup):
+        AppointmentFactory(veterinarian=setup['vet'], scheduled_date=at(MONDAY, 9, 30), duration_minutes=45)
+        AppointmentFactory(veterinarian=setup['vet'], scheduled_date=at(MONDAY, 10, 30), status='cancelled')
+
+        days = get_available_slots(setup['clinic'], setup['service'], setup['vet'].pk, MONDAY, MONDAY + timedelta(days=1), now=NOW)
+
+        assert [(day, times(slots)) for day, slots in days] == [
+            (MONDAY, ['09:00', '10:15', '10:30']),
+            (MONDAY + timedelta(days=1), ['10:00', '10:15', '10:30', '12:00']),
+        ]
+
+    def test_past_and_unemployed_days_skipped(self, setup):
+        link = ClinicVeterinarian.objects.get(veterinarian=setup['vet'])
+        link.end_date = MONDAY
+        link.save()
+
+        days = get_available_slots(
+            setup['clinic'], setup['service'], setup['vet'].pk, MONDAY, MONDAY + timedelta(days=1),
+            now=at(MONDAY, 10, 10),
+        )
+
+        assert [(day, times(slots)) for day, slots in days] == [(MONDAY, ['10:15', '10:30'])]
+        assert get_available_slots(setup['clinic'], setup['service'], VeterinarianFactory().pk, MONDAY, MONDAY) == []
+
+    def test_busy_days_cached_and_invalidated(
+        self, setup, locmem_cache, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        vet = setup['vet']
+        with django_assert_num_queries(1):
+            get_busy_intervals(vet.pk, MONDAY, MONDAY + timedelta(days=6))
+        with django_assert_num_queries(0):
+            get_busy_intervals(vet.pk, MONDAY, MONDAY + timedelta(days=6))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            appointment = AppointmentFactory(veterinarian=vet, scheduled_date=at(MONDAY, 23, 30), duration_minutes=60)
+        busy = get_busy_intervals(vet.pk, MONDAY, MONDAY + timedelta(days=6))
+        assert busy[MONDAY] == [(1410, 1440)]
+        assert busy[MONDAY + timedelta(days=1)] == [(0, 30)]
+
+        appointment.scheduled_date = at(MONDAY + timedelta(days=2), 9)
+        with django_capture_on_commit_callbacks(execute=True):
+            appointment.save()
+        busy = get_busy_intervals(vet.pk, MONDAY, MONDAY + timedelta(days=6))
+        assert busy[MONDAY] == [] and busy[MONDAY + timedelta(days=1)] == []
+        assert busy[MONDAY + timedelta(days=2)] == [(540, 600)]
+
+    def test_invalidated_after_commit(self, setup, locmem_cache, django_capture_on_commit_callbacks):
+        vet = setup['vet']
+        get_busy_intervals(vet.pk, MONDAY, MONDAY)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                AppointmentFactory(veterinarian=vet, scheduled_date=at(MONDAY, 9), duration_minutes=30)
+                # Пока запись не закоммичена, кеш не трогается
+                assert locmem_cache.get(f'clinics:busy:{vet.pk}:{MONDAY.isoformat()}') == []
+
+        assert locmem_cache.get(f'clinics:busy:{vet.pk}:{MONDAY.isoformat()}') is None
+        assert get_busy_intervals(vet.pk, MONDAY, MONDAY)[MONDAY] == [(540, 570)]
+
+    def test_api(self, setup):
+        response = APIClient().get(f"/api/clinics/{setup['clinic'].pk}/availability/", {
+            'service': setup['service'].pk, 'veterinarian': setup['vet'].pk,
+            'start': MONDAY.isoformat(), 'end': MONDAY.isoformat(),
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['duration_minutes'] == 30
+        assert response.data['days'][0]['date'] == MONDAY
+        assert len(response.data['days'][0]['slots']) == 7
+
+    def test_api_service_of_other_clinic(self, setup):
+        response = APIClient().get(f"/api/clinics/{setup['clinic'].pk}/availability/", {
+            'service': ServiceFactory().pk, 'veterinarian': setup['vet'].pk,
+        })
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
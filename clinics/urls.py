@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'clinics'
+
+urlpatterns = [
+    path('<int:clinic_id>/availability/', views.clinic_availability, name='clinic_availability'),  # GET /api/clinics/1/availability/?service=1&veterinarian=1
+]
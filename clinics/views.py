@@ -1,3 +1,32 @@
-from django.shortcuts import render
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from .availability import get_available_slots
+from .models import Clinic, Service
+from .serializers import AvailabilityParamsSerializer
 
-# Create your views here.
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def clinic_availability(request, clinic_id):
+    """
+    Свободное время для записи в клинику на услугу к ветеринару
+    (?service=&veterinarian=&start=&end=, по умолчанию неделя с сегодняшнего дня)
+    """
+    params = AvailabilityParamsSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = params.validated_data
+
+    clinic = Clinic.objects.filter(pk=clinic_id, is_active=True).first()
+    if clinic is None:
+        return Response({'error': 'Клиника не найдена'}, status=status.HTTP_404_NOT_FOUND)
+    service = Service.objects.filter(pk=data['service'], clinic=clinic, is_active=True).first()
+    if service is None:
+        return Response({'error': 'Услуга не найдена'}, status=status.HTTP_404_NOT_FOUND)
+
+    days = get_available_slots(clinic, service, data['veterinarian'], data['start'], data['end'])
+    return Response({
+        'duration_minutes': service.duration_minutes,
+        'days': [{'date': day, 'slots': slots} for day, slots in days],
+    })
@@ -12,6 +12,9 @@ from .components.auth import *
 from .components.drf import *
 from .components.db import *
 from .components.apps import *
+from .components.marketplace import *
+from .components.autocomplete import *
+from .components.medical import *
 import os
 from pathlib import Path
 import environ
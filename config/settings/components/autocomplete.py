@@ -0,0 +1,19 @@
+"""
+Autocomplete index settings.
+"""
+
+import os
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
+
+# Каталог снимков индексов автодополнения (общий для воркеров одного сервера)
+AUTOCOMPLETE_INDEX_DIR = os.environ.get('AUTOCOMPLETE_INDEX_DIR', os.path.join(BASE_DIR, 'var', 'autocomplete'))
+
+# Источники индексов: имя -> функция, возвращающая (id, название, вес)
+AUTOCOMPLETE_SOURCES = {
+    'products': 'marketplace.autocomplete.product_items',
+    'brands': 'marketplace.autocomplete.brand_items',
+    'breeds': 'pets.autocomplete.breed_items',
+}
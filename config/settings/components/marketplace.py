@@ -0,0 +1,17 @@
+"""
+Marketplace settings.
+"""
+
+import os
+
+# Хранилище корзины авторизованных пользователей:
+#   'database' — строки Cart/CartItem на каждое изменение
+#   'session'  — кеш (Redis), в БД корзина пишется только при оформлении или явном сохранении
+#   'memory'   — память процесса, для тестов
+MARKETPLACE_CART_STORAGE = os.environ.get('MARKETPLACE_CART_STORAGE', 'session')
+
+# Сколько живет корзина авторизованного пользователя в кеше
+MARKETPLACE_CART_TTL = 30 * 24 * 60 * 60  # 30 days
+
+# Хранилище скетчей уникальных просмотров товаров: 'cache' или 'memory'
+MARKETPLACE_VIEWS_STORAGE = os.environ.get('MARKETPLACE_VIEWS_STORAGE', 'cache')
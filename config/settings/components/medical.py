@@ -0,0 +1,8 @@
+"""
+Medical records settings.
+"""
+
+import os
+
+# TTF-шрифт с кириллицей для PDF медицинских карт; без него используется Helvetica
+MEDICAL_EXPORT_FONT = os.environ.get('MEDICAL_EXPORT_FONT', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
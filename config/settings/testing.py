@@ -29,6 +29,14 @@ CACHES = {
     }
 }
 
+# Корзина в памяти процесса вместо кеша
+MARKETPLACE_CART_STORAGE = 'memory'
+MARKETPLACE_VIEWS_STORAGE = 'memory'
+
+# Задачи Celery выполняются синхронно, без брокера
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+
 # Factory Boy
 FACTORY_BOY_RANDOM_SEED = 42
 
@@ -9,7 +9,10 @@ urlpatterns = [
 
     path('api/auth/', include('accounts.urls')),
     path('api/pets/', include('pets.urls')),
+    path('api/medical/', include('medical.urls')),
+    path('api/clinics/', include('clinics.urls')),
     path('api/posts/', include('posts.urls')),
+    path('api/marketplace/', include('marketplace.urls')),
     path('', include('frontend.urls')),
 
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
@@ -0,0 +1,280 @@
+"""
+Индекс автодополнения по префиксу.
+
+Для каждого источника (товары, бренды, породы) периодически строится
+снимок-файл: отсортированный массив ключей (название и его хвосты,
+начинающиеся с каждого слова) со ссылками на элементы. Элементы
+упорядочены по убыванию веса (популярности), поэтому лучшие совпадения
+префикса — элементы с наименьшими номерами в диапазоне ключей, найденном
+двоичным поиском. Для коротких префиксов (до HEAD_LENGTH символов)
+лучшие элементы посчитаны заранее.
+
+Файл открывается через mmap: все воркеры на сервере читают одни и те же
+страницы памяти, а перестроение атомарно подменяет файл (os.replace) —
+процессы замечают новую версию по mtime и переоткрывают ее.
+"""
+
+import heapq
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+MAGIC = b'ACX1'
+PREAMBLE = struct.Struct('<4sI')
+# Лучшие элементы для префиксов из 1-2 символов считаются при построении
+HEAD_LENGTH = 2
+HEAD_SIZE = 20
+# Хвосты названия с каждого слова: "корм для кошек" находится и по "кош"
+MAX_WORDS = 8
+MAX_LIMIT = 50
+# Как часто процесс проверяет, не перестроен ли файл
+RELOAD_CHECK_INTERVAL = 1.0
+
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize(text):
+    """Нижний регистр, ё -> е, знаки препинания и лишние пробелы убираются"""
+    return _NON_WORD.sub(' ', str(text).lower().replace('ё', 'е').replace('_', ' ')).strip()
+
+
+def _word_suffixes(text):
+    words = text.split(' ')
+    return {' '.join(words[position:]) for position in range(min(len(words), MAX_WORDS))}
+
+
+def _pack_strings(values):
+    offsets = array('I', [0])
+    blob = bytearray()
+    for value in values:
+        blob += value
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def build_snapshot(items):
+    """
+    Содержимое файла индекса из элементов (id, название, вес).
+    Возвращает bytes.
+    """
+    # Номер элемента = место по весу: лучшие совпадения — с меньшими номерами
+    items = sorted(
+        ((int(item_id), str(label), float(weight or 0)) for item_id, label, weight in items),
+        key=lambda item: (-item[2], item[1], item[0]),
+    )
+
+    keys = {}
+    for index, (_, label, _) in enumerate(items):
+        for key in _word_suffixes(normalize(label)):
+            if key:
+                keys.setdefault(key.encode(), []).append(index)
+
+    # Порядок байтов UTF-8 совпадает с порядком символов
+    sorted_keys = sorted(keys)
+    key_offsets, key_blob = _pack_strings(sorted_keys)
+    entry_offsets = array('I', [0])
+    entries = array('I')
+    heads = {}
+    for key in sorted_keys:
+        entries.extend(keys[key])
+        entry_offsets.append(len(entries))
+        text = key.decode()
+        for length in range(1, min(HEAD_LENGTH, len(text)) + 1):
+            heads.setdefault(text[:length].encode(), set()).update(keys[key])
+
+    head_keys = sorted(heads)
+    head_offsets, head_blob = _pack_strings(head_keys)
+    head_items_offsets = array('I', [0])
+    head_items = array('I')
+    for key in head_keys:
+        head_items.extend(heapq.nsmallest(HEAD_SIZE, heads[key]))
+        head_items_offsets.append(len(head_items))
+
+    label_offsets, label_blob = _pack_strings(label.encode() for _, label, _ in items)
+    sections = {
+        'key_offsets': key_offsets,
+        'keys': key_blob,
+        'entry_offsets': entry_offsets,
+        'entries': entries,
+        'head_offsets': head_offsets,
+        'head_keys': head_blob,
+        'head_items_offsets': head_items_offsets,
+        'head_items': head_items,
+        'ids': array('q', [item_id for item_id, _, _ in items]),
+        'weights': array('d', [weight for _, _, weight in items]),
+        'label_offsets': label_offsets,
+        'labels': label_blob,
+    }
+
+    # Секции выравниваются по 8 байт, чтобы memoryview.cast работал без копирования
+    header = {'built_at': time.time(), 'items': len(items), 'sections': {}}
+    body = bytearray()
+    for name, data in sections.items():
+        body += b'\0' * (-len(body) % 8)
+        raw = data.tobytes() if isinstance(data, array) else data
+        header['sections'][name] = [len(body), len(raw), data.typecode if isinstance(data, array) else 'B']
+        body += raw
+
+    header_bytes = json.dumps(header).encode()
+    padding = -(PREAMBLE.size + len(header_bytes)) % 8
+    return PREAMBLE.pack(MAGIC, len(header_bytes)) + header_bytes + b'\0' * padding + bytes(body)
+
+
+def write_snapshot(path, items):
+    """Атомарно записывает файл индекса: читатели видят либо старую, либо новую версию"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    data = build_snapshot(items)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.autocomplete-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return len(data)
+
+
+class _Strings:
+    """Последовательность строк (bytes) из блоба и смещений — для bisect"""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.blob[self.offsets[index]:self.offsets[index + 1]].tobytes()
+
+
+class SnapshotReader:
+    """Поиск по файлу индекса, отображенному в память"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as snapshot:
+            stat = os.fstat(snapshot.fileno())
+            self.version = (stat.st_ino, stat.st_mtime_ns)
+            self._mmap = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+
+        buffer = memoryview(self._mmap)
+        magic, header_length = PREAMBLE.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError(f'{path}: не файл индекса автодополнения')
+        header = json.loads(bytes(buffer[PREAMBLE.size:PREAMBLE.size + header_length]))
+        self.built_at = header['built_at']
+
+        base = PREAMBLE.size + header_length
+        base += -base % 8
+        sections = {}
+        for name, (offset, length, typecode) in header['sections'].items():
+            view = buffer[base + offset:base + offset + length]
+            sections[name] = view if typecode == 'B' else view.cast(typecode)
+
+        self._keys = _Strings(sections['key_offsets'], sections['keys'])
+        self._entry_offsets = sections['entry_offsets']
+        self._entries = sections['entries']
+        self._head_keys = _Strings(sections['head_offsets'], sections['head_keys'])
+        self._head_items_offsets = sections['head_items_offsets']
+        self._head_items = sections['head_items']
+        self._ids = sections['ids']
+        self._weights = sections['weights']
+        self._labels = _Strings(sections['label_offsets'], sections['labels'])
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _item(self, index):
+        return {
+            'id': self._ids[index],
+            'label': self._labels[index].decode(),
+            'weight': self._weights[index],
+        }
+
+    def _head(self, prefix):
+        position = bisect_left(self._head_keys, prefix)
+        if position < len(self._head_keys) and self._head_keys[position] == prefix:
+            return self._head_items[self._head_items_offsets[position]:self._head_items_offsets[position + 1]]
+        return []
+
+    def search(self, query, limit=10):
+        """Лучшие по весу элементы, в названии которых есть слово, начинающееся с query"""
+        text = normalize(query)
+        if not text or limit <= 0:
+            return []
+        prefix = text.encode()
+
+        if len(text) <= HEAD_LENGTH and limit <= HEAD_SIZE:
+            return [self._item(index) for index in self._head(prefix)[:limit]]
+
+        # Байт 0xff не встречается в UTF-8: все ключи с префиксом лежат в [lo, hi)
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + b'\xff', lo)
+        if lo == hi:
+            return []
+        matched = set(self._entries[self._entry_offsets[lo]:self._entry_offsets[hi]])
+        return [self._item(index) for index in heapq.nsmallest(limit, matched)]
+
+
+def get_sources():
+    return settings.AUTOCOMPLETE_SOURCES
+
+
+def snapshot_path(name):
+    return os.path.join(settings.AUTOCOMPLETE_INDEX_DIR, f'{name}.idx')
+
+
+def build_index(name):
+    """Перестраивает индекс источника name. Возвращает количество элементов"""
+    items = list(import_string(get_sources()[name])())
+    write_snapshot(snapshot_path(name), items)
+    return len(items)
+
+
+# Открытые снимки процесса: имя -> (reader, время последней проверки mtime)
+_readers = {}
+
+
+def get_reader(name):
+    """Открытый снимок индекса; отсутствующий индекс строится при первом обращении"""
+    if name not in get_sources():
+        raise KeyError(name)
+    path = snapshot_path(name)
+    now = time.monotonic()
+    reader, checked_at = _readers.get(name, (None, 0.0))
+
+    if reader is None or now - checked_at >= RELOAD_CHECK_INTERVAL:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            build_index(name)
+            stat = os.stat(path)
+        if reader is None or reader.version != (stat.st_ino, stat.st_mtime_ns):
+            # Старое отображение закроется, когда на него не останется ссылок
+            reader = SnapshotReader(path)
+        _readers[name] = (reader, now)
+    return reader
+
+
+def autocomplete(name, query, limit=10):
+    """Подсказки источника name для введенного текста query"""
+    return get_reader(name).search(query, min(limit, MAX_LIMIT))
+
+
+def reset_readers():
+    """Забывает открытые снимки (для тестов и после смены каталога индексов)"""
+    _readers.clear()
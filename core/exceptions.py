@@ -0,0 +1,21 @@
+class ServiceError(Exception):
+    """Базовая ошибка бизнес-логики"""
+    default_message = 'Ошибка выполнения операции'
+
+    def __init__(self, message=None):
+        super().__init__(message or self.default_message)
+
+
+class InsufficientStockError(ServiceError):
+    """Недостаточно товара на складе"""
+    default_message = 'Недостаточно товара на складе'
+
+    def __init__(self, product_id=None, requested=None, message=None):
+        self.product_id = product_id
+        self.requested = requested
+        super().__init__(message)
+
+
+class NotFoundError(ServiceError):
+    """Объект не найден"""
+    default_message = 'Объект не найден'
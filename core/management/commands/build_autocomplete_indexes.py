@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.autocomplete import build_index, get_sources
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает снимки индексов автодополнения (товары, бренды, породы)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Индексы для перестроения (по умолчанию все)')
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(get_sources())
+        unknown = set(names) - set(get_sources())
+        if unknown:
+            raise CommandError(f'Неизвестные индексы: {", ".join(sorted(unknown))}')
+
+        for name in names:
+            count = build_index(name)
+            self.stdout.write(self.style.SUCCESS(f'Индекс {name}: {count} элементов'))
@@ -0,0 +1,85 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import MediaBlob
+from core.signals import get_blob_fields
+from core.storage import content_storage
+
+
+class Command(BaseCommand):
+    help = 'Удаляет медиафайлы, на которые не осталось ссылок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=int, default=24,
+            help='Не трогать файлы, изменявшиеся за последние N часов'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Количество файлов, удаляемых за одну транзакцию'
+        )
+        parser.add_argument(
+            '--recount', action='store_true',
+            help='Пересчитать ссылки по всем моделям перед очисткой'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что будет удалено')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            self.recount()
+
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        orphans = MediaBlob.objects.filter(ref_count__lte=0, updated_at__lt=cutoff)
+
+        if options['dry_run']:
+            for name in orphans.values_list('name', flat=True).iterator():
+                self.stdout.write(f'Будет удален: {name}')
+            return
+
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    orphans.select_for_update(skip_locked=True)
+                    .values_list('pk', 'name')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                MediaBlob.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+                names = [name for _, name in batch]
+                transaction.on_commit(lambda names=names: self.delete_files(names))
+            deleted += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Удалено {deleted} неиспользуемых файлов'))
+
+    def delete_files(self, names):
+        for name in names:
+            content_storage.delete(name)
+
+    def recount(self):
+        """Пересчет ссылок одним проходом по каждой модели"""
+        counts = Counter()
+        for model in apps.get_models():
+            for field in get_blob_fields(model):
+                names = (
+                    model._default_manager.exclude(**{field.attname: ''})
+                    .exclude(**{f'{field.attname}__isnull': True})
+                    .values_list(field.attname, flat=True)
+                )
+                counts.update(names.iterator())
+
+        blobs = list(MediaBlob.objects.only('pk', 'name', 'ref_count'))
+        changed = []
+        for blob in blobs:
+            ref_count = counts.get(blob.name, 0)
+            if blob.ref_count != ref_count:
+                blob.ref_count = ref_count
+                blob.updated_at = timezone.now()
+                changed.append(blob)
+        MediaBlob.objects.bulk_update(changed, ['ref_count', 'updated_at'], batch_size=1000)
+        self.stdout.write(f'Пересчитано ссылок: {len(changed)} файлов обновлено')
@@ -0,0 +1,30 @@
+from django.db import models
+from core.mixins import TimeStampedMixin
+
+
+class MediaBlob(TimeStampedMixin):
+    """Файл в контентно-адресуемом хранилище с подсчетом ссылок"""
+    name = models.CharField(max_length=255, unique=True, verbose_name='Путь в хранилище')
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name='SHA-256')
+    size = models.PositiveBigIntegerField(default=0, verbose_name='Размер (байт)')
+    ref_count = models.IntegerField(default=0, db_index=True, verbose_name='Количество ссылок')
+
+    class Meta:
+        verbose_name = 'Медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+
+class Sequence(models.Model):
+    """Именованный счетчик для выдачи уникальных номеров (см. core.sequences)"""
+    name = models.CharField(max_length=50, unique=True, verbose_name='Название')
+    last_value = models.BigIntegerField(default=0, verbose_name='Последнее выданное значение')
+
+    class Meta:
+        verbose_name = 'Последовательность'
+        verbose_name_plural = 'Последовательности'
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
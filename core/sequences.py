@@ -0,0 +1,54 @@
+"""
+Бесколлизионные последовательные номера (номера заказов и т.п.).
+
+Значения выдаются блоками (hi/lo): строка Sequence блокируется и
+сдвигается на block_size один раз на блок, остальные номера блока
+раздаются из памяти процесса. Остаток блока попадает в пул процесса
+только после коммита транзакции, в которой блок был выделен, — при
+откате счетчик в БД тоже откатывается, и номера не задваиваются.
+"""
+
+import threading
+from collections import defaultdict, deque
+
+from django.db import transaction
+
+DEFAULT_BLOCK_SIZE = 20
+
+_pools = defaultdict(deque)
+_lock = threading.Lock()
+
+
+def _allocate_block(name, block_size):
+    from core.models import Sequence
+
+    with transaction.atomic():
+        sequence, _ = Sequence.objects.select_for_update().get_or_create(name=name)
+        start = sequence.last_value + 1
+        sequence.last_value += block_size
+        sequence.save(update_fields=['last_value'])
+    return start
+
+
+def next_value(name, block_size=DEFAULT_BLOCK_SIZE):
+    """Следующее значение последовательности name"""
+    with _lock:
+        pool = _pools[name]
+        if pool:
+            return pool.popleft()
+
+    start = _allocate_block(name, block_size)
+    rest = range(start + 1, start + block_size)
+
+    def release_rest():
+        with _lock:
+            _pools[name].extend(rest)
+
+    transaction.on_commit(release_rest)
+    return start
+
+
+def reset_pools():
+    """Сбросить выделенные в памяти блоки (для тестов)"""
+    with _lock:
+        _pools.clear()
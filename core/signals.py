@@ -0,0 +1,100 @@
+from django.apps import apps
+from django.db.models import F
+from django.db.models.fields.files import FileField
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.utils import timezone
+
+from core.storage import is_content_addressed
+
+_BLOB_NAMES_ATTR = '_media_blob_names'
+
+
+def get_blob_fields(model):
+    """Файловые поля модели, хранящиеся в контентно-адресуемом хранилище"""
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and is_content_addressed(field)
+    ]
+
+
+def _loaded_names(instance):
+    """
+    Имена файлов загруженных полей. Отложенные поля (only/defer) читаются
+    не через getattr, который загрузил бы каждое отдельным запросом, а пропускаются.
+    """
+    names = {}
+    for field in get_blob_fields(type(instance)):
+        if field.attname in instance.__dict__:
+            value = instance.__dict__[field.attname]
+            names[field.attname] = getattr(value, 'name', value) or ''
+    return names
+
+
+def _fetch_names(instance, attnames):
+    """Имена файлов в базе для полей, не загруженных при создании объекта"""
+    row = type(instance)._base_manager.filter(pk=instance.pk).values(*attnames).first() or {}
+    return {attname: row.get(attname) or '' for attname in attnames}
+
+
+def _change_ref_counts(names, delta):
+    from core.models import MediaBlob
+
+    for name in filter(None, names):
+        MediaBlob.objects.filter(name=name).update(
+            ref_count=F('ref_count') + delta,
+            updated_at=timezone.now(),
+        )
+
+
+def remember_blob_names(sender, instance, **kwargs):
+    setattr(instance, _BLOB_NAMES_ATTR, _loaded_names(instance))
+
+
+def remember_deferred_blob_names_on_save(sender, instance, raw=False, **kwargs):
+    """Отложенное при загрузке поле присвоили: старое имя берется из базы до сохранения"""
+    if raw or instance._state.adding:
+        return
+    old_names = getattr(instance, _BLOB_NAMES_ATTR, {})
+    missing = [attname for attname in _loaded_names(instance) if attname not in old_names]
+    if missing:
+        old_names.update(_fetch_names(instance, missing))
+        setattr(instance, _BLOB_NAMES_ATTR, old_names)
+
+
+def remember_deferred_blob_names_on_delete(sender, instance, **kwargs):
+    old_names = getattr(instance, _BLOB_NAMES_ATTR, {})
+    missing = [field.attname for field in get_blob_fields(sender) if field.attname not in old_names]
+    if missing:
+        old_names.update(_fetch_names(instance, missing))
+        setattr(instance, _BLOB_NAMES_ATTR, old_names)
+
+
+def update_blob_refs_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_names = {} if created else getattr(instance, _BLOB_NAMES_ATTR, {})
+    new_names = _loaded_names(instance)
+
+    # Поле, которое так и осталось отложенным, не менялось
+    added = [name for attr, name in new_names.items() if old_names.get(attr) != name]
+    removed = [name for attr, name in old_names.items() if attr in new_names and new_names[attr] != name]
+    _change_ref_counts(added, 1)
+    _change_ref_counts(removed, -1)
+    setattr(instance, _BLOB_NAMES_ATTR, {**old_names, **new_names})
+
+
+def update_blob_refs_on_delete(sender, instance, **kwargs):
+    _change_ref_counts(getattr(instance, _BLOB_NAMES_ATTR, {}).values(), -1)
+
+
+def connect_media_blob_signals():
+    """Подключает подсчет ссылок для всех моделей с контентно-адресуемыми файлами"""
+    for model in apps.get_models():
+        if not get_blob_fields(model):
+            continue
+        uid = f'media_blob_refs:{model._meta.label}'
+        post_init.connect(remember_blob_names, sender=model, dispatch_uid=uid)
+        pre_save.connect(remember_deferred_blob_names_on_save, sender=model, dispatch_uid=uid)
+        pre_delete.connect(remember_deferred_blob_names_on_delete, sender=model, dispatch_uid=uid)
+        post_save.connect(update_blob_refs_on_save, sender=model, dispatch_uid=uid)
+        post_delete.connect(update_blob_refs_on_delete, sender=model, dispatch_uid=uid)
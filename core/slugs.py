@@ -0,0 +1,104 @@
+"""
+Уникальные slug и кешируемое разрешение slug -> id.
+
+slugify без allow_unicode выбрасывает кириллицу целиком, поэтому
+название сначала транслитерируется. Уникальность проверяется одним
+запросом на пачку: все занятые slug с нужными префиксами читаются
+сразу, суффиксы -2, -3, ... подбираются в памяти.
+"""
+
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.text import slugify
+
+TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+})
+
+FALLBACK_SLUG = 'item'
+
+
+def base_slug(name, max_length=50):
+    """Транслитерированный slug названия, не длиннее max_length"""
+    slug = slugify(str(name).lower().translate(TRANSLIT))[:max_length].strip('-')
+    return slug or FALLBACK_SLUG
+
+
+def allocate_slugs(model, names, field='slug', exclude_pk=None):
+    """
+    Уникальные slug для списка названий (в том же порядке).
+    Одинаковые названия внутри пачки тоже получают разные slug.
+    """
+    max_length = model._meta.get_field(field).max_length
+    # Место под суффикс "-NNNN"
+    bases = [base_slug(name, max_length - 5) for name in names]
+    if not bases:
+        return []
+
+    # Префиксный LIKE использует индекс slug (regex — нет), числовой суффикс проверяется в памяти
+    unique_bases = set(bases)
+    taken_query = model.objects.filter(reduce(or_, [
+        Q(**{field: base}) | Q(**{f'{field}__startswith': f'{base}-'})
+        for base in unique_bases
+    ]))
+    if exclude_pk is not None:
+        taken_query = taken_query.exclude(pk=exclude_pk)
+    taken = set()
+    for slug in taken_query.values_list(field, flat=True):
+        prefix, _, suffix = slug.rpartition('-')
+        if slug in unique_bases or (suffix.isdigit() and prefix in unique_bases):
+            taken.add(slug)
+
+    slugs = []
+    for base in bases:
+        slug, suffix = base, 2
+        while slug in taken:
+            slug = f'{base}-{suffix}'
+            suffix += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def unique_slug(instance, source='name', field='slug'):
+    """Уникальный slug для одного объекта (из save())"""
+    return allocate_slugs(type(instance), [getattr(instance, source)], field, exclude_pk=instance.pk)[0]
+
+
+class SlugResolver:
+    """
+    Разрешение slug -> id через кеш. Несуществующий slug тоже кешируется
+    (коротко), чтобы перебор адресов не доходил до БД.
+    """
+    MISSING = 0
+
+    def __init__(self, model, field='slug'):
+        self.model = model
+        self.field = field
+        self.key_prefix = f'slug:{model._meta.label_lower}:'
+
+    def _key(self, slug):
+        return f'{self.key_prefix}{slug}'
+
+    def resolve(self, slug):
+        """id объекта или None"""
+        key = self._key(slug)
+        object_id = cache.get(key)
+        if object_id is None:
+            object_id = (
+                self.model.objects.filter(**{self.field: slug}).values_list('pk', flat=True).first()
+                or self.MISSING
+            )
+            timeout = settings.CACHE_TIMEOUTS['very_long' if object_id else 'short']
+            cache.set(key, object_id, timeout)
+        return object_id or None
+
+    def invalidate(self, *slugs):
+        cache.delete_many([self._key(slug) for slug in slugs if slug])
@@ -0,0 +1,87 @@
+"""
+Контентно-адресуемое хранилище медиафайлов.
+
+Файл сохраняется под именем, производным от SHA-256 его содержимого,
+поэтому одинаковые загрузки (репосты фото, одна и та же аватарка)
+занимают место на диске один раз. Ссылки из моделей считаются в
+MediaBlob (см. core.signals), осиротевшие файлы удаляет команда
+collect_media_blobs.
+"""
+
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'blobs'
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def hash_content(content):
+    """SHA-256 содержимого файла (читается чанками, позиция сбрасывается)"""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    if hasattr(content, 'chunks'):
+        for chunk in content.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    else:
+        for chunk in iter(lambda: content.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_name(sha256):
+    """Путь блоба: blobs/ab/cd/<sha256> — только хеш, чтобы одно содержимое не получало двух имен"""
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, сохраняющее файлы по хешу содержимого"""
+
+    def save(self, name, content, max_length=None):
+        from core.models import MediaBlob
+
+        sha256 = hash_content(content)
+        # Уже сохраненное содержимое (в т.ч. под старым именем с расширением) не пишется второй раз
+        existing = MediaBlob.objects.filter(sha256=sha256).values_list('name', flat=True).first()
+        if existing is not None:
+            return existing
+
+        name = blob_name(sha256)
+        if not self.exists(name):
+            name = self._save(name, content)
+        blob, _ = MediaBlob.objects.get_or_create(
+            sha256=sha256,
+            defaults={'name': name, 'size': getattr(content, 'size', 0) or 0},
+        )
+        return blob.name
+
+    def _save(self, name, content):
+        """
+        Пишет во временный файл рядом и ставит жесткую ссылку на имя блоба:
+        читатели не видят недописанный файл, а если тот же блоб успел записать
+        параллельный процесс, его файл и считается сохраненным.
+        """
+        tmp_name = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        tmp_path = self.path(tmp_name)
+        try:
+            os.link(tmp_path, self.path(name))
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+        return name
+
+
+content_storage = ContentAddressedStorage()
+
+
+def is_content_addressed(field):
+    """Использует ли файловое поле контентно-адресуемое хранилище"""
+    return isinstance(getattr(field, 'storage', None), ContentAddressedStorage)
@@ -0,0 +1,76 @@
+"""
+Фоновые задачи.
+
+Если Celery установлен, используется его shared_task и маршрутизация
+из CELERY_TASK_ROUTES. Без Celery задача выполняется в фоновом потоке
+текущего процесса (с учетом countdown): вызывающий код, например
+запрос, ее не ждет, но при перезапуске процесса задача теряется.
+При CELERY_TASK_ALWAYS_EAGER (тесты) задача выполняется синхронно
+в момент вызова delay/apply_async.
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+try:
+    from celery import shared_task
+except ImportError:
+    shared_task = None
+
+logger = logging.getLogger(__name__)
+
+
+class LocalTask:
+    """Замена задачи Celery, выполняющая функцию в потоке текущего процесса"""
+
+    def __init__(self, func, name=None):
+        self.func = func
+        self.name = name or f'{func.__module__}.{func.__name__}'
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self._schedule(args, kwargs)
+
+    def apply_async(self, args=None, kwargs=None, countdown=None, **options):
+        return self._schedule(tuple(args or ()), dict(kwargs or {}), countdown)
+
+    def _schedule(self, args, kwargs, countdown=None):
+        if getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+            return self.func(*args, **kwargs)
+        timer = threading.Timer(countdown or 0, self._run, args, kwargs)
+        timer.start()
+        return timer
+
+    def _run(self, *args, **kwargs):
+        try:
+            self.func(*args, **kwargs)
+        except Exception:
+            logger.exception('Task %s failed', self.name)
+        finally:
+            # Соединения с БД у каждого потока свои
+            connections.close_all()
+
+
+def task(*args, **options):
+    """Декоратор задачи: @task или @task(name=...)"""
+    def decorator(func):
+        if shared_task is not None:
+            return shared_task(**options)(func)
+        return LocalTask(func, name=options.get('name'))
+
+    if len(args) == 1 and callable(args[0]):
+        return decorator(args[0])
+    return decorator
+
+
+@task(name='core.tasks.build_autocomplete_indexes')
+def build_autocomplete_indexes(names=None):
+    """Периодическое перестроение индексов автодополнения"""
+    from .autocomplete import build_index, get_sources
+    return {name: build_index(name) for name in names or get_sources()}
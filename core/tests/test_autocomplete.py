@@ -0,0 +1,87 @@
+import os
+from datetime import date
+
+import pytest
+from django.core.management import call_command
+from core import autocomplete as autocomplete_module
+from core.autocomplete import SnapshotReader, autocomplete, normalize, write_snapshot
+from pets.models import Breed, Pet
+
+
+@pytest.fixture
+def index_dir(settings, tmp_path):
+    settings.AUTOCOMPLETE_INDEX_DIR = str(tmp_path)
+    autocomplete_module.reset_readers()
+    yield tmp_path
+    autocomplete_module.reset_readers()
+
+
+def open_snapshot(tmp_path, items):
+    path = os.path.join(tmp_path, 'test.idx')
+    write_snapshot(path, items)
+    return SnapshotReader(path)
+
+
+class TestSnapshot:
+    """Тесты файла индекса автодополнения"""
+
+    def test_prefix_of_any_word_ordered_by_weight(self, tmp_path):
+        reader = open_snapshot(tmp_path, [
+            (1, 'Корм для кошек', 5),
+            (2, 'Корм для собак', 50),
+            (3, 'Когтеточка', 10),
+            (4, 'Наполнитель для кошачьего туалета', 1),
+        ])
+
+        assert [item['id'] for item in reader.search('корм')] == [2, 1]
+        assert [item['id'] for item in reader.search('КОШ')] == [1, 4]
+        assert [item['id'] for item in reader.search('ко', limit=2)] == [2, 3]
+        assert reader.search('для соб')[0] == {'id': 2, 'label': 'Корм для собак', 'weight': 50.0}
+        assert reader.search('корм кош') == []
+
+    def test_item_listed_once(self, tmp_path):
+        reader = open_snapshot(tmp_path, [(1, 'Мяч мячик', 1), (2, 'Мышь', 2)])
+
+        assert [item['id'] for item in reader.search('мя')] == [1]
+        assert [item['id'] for item in reader.search('мяч')] == [1]
+        assert [item['id'] for item in reader.search('м')] == [2, 1]
+
+    def test_normalization(self, tmp_path):
+        reader = open_snapshot(tmp_path, [(1, 'Ёжик-Лакомство', 1)])
+
+        assert normalize('  Ёжик-ЛАКОМСТВО!! ') == 'ежик лакомство'
+        assert [item['id'] for item in reader.search('ежи')] == [1]
+        assert [item['id'] for item in reader.search('лакомс')] == [1]
+
+    def test_empty_index(self, tmp_path):
+        reader = open_snapshot(tmp_path, [])
+
+        assert len(reader) == 0
+        assert reader.search('корм') == []
+        assert reader.search('к') == []
+
+
+@pytest.mark.django_db
+class TestAutocompleteIndexes:
+    """Тесты построения индексов из БД"""
+
+    def test_built_lazily_and_reloaded_after_rebuild(self, index_dir, monkeypatch):
+        from accounts.tests.factories import UserFactory
+        monkeypatch.setattr(autocomplete_module, 'RELOAD_CHECK_INTERVAL', 0)
+        owner = UserFactory()
+        siamese = Breed.objects.create(name='Сиамская', species='cat')
+        sphynx = Breed.objects.create(name='Сфинкс', species='cat')
+        Pet.objects.create(owner=owner, name='Мурка', breed=siamese, birthday=date(2020, 1, 1), color='white')
+
+        assert [item['id'] for item in autocomplete('breeds', 'с')] == [siamese.pk, sphynx.pk]
+        assert (index_dir / 'breeds.idx').exists()
+
+        for name in ['Пуша', 'Тоша']:
+            Pet.objects.create(owner=owner, name=name, breed=sphynx, birthday=date(2020, 1, 1), color='white')
+        call_command('build_autocomplete_indexes', 'breeds', stdout=open(os.devnull, 'w'))
+
+        assert [item['id'] for item in autocomplete('breeds', 'с')] == [sphynx.pk, siamese.pk]
+
+    def test_unknown_index(self, index_dir):
+        with pytest.raises(KeyError):
+            autocomplete('unknown', 'к')
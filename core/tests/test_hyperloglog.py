@@ -0,0 +1,37 @@
+import pytest
+from core.hyperloglog import HyperLogLog
+
+
+class TestHyperLogLog:
+    """Тесты HyperLogLog"""
+
+    def test_duplicates_counted_once(self):
+        sketch = HyperLogLog()
+        for _ in range(3):
+            for value in range(100):
+                sketch.add(f'user:{value}')
+
+        assert sketch.count() == pytest.approx(100, abs=3)
+
+    @pytest.mark.parametrize('total', [1000, 50000])
+    def test_error_is_bounded(self, total):
+        sketch = HyperLogLog()
+        for value in range(total):
+            sketch.add(value)
+
+        assert sketch.count() == pytest.approx(total, rel=0.05)
+
+    def test_merge_and_serialization(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for value in range(1000):
+            first.add(value)
+        for value in range(500, 1500):
+            second.add(value)
+
+        merged = HyperLogLog.from_bytes(first.to_bytes()).merge(second)
+
+        assert merged.count() == pytest.approx(1500, rel=0.05)
+        assert len(first.to_bytes()) == 4097
+
+    def test_empty(self):
+        assert HyperLogLog().count() == 0
@@ -0,0 +1,36 @@
+import pytest
+from core.slugs import allocate_slugs, base_slug
+from marketplace.models import Brand
+from marketplace.tests.factories import BrandFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestSlugs:
+    """Тесты генерации slug"""
+
+    def test_cyrillic_transliterated(self):
+        assert base_slug('Корм для кошек') == 'korm-dlya-koshek'
+        assert base_slug('???') == 'item'
+
+    def test_duplicates_get_suffixes(self):
+        BrandFactory(name='Royal', slug='royal')
+        BrandFactory(name='Royal 3', slug='royal-3')
+        BrandFactory(name='Royal Canin', slug='royal-canin')
+
+        assert allocate_slugs(Brand, ['Royal', 'Royal', 'Роял']) == ['royal-2', 'royal-4', 'royal-5']
+
+    def test_save_assigns_unique_slug(self):
+        first = Brand.objects.create(name='Хвост')
+        second = Brand.objects.create(name='ХВОСТ!')
+
+        assert (first.slug, second.slug) == ('hvost', 'hvost-2')
+
+    def test_single_query(self, django_assert_num_queries):
+        BrandFactory(name='Lapa', slug='lapa')
+        BrandFactory(name='Lapa X', slug='lapa-x-2')
+
+        with django_assert_num_queries(1):
+            slugs = allocate_slugs(Brand, ['Лапа', 'Лапа!', 'Лапа X'])
+
+        assert slugs == ['lapa-2', 'lapa-3', 'lapa-x']
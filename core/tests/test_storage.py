@@ -0,0 +1,108 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from accounts.tests.factories import UserProfileFactory
+from core.models import MediaBlob
+from core.storage import blob_name, content_storage, hash_content
+from pets.models import Pet
+from pets.tests.factories import PetFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+class TestContentAddressedStorage:
+    """Тесты контентно-адресуемого хранилища"""
+
+    def test_same_content_stored_once(self, media_root):
+        """Одинаковые файлы сохраняются под одним именем, даже с другим расширением"""
+        first = content_storage.save('avatars/a.png', ContentFile(b'image-bytes'))
+        second = content_storage.save('pets/photos/b.jpg', ContentFile(b'image-bytes'))
+
+        assert first == second
+        assert first.startswith('blobs/')
+        assert MediaBlob.objects.count() == 1
+        assert [path.name for path in media_root.rglob('*') if path.is_file()] == [first.rsplit('/', 1)[1]]
+
+    def test_existing_blob_name_reused(self):
+        MediaBlob.objects.create(name='blobs/legacy.png', sha256=hash_content(ContentFile(b'legacy')))
+
+        assert content_storage.save('a.jpg', ContentFile(b'legacy')) == 'blobs/legacy.png'
+
+    def test_file_written_concurrently(self, media_root, monkeypatch):
+        """Файл блоба появился между exists() и записью: сохраненным считается он"""
+        name = blob_name(hash_content(ContentFile(b'race')))
+        (media_root / name).parent.mkdir(parents=True)
+        (media_root / name).write_bytes(b'race')
+        monkeypatch.setattr(type(content_storage), 'exists', lambda self, name: False)
+
+        assert content_storage.save('a.png', ContentFile(b'race')) == name
+        assert [path for path in media_root.rglob('*') if path.is_file()] == [media_root / name]
+
+    def test_different_content_different_names(self):
+        first = content_storage.save('a.jpg', ContentFile(b'one'))
+        second = content_storage.save('a.jpg', ContentFile(b'two'))
+
+        assert first != second
+
+
+class TestMediaBlobReferences:
+    """Тесты подсчета ссылок на файлы"""
+
+    def test_ref_count_follows_model_changes(self):
+        first = UserProfileFactory()
+        second = UserProfileFactory()
+        first.avatar.save('me.png', ContentFile(b'avatar'))
+        second.avatar.save('copy.png', ContentFile(b'avatar'))
+
+        blob = MediaBlob.objects.get()
+        assert blob.ref_count == 2
+
+        second.avatar = None
+        second.save()
+        first.delete()
+
+        blob.refresh_from_db()
+        assert blob.ref_count == 0
+
+    def test_deferred_fields_not_loaded(self, django_assert_num_queries):
+        PetFactory.create_batch(5)
+
+        with django_assert_num_queries(1):
+            assert len(list(Pet.objects.only('id', 'name'))) == 5
+
+    def test_deferred_field_changes(self):
+        pet = PetFactory()
+        pet.main_photo.save('cat.png', ContentFile(b'cat'))
+        old = MediaBlob.objects.get()
+
+        deferred = Pet.objects.only('id').get(pk=pet.pk)
+        deferred.main_photo.save('dog.png', ContentFile(b'dog'))
+        old.refresh_from_db()
+        assert old.ref_count == 0
+
+        Pet.objects.only('id').get(pk=pet.pk).delete()
+        assert MediaBlob.objects.get(name=deferred.main_photo.name).ref_count == 0
+
+    def test_collect_removes_orphans(self, django_capture_on_commit_callbacks):
+        name = content_storage.save('orphan.png', ContentFile(b'orphan'))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('collect_media_blobs', grace_hours=0)
+
+        assert not MediaBlob.objects.exists()
+        assert not content_storage.exists(name)
+
+    def test_collect_keeps_referenced_blobs(self):
+        profile = UserProfileFactory()
+        profile.avatar.save('me.png', ContentFile(b'avatar'))
+
+        call_command('collect_media_blobs', grace_hours=0, recount=True)
+
+        assert MediaBlob.objects.get().ref_count == 1
+        assert content_storage.exists(profile.avatar.name)
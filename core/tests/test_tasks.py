@@ -0,0 +1,37 @@
+import threading
+from core.tasks import LocalTask
+
+
+class TestLocalTask:
+    """Тесты задач без Celery"""
+
+    def test_eager_runs_inline(self, settings):
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+
+        assert LocalTask(lambda value: value * 2).delay(21) == 42
+
+    def test_runs_in_background(self, settings):
+        settings.CELERY_TASK_ALWAYS_EAGER = False
+        release, done, calls = threading.Event(), threading.Event(), []
+
+        def work(value):
+            release.wait(5)
+            calls.append((value, threading.current_thread() is threading.main_thread()))
+            done.set()
+
+        LocalTask(work).delay(1)
+        # delay вернулся, пока задача еще ждет
+        assert calls == []
+        release.set()
+        assert done.wait(5)
+        assert calls == [(1, False)]
+
+    def test_countdown_honoured(self, settings):
+        settings.CELERY_TASK_ALWAYS_EAGER = False
+        done = threading.Event()
+
+        timer = LocalTask(done.set).apply_async(countdown=0.2)
+
+        assert not done.wait(0.05)
+        assert done.wait(5)
+        timer.join()
@@ -0,0 +1,56 @@
+from core.timeseries import decode_series, downsample_steps, encode_series, lttb
+
+
+class TestSeriesEncoding:
+    """Тесты кодирования временных рядов"""
+
+    def test_roundtrip(self):
+        points = [(1700000000, 19990, 0), (1700003600, 17990, 19990), (1700090000, 19990, 0), (1600000000, -5, 2**40)]
+
+        assert decode_series(encode_series(points)) == points
+
+    def test_compact(self):
+        points = [(1700000000 + i * 60, 10000 + i % 3, 0) for i in range(1000)]
+
+        # Разности помещаются в один байт на поле, кроме первой точки
+        assert len(encode_series(points)) < 1000 * 3 + 20
+
+    def test_empty(self):
+        assert decode_series(encode_series([])) == []
+
+
+class TestDownsampleSteps:
+    """Тесты прореживания ступенчатого ряда"""
+
+    def test_carry_forward_and_buckets(self):
+        points = [(0, 100), (15, 80), (17, 120), (35, 90)]
+
+        assert downsample_steps(points, 10, 50, 4) == [
+            (10, (17, 120), 80, 120),
+            (20, (17, 120), 120, 120),
+            (30, (35, 90), 90, 120),
+            (40, (35, 90), 90, 90),
+        ]
+
+    def test_no_value_before_first_point(self):
+        assert downsample_steps([(25, 5)], 0, 40, 4) == [(20, (25, 5), 5, 5), (30, (25, 5), 5, 5)]
+
+
+class TestLTTB:
+    """Тесты прореживания LTTB"""
+
+    def test_keeps_extremes_and_ends(self):
+        x = list(range(100))
+        y = [0.0] * 100
+        y[37], y[71] = 10.0, -10.0
+
+        selected = lttb(x, y, 10).tolist()
+
+        assert len(selected) == 10
+        assert selected[0] == 0 and selected[-1] == 99
+        assert {37, 71} <= set(selected)
+        assert selected == sorted(selected)
+
+    def test_short_series_unchanged(self):
+        assert lttb([1, 2, 3], [5, 6, 7], 10).tolist() == [0, 1, 2]
+        assert lttb([], [], 10).tolist() == []
@@ -0,0 +1,145 @@
+"""
+Компактное хранение временных рядов.
+
+Точка ряда — кортеж целых (timestamp, value1, value2, ...). Ряд
+кодируется построчно разностями с предыдущей точкой (delta encoding),
+разности — zigzag + varint, так что медленно меняющиеся значения и
+близкие по времени точки занимают по 1-2 байта на поле.
+
+Формат: varint ширины точки, varint количества точек, затем разности.
+
+Для графиков ряды прореживаются: ступенчатые (цены) — по интервалам
+равной длины, непрерывные измерения (вес) — алгоритмом LTTB.
+"""
+
+import numpy as np
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def _write_varint(buffer, value):
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data, position):
+    result = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, position
+        shift += 7
+
+
+def encode_series(points):
+    """Кодирует список точек одинаковой ширины в bytes"""
+    points = list(points)
+    width = len(points[0]) if points else 0
+    buffer = bytearray()
+    _write_varint(buffer, width)
+    _write_varint(buffer, len(points))
+    previous = (0,) * width
+    for point in points:
+        if len(point) != width:
+            raise ValueError('Точки ряда должны быть одной ширины')
+        for value, prev in zip(point, previous):
+            _write_varint(buffer, _zigzag(value - prev))
+        previous = point
+    return bytes(buffer)
+
+
+def decode_series(data):
+    """Обратное к encode_series: список кортежей"""
+    data = bytes(data)
+    width, position = _read_varint(data, 0)
+    count, position = _read_varint(data, position)
+    points = []
+    previous = [0] * width
+    for _ in range(count):
+        for index in range(width):
+            delta, position = _read_varint(data, position)
+            previous[index] += _unzigzag(delta)
+        points.append(tuple(previous))
+    return points
+
+
+def downsample_steps(points, start, end, max_points):
+    """
+    Прореживает ступенчатый ряд (значение действует до следующей точки)
+    до max_points интервалов равной длины на [start, end].
+
+    points — отсортированные по времени (timestamp, value, ...); может
+    начинаться до start, тогда значение на начало интервала переносится.
+    Возвращает [(bucket_start, last_point, min, max), ...]; min и max —
+    по первому значению точек, действовавших в интервале.
+    """
+    if end <= start or max_points < 1:
+        return []
+    step = max((end - start) / max_points, 1)
+    buckets = []
+    current = None
+    index = 0
+
+    while index < len(points) and points[index][0] <= start:
+        current = points[index]
+        index += 1
+
+    bucket_start = start
+    while bucket_start < end:
+        bucket_end = min(bucket_start + step, end)
+        # Последний интервал включает точку ровно на end
+        limit = bucket_end if bucket_end < end else end + 1
+        low = high = current[1] if current is not None else None
+        while index < len(points) and points[index][0] < limit:
+            current = points[index]
+            low = current[1] if low is None else min(low, current[1])
+            high = current[1] if high is None else max(high, current[1])
+            index += 1
+        if current is not None:
+            buckets.append((int(bucket_start), current, low, high))
+        bucket_start = bucket_end
+    return buckets
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: индексы threshold точек ряда (x, y),
+    сохраняющих форму графика. Первая и последняя точки остаются всегда.
+    x должен быть отсортирован. Площади треугольников внутри корзины
+    считаются векторно, цикл — только по корзинам.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+
+    # Внутренние точки 1..size-2 делятся на threshold-2 непустых корзин
+    edges = np.linspace(1, size - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:-1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:-1], edges[:-1] - 1) / counts
+    # Для последней корзины следующей "средней" точкой служит последняя точка ряда
+    mean_x = np.append(mean_x[1:], x[-1])
+    mean_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        areas = np.abs((ax - mean_x[bucket]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (mean_y[bucket] - ay))
+        previous = lo + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
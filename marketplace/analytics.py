@@ -0,0 +1,164 @@
+"""
+Аналитика продаж продавцов.
+
+Выручка и единицы по товарам хранятся готовыми суммами в
+SellerSalesRollup за день, неделю и месяц (по дате заказа). Заказ
+добавляется в суммы один раз, когда он оплачен или доставлен
+(воркер событий заказа), а backfill_seller_rollups пересчитывает
+суммы сгруппированными запросами по OrderItem. Дашборд читает
+только SellerSalesRollup.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DateField, DecimalField, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .models import Order, OrderItem, SellerSalesRollup
+
+PERIODS = ('day', 'week', 'month')
+# Заказы, продажи которых учитываются: оплаченные или доставленные, кроме отмененных и возвращенных
+RECORDABLE_ORDERS = (
+    (Q(payment_status='paid') | Q(status='delivered'))
+    & ~Q(status__in=['cancelled', 'returned'])
+)
+
+
+def period_start(day, period):
+    """Начало дня, недели (понедельник) или месяца, в который попадает day"""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _by_product(values, output_field):
+    return Case(
+        *[When(product_id=product_id, then=Value(value)) for product_id, value in values.items()],
+        default=Value(0),
+        output_field=output_field,
+    )
+
+
+def record_order_sales(order):
+    """
+    Добавляет продажи заказа в суммы продавцов: по одному UPDATE на период.
+    Повторный вызов для того же заказа ничего не меняет. Возвращает True, если заказ учтен.
+    """
+    with transaction.atomic():
+        if not Order.objects.filter(pk=order.pk, sales_recorded=False).update(sales_recorded=True):
+            return False
+
+        rows = list(
+            OrderItem.objects.filter(order=order)
+            .values('product_id', 'product__seller_id')
+            .annotate(revenue=Sum('total_price'), units=Sum('quantity'))
+            .order_by('product_id')
+        )
+        if not rows:
+            return True
+
+        revenue = {row['product_id']: row['revenue'] for row in rows}
+        units = {row['product_id']: row['units'] for row in rows}
+        order_day = timezone.localtime(order.created_at).date()
+
+        for period in PERIODS:
+            start = period_start(order_day, period)
+            SellerSalesRollup.objects.bulk_create(
+                [
+                    SellerSalesRollup(
+                        seller_id=row['product__seller_id'], product_id=row['product_id'],
+                        period=period, period_start=start,
+                    )
+                    for row in rows
+                ],
+                ignore_conflicts=True,
+            )
+            SellerSalesRollup.objects.filter(period=period, period_start=start, product_id__in=revenue).update(
+                revenue=F('revenue') + _by_product(revenue, DecimalField(max_digits=14, decimal_places=2)),
+                units=F('units') + _by_product(units, IntegerField()),
+                orders_count=F('orders_count') + 1,
+            )
+    return True
+
+
+def backfill_seller_rollups(since=None, batch_size=1000):
+    """
+    Пересчитывает суммы продаж по заказам (с начала месяца даты since или
+    целиком) одним сгруппированным запросом на период. Возвращает количество строк.
+    """
+    created = 0
+    # Одна нижняя граница для всех периодов: заказы с нее помечаются учтенными
+    lower = period_start(since, 'month') if since is not None else None
+    with transaction.atomic():
+        orders = Order.objects.filter(RECORDABLE_ORDERS)
+        for period in PERIODS:
+            rollups = SellerSalesRollup.objects.filter(period=period)
+            items = OrderItem.objects.filter(order__in=orders)
+            if lower is not None:
+                start = period_start(lower, period)
+                rollups = rollups.filter(period_start__gte=start)
+                # Неделя, начатая в прошлом месяце, пересобирается целиком, но из ее заказов
+                # до lower берутся только уже учтенные: остальные добавит record_order_sales
+                items = items.filter(
+                    Q(order__created_at__date__gte=lower)
+                    | Q(order__created_at__date__gte=start, order__sales_recorded=True)
+                )
+            rollups.delete()
+
+            rows = (
+                items.annotate(
+                    bucket=Trunc('order__created_at', period, output_field=DateField())
+                )
+                .values('product_id', 'product__seller_id', 'bucket')
+                .annotate(revenue=Sum('total_price'), units=Sum('quantity'), orders=Count('order', distinct=True))
+                .order_by()
+            )
+            objs = [
+                SellerSalesRollup(
+                    seller_id=row['product__seller_id'], product_id=row['product_id'], period=period,
+                    period_start=row['bucket'], revenue=row['revenue'], units=row['units'],
+                    orders_count=row['orders'],
+                )
+                for row in rows.iterator(chunk_size=batch_size)
+            ]
+            SellerSalesRollup.objects.bulk_create(objs, batch_size=batch_size)
+            created += len(objs)
+
+        recorded = orders if lower is None else orders.filter(created_at__date__gte=lower)
+        recorded.filter(sales_recorded=False).update(sales_recorded=True)
+    return created
+
+
+def get_seller_dashboard(seller, period='day', start=None, end=None, top=10):
+    """Ряд выручки и единиц по периодам и лучшие товары продавца за интервал"""
+    rollups = SellerSalesRollup.objects.filter(seller=seller, period=period)
+    if start is not None:
+        rollups = rollups.filter(period_start__gte=period_start(start, period))
+    if end is not None:
+        rollups = rollups.filter(period_start__lte=end)
+
+    series = list(
+        rollups.values('period_start')
+        .annotate(revenue=Sum('revenue'), units=Sum('units'))
+        .order_by('period_start')
+    )
+    top_products = list(
+        rollups.values('product_id', 'product__name')
+        .annotate(revenue=Sum('revenue'), units=Sum('units'))
+        .order_by('-revenue', 'product_id')[:top]
+    )
+    return {
+        'series': series,
+        'top_products': [
+            {'product_id': row['product_id'], 'name': row['product__name'],
+             'revenue': row['revenue'], 'units': row['units']}
+            for row in top_products
+        ],
+        'total_revenue': sum((row['revenue'] for row in series), Decimal('0')),
+        'total_units': sum(row['units'] for row in series),
+    }
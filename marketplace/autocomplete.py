@@ -0,0 +1,28 @@
+"""
+Источники индексов автодополнения маркетплейса (см. core.autocomplete).
+
+Вес товара — количество продаж, вес бренда — суммарные продажи его
+активных товаров.
+"""
+
+from django.db.models import Q, Sum
+
+from .models import Brand, Product
+
+
+def product_items():
+    """Активные товары: (id, название, продажи)"""
+    return (
+        Product.objects.filter(status='active')
+        .values_list('pk', 'name', 'sales_count')
+        .iterator(chunk_size=5000)
+    )
+
+
+def brand_items():
+    """Активные бренды: (id, название, продажи товаров бренда)"""
+    return (
+        Brand.objects.filter(is_active=True)
+        .annotate(sales=Sum('product__sales_count', filter=Q(product__status='active')))
+        .values_list('pk', 'name', 'sales')
+    )
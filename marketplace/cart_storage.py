@@ -0,0 +1,350 @@
+"""
+Хранилища корзины.
+
+Большинство корзин бросают, поэтому по умолчанию корзина живет в сессии
+(анонимные пользователи) или в кеше (авторизованные), а строки
+Cart/CartItem пишутся только при оформлении заказа или явном сохранении.
+Режим выбирается настройкой MARKETPLACE_CART_STORAGE.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.exceptions import InsufficientStockError, NotFoundError
+from .models import Cart, CartItem, Product
+
+SESSION_CART_KEY = 'marketplace_cart'
+USER_CART_CACHE_KEY = 'marketplace:cart:user:{}'
+
+
+class CartLine:
+    """Позиция корзины, не привязанная к способу хранения"""
+
+    def __init__(self, product, quantity, price):
+        self.product = product
+        self.product_id = product.pk
+        self.quantity = quantity
+        self.price = price
+
+    @property
+    def total_price(self):
+        return self.price * self.quantity
+
+
+class CartContents:
+    """Содержимое корзины для сериализации"""
+
+    def __init__(self, items, summary, prices_changed=False):
+        self.items = items
+        self.summary = summary
+        self.prices_changed = prices_changed
+
+
+def _summary(lines):
+    """Итоги по словарю {product_id: {'quantity', 'price'}} без запросов к БД"""
+    return {
+        'total_amount': sum((Decimal(line['price']) * line['quantity'] for line in lines.values()), Decimal('0')),
+        'total_items': sum(line['quantity'] for line in lines.values()),
+        'positions': len(lines),
+    }
+
+
+def _merge_lines(lines, other_lines):
+    for product_id, line in other_lines.items():
+        if product_id in lines:
+            lines[product_id]['quantity'] += line['quantity']
+        else:
+            lines[product_id] = dict(line)
+    return lines
+
+
+def _get_purchasable_product(product_id):
+    try:
+        return Product.objects.only(
+            'pk', 'price', 'stock_quantity', 'reserved_quantity', 'stock_shards_count'
+        ).get(pk=product_id, status='active')
+    except Product.DoesNotExist:
+        raise NotFoundError('Товар не найден или недоступен для покупки')
+
+
+def save_lines_to_database(user, lines):
+    """
+    Записывает корзину в Cart/CartItem пакетно: создает новые позиции,
+    обновляет измененные и удаляет лишние.
+    """
+    with transaction.atomic():
+        cart, _ = Cart.objects.get_or_create(user=user)
+        existing = {item.product_id: item for item in cart.items.all()}
+
+        to_create, to_update = [], []
+        for product_id, line in lines.items():
+            price = Decimal(line['price'])
+            item = existing.pop(product_id, None)
+            if item is None:
+                to_create.append(CartItem(cart=cart, product_id=product_id, quantity=line['quantity'], price=price))
+            elif (item.quantity, item.price) != (line['quantity'], price):
+                item.quantity, item.price = line['quantity'], price
+                to_update.append(item)
+
+        CartItem.objects.bulk_create(to_create)
+        CartItem.objects.bulk_update(to_update, ['quantity', 'price'])
+        CartItem.objects.filter(pk__in=[item.pk for item in existing.values()]).delete()
+        Cart.invalidate_summary(cart.pk)
+    return cart
+
+
+class DictCartStorage:
+    """
+    Базовое хранилище: корзина — словарь {product_id: {'quantity', 'price'}}.
+    Наследники реализуют _read/_write.
+    """
+
+    def __init__(self, request, user=None):
+        self.request = request
+        self.user = user if user is not None else request.user
+
+    def _read(self):
+        raise NotImplementedError
+
+    def _write(self, lines):
+        raise NotImplementedError
+
+    def get_lines(self):
+        return {int(product_id): line for product_id, line in self._read().items()}
+
+    def _save_lines(self, lines):
+        self._write({str(product_id): line for product_id, line in lines.items()})
+
+    def add(self, product_id, quantity=1):
+        product = _get_purchasable_product(product_id)
+        lines = self.get_lines()
+        line = lines.get(product.pk, {'quantity': 0, 'price': str(product.price)})
+        line['quantity'] += quantity
+        if line['quantity'] > product.available_quantity:
+            raise InsufficientStockError(product.pk, line['quantity'])
+        lines[product.pk] = line
+        self._save_lines(lines)
+        return CartLine(product, line['quantity'], Decimal(line['price']))
+
+    def update(self, product_id, quantity):
+        lines = self.get_lines()
+        if product_id not in lines:
+            raise NotFoundError('Товара нет в корзине')
+        if quantity <= 0:
+            return self.remove(product_id)
+
+        product = _get_purchasable_product(product_id)
+        if quantity > product.available_quantity:
+            raise InsufficientStockError(product_id, quantity)
+        lines[product_id]['quantity'] = quantity
+        self._save_lines(lines)
+        return CartLine(product, quantity, Decimal(lines[product_id]['price']))
+
+    def remove(self, product_id):
+        lines = self.get_lines()
+        if lines.pop(product_id, None) is None:
+            raise NotFoundError('Товара нет в корзине')
+        self._save_lines(lines)
+        return None
+
+    def merge(self, other_lines):
+        """Добавляет позиции другой корзины (например, анонимной при входе)"""
+        self._save_lines(_merge_lines(self.get_lines(), other_lines))
+
+    def clear(self):
+        self._save_lines({})
+
+    def get_summary(self):
+        return _summary(self.get_lines())
+
+    def get_contents(self):
+        """Содержимое с товарами; цены позиций сверяются с текущими ценами товаров"""
+        lines = self.get_lines()
+        products = Product.objects.prefetch_related('stock_shards').in_bulk(list(lines))
+
+        prices_changed = False
+        for product_id, line in lines.items():
+            product = products.get(product_id)
+            if product is not None and Decimal(line['price']) != product.price:
+                line['price'] = str(product.price)
+                prices_changed = True
+        if prices_changed:
+            self._save_lines(lines)
+
+        items = [
+            CartLine(products[product_id], line['quantity'], Decimal(line['price']))
+            for product_id, line in lines.items()
+            if product_id in products
+        ]
+        return CartContents(items, _summary(lines), prices_changed)
+
+    def persist(self):
+        """Явное сохранение корзины в БД (при оформлении заказа)"""
+        return save_lines_to_database(self.user, self.get_lines())
+
+
+class SessionCartStorage(DictCartStorage):
+    """Корзина анонимного пользователя в сессии"""
+
+    def _read(self):
+        return self.request.session.get(SESSION_CART_KEY, {})
+
+    def _write(self, lines):
+        self.request.session[SESSION_CART_KEY] = lines
+
+    def persist(self):
+        raise NotFoundError('Для сохранения корзины нужно войти в систему')
+
+
+class UserCartStorage(DictCartStorage):
+    """
+    Корзина авторизованного пользователя вне БД.
+    При отсутствии корзины поднимается ранее сохраненная в БД.
+    """
+
+    def _read(self):
+        lines = self._read_stored()
+        if lines is None:
+            lines = {
+                str(product_id): {'quantity': quantity, 'price': str(price)}
+                for product_id, quantity, price in CartItem.objects.filter(
+                    cart__user=self.user
+                ).values_list('product_id', 'quantity', 'price')
+            }
+        return lines
+
+    def _read_stored(self):
+        raise NotImplementedError
+
+
+class CacheCartStorage(UserCartStorage):
+    """Корзина авторизованного пользователя в кеше (Redis)"""
+
+    @property
+    def cache_key(self):
+        return USER_CART_CACHE_KEY.format(self.user.pk)
+
+    def _read_stored(self):
+        return cache.get(self.cache_key)
+
+    def _write(self, lines):
+        cache.set(self.cache_key, lines, settings.MARKETPLACE_CART_TTL)
+
+
+class InMemoryCartStorage(UserCartStorage):
+    """Корзина в памяти процесса — замена кеша для тестов"""
+    carts = {}
+
+    @classmethod
+    def reset(cls):
+        cls.carts.clear()
+
+    def _read_stored(self):
+        return self.carts.get(self.user.pk)
+
+    def _write(self, lines):
+        self.carts[self.user.pk] = lines
+
+
+class DatabaseCartStorage:
+    """Корзина в таблицах Cart/CartItem — каждое изменение пишется в БД"""
+
+    def __init__(self, request, user=None):
+        self.request = request
+        self.user = user if user is not None else request.user
+
+    def get_lines(self):
+        return {
+            product_id: {'quantity': quantity, 'price': str(price)}
+            for product_id, quantity, price in CartItem.objects.filter(
+                cart__user=self.user
+            ).values_list('product_id', 'quantity', 'price')
+        }
+
+    def _get_item(self, product_id):
+        try:
+            return CartItem.objects.select_related('product').get(cart__user=self.user, product_id=product_id)
+        except CartItem.DoesNotExist:
+            raise NotFoundError('Товара нет в корзине')
+
+    def add(self, product_id, quantity=1):
+        product = _get_purchasable_product(product_id)
+        with transaction.atomic():
+            cart, _ = Cart.objects.get_or_create(user=self.user)
+            item, created = CartItem.objects.get_or_create(
+                cart=cart, product=product, defaults={'quantity': quantity, 'price': product.price}
+            )
+            if not created:
+                item.quantity += quantity
+            if item.quantity > product.available_quantity:
+                raise InsufficientStockError(product_id, item.quantity)
+            if not created:
+                item.save(update_fields=['quantity', 'updated_at'])
+        return item
+
+    def update(self, product_id, quantity):
+        item = self._get_item(product_id)
+        if quantity <= 0:
+            item.delete()
+            return None
+        if quantity > item.product.available_quantity:
+            raise InsufficientStockError(product_id, quantity)
+        item.quantity = quantity
+        item.save(update_fields=['quantity', 'updated_at'])
+        return item
+
+    def remove(self, product_id):
+        self._get_item(product_id).delete()
+        return None
+
+    def merge(self, other_lines):
+        save_lines_to_database(self.user, _merge_lines(self.get_lines(), other_lines))
+
+    def clear(self):
+        CartItem.objects.filter(cart__user=self.user).delete()
+
+    def get_summary(self):
+        cart = Cart.objects.only('pk').filter(user=self.user).first()
+        if cart is None:
+            return _summary({})
+        return cart.get_summary()
+
+    def get_contents(self):
+        """Содержимое корзины; отметка об изменении цен снимается после показа"""
+        from .selectors import get_cart_details
+
+        cart = get_cart_details(self.user)
+        prices_changed = cart.prices_changed_at is not None
+        if prices_changed:
+            Cart.objects.filter(pk=cart.pk).update(prices_changed_at=None)
+        return CartContents(list(cart.items.all()), cart.get_summary(), prices_changed)
+
+    def persist(self):
+        return Cart.objects.get_or_create(user=self.user)[0]
+
+
+CART_STORAGES = {
+    'database': DatabaseCartStorage,
+    'session': CacheCartStorage,
+    'memory': InMemoryCartStorage,
+}
+
+
+def get_cart_storage(request, user=None):
+    """Хранилище корзины для текущего запроса"""
+    user = user if user is not None else request.user
+    if not user.is_authenticated:
+        return SessionCartStorage(request, user)
+    return CART_STORAGES[settings.MARKETPLACE_CART_STORAGE](request, user)
+
+
+def merge_session_cart(request, user):
+    """Переносит анонимную корзину из сессии в корзину пользователя"""
+    lines = SessionCartStorage(request, user).get_lines()
+    if not lines:
+        return
+    get_cart_storage(request, user).merge(lines)
+    request.session.pop(SESSION_CART_KEY, None)
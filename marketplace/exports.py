@@ -0,0 +1,114 @@
+"""
+Потоковая выгрузка товаров и заказов продавца в CSV/JSONL.
+
+Строки читаются серверным курсором (iterator(chunk_size=...)) и сразу
+отдаются генератором, поэтому память не зависит от размера выгрузки.
+Инкрементальная выгрузка: строки с updated_at в (since, watermark],
+где watermark фиксируется в начале выгрузки и возвращается клиенту
+как since для следующего запуска. Массовые .update() товара (резервы,
+продажи, просмотры, рейтинг) в marketplace.services тоже обновляют
+updated_at, иначе такие изменения не попали бы в выгрузку.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import OrderItem, Product
+
+EXPORT_CHUNK_SIZE = 2000
+
+PRODUCT_EXPORT_FIELDS = (
+    'id', 'name', 'slug', 'category__name', 'brand__name', 'price', 'old_price', 'cost_price',
+    'stock_quantity', 'reserved_quantity', 'status', 'rating', 'reviews_count',
+    'views_count', 'sales_count', 'created_at', 'updated_at',
+)
+
+ORDER_EXPORT_FIELDS = (
+    'order__order_number', 'order__status', 'order__payment_status', 'order__created_at',
+    'order__updated_at', 'order__delivery_city', 'product_id', 'product__name',
+    'quantity', 'price', 'total_price',
+)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def _column_name(field):
+    return field.replace('__', '_')
+
+
+def render_csv(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([_column_name(field) for field in fields])
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+def render_jsonl(rows, fields):
+    for row in rows:
+        yield json.dumps(
+            {_column_name(field): row[field] for field in fields}, cls=DjangoJSONEncoder, ensure_ascii=False
+        ) + '\n'
+
+
+RENDERERS = {
+    'csv': render_csv,
+    'jsonl': render_jsonl,
+}
+
+
+def _window(queryset, field, since, watermark):
+    queryset = queryset.filter(**{f'{field}__lte': watermark})
+    if since is not None:
+        queryset = queryset.filter(**{f'{field}__gt': since})
+    return queryset
+
+
+def product_rows(seller=None, since=None, watermark=None):
+    """Товары продавца (или всех продавцов при seller=None) по возрастанию updated_at"""
+    products = Product.objects.all()
+    if seller is not None:
+        products = products.filter(seller=seller)
+    products = _window(products, 'updated_at', since, watermark or timezone.now())
+    return products.order_by('updated_at', 'pk').values(*PRODUCT_EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def order_rows(seller=None, since=None, watermark=None):
+    """Позиции заказов с товарами продавца по возрастанию updated_at заказа"""
+    items = OrderItem.objects.all()
+    if seller is not None:
+        items = items.filter(product__seller=seller)
+    items = _window(items, 'order__updated_at', since, watermark or timezone.now())
+    return (
+        items.order_by('order__updated_at', 'order_id', 'pk')
+        .values(*ORDER_EXPORT_FIELDS)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+EXPORTS = {
+    'products': (product_rows, PRODUCT_EXPORT_FIELDS),
+    'orders': (order_rows, ORDER_EXPORT_FIELDS),
+}
+
+
+def stream_export(kind, file_format, seller=None, since=None):
+    """
+    Возвращает (watermark, генератор строк выгрузки).
+    Запрос к БД выполняется при первой итерации генератора.
+    """
+    get_rows, fields = EXPORTS[kind]
+    watermark = timezone.now()
+    return watermark, RENDERERS[file_format](get_rows(seller, since, watermark), fields)
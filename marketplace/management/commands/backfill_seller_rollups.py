@@ -0,0 +1,16 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from marketplace.analytics import backfill_seller_rollups
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает суммы продаж продавцов по дням, неделям и месяцам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, help='Пересчитать начиная с месяца даты (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пакета записи')
+
+    def handle(self, *args, **options):
+        created = backfill_seller_rollups(since=options['since'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Записано строк аналитики: {created}'))
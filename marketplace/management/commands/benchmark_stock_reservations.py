@@ -0,0 +1,97 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from accounts.models import User
+from core.exceptions import InsufficientStockError
+from marketplace.models import Product, ProductCategory
+from marketplace.services import enable_sharded_stock, rebalance_stock_shards, reserve_stock
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест резервирования: много покупателей одновременно '
+        'разбирают остаток одного товара (нужна PostgreSQL)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=32, help='Количество параллельных покупателей')
+        parser.add_argument('--stock', type=int, default=2000, help='Начальный остаток товара')
+        parser.add_argument('--quantity', type=int, default=1, help='Единиц товара в одном резерве')
+        parser.add_argument('--shards', type=int, default=0, help='Включить шардированный остаток с N шардами')
+        parser.add_argument('--keep', action='store_true', help='Не удалять тестовый товар после прогона')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            self.stderr.write('SQLite не поддерживает конкурентную запись, результаты будут нерепрезентативны')
+
+        product = self.create_product(options['stock'])
+        if options['shards']:
+            enable_sharded_stock(product.pk, options['shards'])
+        successes = []
+        failures = []
+        lock = threading.Lock()
+
+        def buyer():
+            taken = rejected = 0
+            try:
+                while True:
+                    try:
+                        reserve_stock(product.pk, options['quantity'])
+                        taken += 1
+                    except InsufficientStockError:
+                        rejected += 1
+                        break
+            finally:
+                connections.close_all()
+            with lock:
+                successes.append(taken)
+                failures.append(rejected)
+
+        threads = [threading.Thread(target=buyer) for _ in range(options['buyers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if options['shards']:
+            rebalance_stock_shards(product.pk)
+        product.refresh_from_db()
+        holds = sum(successes)
+        mode = f'шардов: {options["shards"]}' if options['shards'] else 'без шардирования'
+        self.stdout.write(f'Режим: {mode}')
+        self.stdout.write(f'Покупателей: {options["buyers"]}, резервов: {holds}, отказов: {sum(failures)}')
+        self.stdout.write(f'Время: {elapsed:.2f} с, пропускная способность: {holds / elapsed:.0f} резервов/с')
+        self.stdout.write(
+            f'Остаток: {product.stock_quantity}, зарезервировано: {product.reserved_quantity}'
+        )
+
+        oversold = product.reserved_quantity > product.stock_quantity
+        if oversold or holds * options['quantity'] != product.reserved_quantity:
+            self.stderr.write(self.style.ERROR('Нарушена согласованность остатков!'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Перепродаж нет'))
+
+        if not options['keep']:
+            product.delete()
+
+    def create_product(self, stock):
+        seller, _ = User.objects.get_or_create(
+            email='benchmark-seller@example.com',
+            defaults={'user_type': 'business', 'phone': '+79990000000', 'city': 'Benchmark'},
+        )
+        category, _ = ProductCategory.objects.get_or_create(name='Benchmark', defaults={'slug': 'benchmark'})
+        return Product.objects.create(
+            seller=seller,
+            category=category,
+            name=f'Benchmark {time.time_ns()}',
+            slug=f'benchmark-{time.time_ns()}',
+            description='Товар для нагрузочного теста',
+            price=1,
+            stock_quantity=stock,
+            status='active',
+        )
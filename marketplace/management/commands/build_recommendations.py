@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from marketplace.recommendations import DEFAULT_MAX_ORDER_SIZE, DEFAULT_TOP_K, build_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает рекомендации «с этим товаром покупают» по истории заказов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K, help='Соседей на товар')
+        parser.add_argument(
+            '--max-order-size', type=int, default=DEFAULT_MAX_ORDER_SIZE,
+            help='Заказы с большим числом товаров не учитываются'
+        )
+
+    def handle(self, *args, **options):
+        rows = build_recommendations(top_k=options['top_k'], max_order_size=options['max_order_size'])
+        self.stdout.write(self.style.SUCCESS(f'Сохранено рекомендаций: {rows}'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from marketplace.stock_monitor import check_stock_levels
+
+
+class Command(BaseCommand):
+    help = 'Проверяет остатки всех товаров: статусы наличия и уведомления продавцам'
+
+    def handle(self, *args, **options):
+        flipped, alerts = check_stock_levels()
+        self.stdout.write(self.style.SUCCESS(
+            f'Изменено статусов: {flipped}, отправлено уведомлений: {alerts}'
+        ))
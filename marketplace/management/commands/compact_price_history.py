@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from marketplace.price_history import compact_price_history
+
+
+class Command(BaseCommand):
+    help = 'Сворачивает старые изменения цен в сжатые сегменты истории'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=int, default=24, help='Сворачивать изменения старше N часов')
+        parser.add_argument('--batch-size', type=int, default=500, help='Товаров за одну транзакцию')
+
+    def handle(self, *args, **options):
+        compacted = compact_price_history(
+            older_than=timedelta(hours=options['older_than_hours']),
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Свернуто изменений цен: {compacted}'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from marketplace.services import expire_reservations
+
+
+class Command(BaseCommand):
+    help = 'Снимает просроченные резервы товаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Резервов за одну транзакцию')
+
+    def handle(self, *args, **options):
+        expired = expire_reservations(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Снято просроченных резервов: {expired}'))
@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from accounts.models import User
+from marketplace.exports import EXPORTS, RENDERERS, stream_export
+
+
+class Command(BaseCommand):
+    help = 'Потоковая выгрузка товаров или заказов в CSV/JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(EXPORTS), help='Что выгружать')
+        parser.add_argument('--format', dest='file_format', choices=list(RENDERERS), default='csv')
+        parser.add_argument('--since', help='Только строки, измененные после даты (ISO 8601)')
+        parser.add_argument('--seller', type=int, help='id продавца; по умолчанию все продавцы')
+        parser.add_argument('--output', help='Файл для записи; по умолчанию stdout')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError('Неверный формат --since')
+
+        seller = None
+        if options['seller']:
+            seller = User.objects.filter(pk=options['seller']).first()
+            if seller is None:
+                raise CommandError('Продавец не найден')
+
+        watermark, content = stream_export(options['kind'], options['file_format'], seller, since)
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in content:
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
+        self.stderr.write(self.style.SUCCESS(f'Следующая выгрузка: --since {watermark.isoformat()}'))
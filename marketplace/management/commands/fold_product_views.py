@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from marketplace.services import fold_product_views
+
+
+class Command(BaseCommand):
+    help = 'Переносит уникальные просмотры товаров из скетчей в views_count'
+
+    def handle(self, *args, **options):
+        added = fold_product_views()
+        self.stdout.write(self.style.SUCCESS(f'Добавлено просмотров: {added}'))
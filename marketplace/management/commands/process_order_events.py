@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from marketplace.services import process_order_events
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает накопившиеся события заказов (outbox)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Событий за один проход')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_order_events(batch_size=options['batch_size'])
+            total += processed
+            if processed < options['batch_size']:
+                break
+        self.stdout.write(self.style.SUCCESS(f'Обработано событий заказов: {total}'))
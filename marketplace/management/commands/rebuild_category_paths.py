@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from marketplace.services import rebuild_category_paths
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает пути в дереве категорий товаров'
+
+    def handle(self, *args, **options):
+        changed = rebuild_category_paths()
+        self.stdout.write(self.style.SUCCESS(f'Обновлено категорий: {changed}'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from marketplace.services import reconcile_product_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинги и количество отзывов товаров по одобренным отзывам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Размер пакета обновления')
+
+    def handle(self, *args, **options):
+        changed = reconcile_product_ratings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Обновлено товаров: {changed}'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from marketplace.services import sync_stock_shards
+
+
+class Command(BaseCommand):
+    help = 'Переносит продажи из шардов остатков в товары и выравнивает шарды'
+
+    def handle(self, *args, **options):
+        synced = sync_stock_shards()
+        self.stdout.write(self.style.SUCCESS(f'Синхронизировано товаров: {synced}'))
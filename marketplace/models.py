@@ -1,12 +1,21 @@
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Concat, Substr
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.utils.text import slugify
+from django.utils import timezone
 from accounts.models import User
 from core.mixins import TimeStampedMixin
+from core.sequences import next_value
+from core.slugs import unique_slug
 
 
 class ProductCategory(TimeStampedMixin):
     """Категории товаров"""
+    PATH_SEGMENT_LENGTH = 8
+
     name = models.CharField(max_length=100, unique=True, verbose_name='Название')
     slug = models.SlugField(max_length=100, unique=True, verbose_name='URL slug')
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
@@ -15,20 +24,82 @@ class ProductCategory(TimeStampedMixin):
     is_active = models.BooleanField(default=True, verbose_name='Активна')
     sort_order = models.PositiveIntegerField(default=0, verbose_name='Порядок сортировки')
 
+    # Материализованный путь: "00000001/00000007/" — id всех предков и самой категории
+    path = models.CharField(max_length=255, db_index=True, editable=False, default='', verbose_name='Путь в дереве')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Уровень вложенности')
+
     class Meta:
         verbose_name = 'Категория товаров'
         verbose_name_plural = 'Категории товаров'
         ordering = ['sort_order', 'name']
 
+    @classmethod
+    def build_path(cls, parent_path, pk):
+        return f"{parent_path}{pk:0{cls.PATH_SEGMENT_LENGTH}d}/"
+
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+            self.slug = unique_slug(self)
+
+        old_path = self.path
+        parent_path = ''
+        if self.parent_id:
+            parent_path = ProductCategory.objects.values_list('path', flat=True).get(pk=self.parent_id)
+            if old_path and parent_path.startswith(old_path):
+                raise ValueError('Категорию нельзя переместить внутрь собственной подкатегории')
+
+        if self.pk:
+            self.path = self.build_path(parent_path, self.pk)
+            self.depth = parent_path.count('/')
+            if 'update_fields' in kwargs and kwargs['update_fields'] is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'path', 'depth'}
+            super().save(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+            self.path = self.build_path(parent_path, self.pk)
+            self.depth = parent_path.count('/')
+            ProductCategory.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+
+        if old_path and old_path != self.path:
+            self._move_descendants(old_path)
+
+    def _move_descendants(self, old_path):
+        """Переносит поддерево одним UPDATE по префиксу пути"""
+        depth_delta = self.path.count('/') - old_path.count('/')
+        ProductCategory.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+            path=Concat(Value(self.path), Substr('path', len(old_path) + 1)),
+            depth=F('depth') + depth_delta,
+        )
+
+    def get_descendants(self, include_self=False):
+        """Все подкатегории (одно сканирование индекса по префиксу)"""
+        descendants = ProductCategory.objects.filter(path__startswith=self.path)
+        if not include_self:
+            descendants = descendants.exclude(pk=self.pk)
+        return descendants
+
+    def get_ancestors(self):
+        """Все родительские категории от корня"""
+        ancestor_ids = [int(segment) for segment in self.path.split('/')[:-2]]
+        return ProductCategory.objects.filter(pk__in=ancestor_ids).order_by('depth')
+
+    def get_products(self, include_descendants=True):
+        """Товары категории, по умолчанию вместе со всеми подкатегориями"""
+        if include_descendants:
+            return Product.objects.filter(category__path__startswith=self.path)
+        return Product.objects.filter(category=self)
 
     def __str__(self):
-        if self.parent:
+        if not self.parent_id:
+            return self.name
+        if ProductCategory.parent.is_cached(self):
             return f"{self.parent.name} > {self.name}"
-        return self.name
+
+        from .selectors import get_category_index
+        parent = get_category_index().get(self.parent_id)
+        if parent is None:
+            return f"{self.parent.name} > {self.name}"
+        return f"{parent['name']} > {self.name}"
 
 
 class Product(TimeStampedMixin):
@@ -81,6 +152,12 @@ class Product(TimeStampedMixin):
     views_count = models.PositiveIntegerField(default=0, verbose_name='Количество просмотров')
     sales_count = models.PositiveIntegerField(default=0, verbose_name='Количество продаж')
 
+    # Шардированный остаток для горячих товаров: 0 — остаток хранится в строке товара
+    stock_shards_count = models.PositiveSmallIntegerField(default=0, verbose_name='Количество шардов остатка')
+
+    # Когда продавец получил уведомление о низком остатке; сбрасывается после пополнения
+    low_stock_alerted_at = models.DateTimeField(null=True, blank=True, verbose_name='Уведомление о низком остатке')
+
     class Meta:
         verbose_name = 'Товар'
         verbose_name_plural = 'Товары'
@@ -89,15 +166,31 @@ class Product(TimeStampedMixin):
             models.Index(fields=['status', 'category']),
             models.Index(fields=['price']),
             models.Index(fields=['-created_at']),
+            # Запас сверх минимального остатка — для поиска товаров с низким остатком
+            models.Index(
+                F('stock_quantity') - F('reserved_quantity') - F('min_stock_level'),
+                name='product_stock_margin_idx',
+                condition=Q(status__in=['active', 'out_of_stock']),
+            ),
         ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            self.slug = unique_slug(self)
         super().save(*args, **kwargs)
 
     @property
     def available_quantity(self):
+        if self.stock_shards_count:
+            # Свободный остаток распределен по шардам (см. StockShard)
+            if not hasattr(self, 'sharded_available'):
+                prefetched = getattr(self, '_prefetched_objects_cache', {}).get('stock_shards')
+                if prefetched is not None:
+                    self.sharded_available = sum(shard.quantity for shard in prefetched)
+                else:
+                    total = self.stock_shards.aggregate(total=Sum('quantity'))['total']
+                    self.sharded_available = total or 0
+            return self.sharded_available
         return self.stock_quantity - self.reserved_quantity
 
     @property
@@ -125,7 +218,7 @@ class ProductTag(TimeStampedMixin):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            self.slug = unique_slug(self)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -147,7 +240,7 @@ class Brand(TimeStampedMixin):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            self.slug = unique_slug(self)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -157,18 +250,58 @@ class Brand(TimeStampedMixin):
 class Cart(TimeStampedMixin):
     """Корзина покупателя"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart', verbose_name='Пользователь')
+    # Цены товаров в корзине обновлены — покупателю показывается уведомление
+    prices_changed_at = models.DateTimeField(null=True, blank=True, verbose_name='Цены изменились')
 
     class Meta:
         verbose_name = 'Корзина'
         verbose_name_plural = 'Корзины'
 
+    SUMMARY_CACHE_KEY = 'marketplace:cart:{}:summary'
+
     @property
     def total_amount(self):
-        return sum(item.total_price for item in self.items.all())
+        return self.get_summary()['total_amount']
 
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.get_summary()['total_items']
+
+    def get_summary(self):
+        """
+        Итоги корзины. Если товары уже загружены через prefetch_related,
+        считаются по ним, иначе — одним агрегирующим запросом с кешированием.
+        """
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('items')
+        if prefetched is not None:
+            return {
+                'total_amount': sum((item.total_price for item in prefetched), Decimal('0')),
+                'total_items': sum(item.quantity for item in prefetched),
+                'positions': len(prefetched),
+            }
+
+        key = self.SUMMARY_CACHE_KEY.format(self.pk)
+        summary = cache.get(key)
+        if summary is None:
+            summary = self.items.aggregate(
+                total_amount=Coalesce(
+                    Sum(F('price') * F('quantity'), output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+                    Value(Decimal('0')),
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2),
+                ),
+                total_items=Coalesce(Sum('quantity'), Value(0)),
+                positions=Count('id'),
+            )
+            cache.set(key, summary, settings.CACHE_TIMEOUTS['medium'])
+        return summary
+
+    @classmethod
+    def invalidate_summary(cls, cart_id):
+        cache.delete(cls.SUMMARY_CACHE_KEY.format(cart_id))
+
+    @classmethod
+    def invalidate_summaries(cls, cart_ids):
+        cache.delete_many([cls.SUMMARY_CACHE_KEY.format(cart_id) for cart_id in cart_ids])
 
     def __str__(self):
         return f"Корзина {self.user.email}"
@@ -192,7 +325,10 @@ class CartItem(TimeStampedMixin):
 
     def save(self, *args, **kwargs):
         if not self.price:
-            self.price = self.product.price
+            if CartItem.product.is_cached(self):
+                self.price = self.product.price
+            else:
+                self.price = Product.objects.values_list('price', flat=True).get(pk=self.product_id)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -244,16 +380,28 @@ class Order(TimeStampedMixin):
     # Дополнительная информация
     notes = models.TextField(blank=True, verbose_name='Комментарии к заказу')
 
+    # Ключ идемпотентности: повтор запроса клиентом с тем же ключом не создает второй заказ
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, verbose_name='Ключ идемпотентности')
+
+    # Продажи заказа учтены в SellerSalesRollup (один раз — при оплате или доставке)
+    sales_recorded = models.BooleanField(default=False, verbose_name='Учтен в аналитике')
+
     class Meta:
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['buyer', 'idempotency_key'], name='unique_order_idempotency_key'),
+        ]
+
+    @staticmethod
+    def allocate_order_number():
+        """Уникальный номер заказа из последовательности (без коллизий)"""
+        return f"ORD-{next_value('order_number'):08d}"
 
     def save(self, *args, **kwargs):
         if not self.order_number:
-            # Генерируем уникальный номер заказа
-            import uuid
-            self.order_number = f"ORD-{uuid.uuid4().hex[:8].upper()}"
+            self.order_number = self.allocate_order_number()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -280,6 +428,93 @@ class OrderItem(TimeStampedMixin):
         return f"{self.product.name} x {self.quantity}"
 
 
+class StockShard(models.Model):
+    """
+    Шард свободного остатка товара.
+
+    В шардированном режиме свободный остаток товара делится между
+    несколькими строками, чтобы параллельные покупки не конкурировали
+    за одну строку Product. Продажи копятся в sold и периодически
+    переносятся в Product (sync_stock_shards).
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_shards', verbose_name='Товар')
+    index = models.PositiveSmallIntegerField(verbose_name='Номер шарда')
+    quantity = models.PositiveIntegerField(default=0, verbose_name='Свободный остаток')
+    sold = models.PositiveIntegerField(default=0, verbose_name='Продано с последней синхронизации')
+
+    class Meta:
+        verbose_name = 'Шард остатка'
+        verbose_name_plural = 'Шарды остатков'
+        unique_together = ('product', 'index')
+
+    def __str__(self):
+        return f"{self.product_id}#{self.index}: {self.quantity}"
+
+
+class StockReservation(TimeStampedMixin):
+    """Резерв товара на складе (холд) с ограниченным временем жизни"""
+    STATUS_CHOICES = [
+        ('active', 'Активен'),
+        ('converted', 'Оформлен в продажу'),
+        ('released', 'Снят'),
+        ('expired', 'Истек'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations', verbose_name='Товар')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='stock_reservations', verbose_name='Покупатель')
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True, blank=True, related_name='reservations', verbose_name='Заказ')
+    quantity = models.PositiveIntegerField(verbose_name='Количество')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active', verbose_name='Статус')
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name='Истекает')
+
+    class Meta:
+        verbose_name = 'Резерв товара'
+        verbose_name_plural = 'Резервы товаров'
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"Резерв {self.product_id} x {self.quantity} ({self.get_status_display()})"
+
+
+class OrderEvent(TimeStampedMixin):
+    """
+    Исходящие события заказа (transactional outbox).
+    Пишутся в той же транзакции, что и изменение заказа, обрабатываются воркером.
+    """
+    EVENT_TYPES = [
+        ('created', 'Заказ создан'),
+        ('paid', 'Заказ оплачен'),
+        ('cancelled', 'Заказ отменен'),
+        ('delivered', 'Заказ доставлен'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает обработки'),
+        ('processed', 'Обработано'),
+        ('failed', 'Ошибка'),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='events', verbose_name='Заказ')
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES, verbose_name='Событие')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Статус')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Попытки')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name='Обработано')
+
+    class Meta:
+        verbose_name = 'Событие заказа'
+        verbose_name_plural = 'События заказов'
+        ordering = ['pk']
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id}: {self.get_event_type_display()} ({self.get_status_display()})"
+
+
 class ProductReview(TimeStampedMixin):
     """Отзывы на товары"""
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='product_reviews', verbose_name='Товар')
@@ -308,4 +543,133 @@ class ProductReview(TimeStampedMixin):
         unique_together = ('product', 'author')
 
     def __str__(self):
-        return f"Отзыв на {self.product.name} - {self.rating}/5"
\ No newline at end of file
+        return f"Отзыв на {self.product.name} - {self.rating}/5"
+
+
+class ProductRatingStats(models.Model):
+    """
+    Агрегаты одобренных отзывов товара: сумма, количество и гистограмма оценок.
+    Поддерживаются инкрементально сигналами ProductReview.
+    """
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name='rating_stats', verbose_name='Товар'
+    )
+    rating_sum = models.PositiveIntegerField(default=0, verbose_name='Сумма оценок')
+    rating_count = models.PositiveIntegerField(default=0, verbose_name='Количество оценок')
+    stars_1 = models.PositiveIntegerField(default=0, verbose_name='Оценок 1')
+    stars_2 = models.PositiveIntegerField(default=0, verbose_name='Оценок 2')
+    stars_3 = models.PositiveIntegerField(default=0, verbose_name='Оценок 3')
+    stars_4 = models.PositiveIntegerField(default=0, verbose_name='Оценок 4')
+    stars_5 = models.PositiveIntegerField(default=0, verbose_name='Оценок 5')
+
+    class Meta:
+        verbose_name = 'Статистика оценок товара'
+        verbose_name_plural = 'Статистика оценок товаров'
+
+    @property
+    def average(self):
+        if not self.rating_count:
+            return Decimal('0')
+        return (Decimal(self.rating_sum) / self.rating_count).quantize(Decimal('0.01'))
+
+    @property
+    def distribution(self):
+        return {stars: getattr(self, f'stars_{stars}') for stars in range(1, 6)}
+
+    def __str__(self):
+        return f"{self.product_id}: {self.average} ({self.rating_count})"
+
+
+class ProductRecommendation(models.Model):
+    """
+    «С этим товаром покупают»: top-K соседей товара по совместным покупкам.
+    Таблица целиком перестраивается офлайн-задачей (recommendations.build_recommendations).
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='recommendations', verbose_name='Товар')
+    recommended = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+', verbose_name='Рекомендуемый товар')
+    rank = models.PositiveSmallIntegerField(verbose_name='Позиция')
+    score = models.PositiveIntegerField(verbose_name='Совместных заказов')
+
+    class Meta:
+        verbose_name = 'Рекомендация товара'
+        verbose_name_plural = 'Рекомендации товаров'
+        ordering = ['product', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='unique_product_recommendation_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.recommended_id} ({self.score})"
+
+
+class ProductPriceChange(models.Model):
+    """Изменение цены товара (append-only). Старые строки сворачиваются в ProductPriceSegment"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_changes', verbose_name='Товар')
+    price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Цена')
+    old_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name='Старая цена')
+    changed_at = models.DateTimeField(default=timezone.now, verbose_name='Дата изменения')
+
+    class Meta:
+        verbose_name = 'Изменение цены'
+        verbose_name_plural = 'Изменения цен'
+        ordering = ['product', 'changed_at']
+        indexes = [
+            models.Index(fields=['product', 'changed_at']),
+            models.Index(fields=['changed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.price} ({self.changed_at:%d.%m.%Y %H:%M})"
+
+
+class ProductPriceSegment(models.Model):
+    """
+    Сжатый участок истории цен: точки (timestamp, цена в копейках, старая цена в копейках)
+    в delta/varint-кодировке core.timeseries.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_segments', verbose_name='Товар')
+    start_at = models.DateTimeField(verbose_name='Начало')
+    end_at = models.DateTimeField(verbose_name='Конец')
+    points_count = models.PositiveIntegerField(verbose_name='Количество точек')
+    data = models.BinaryField(verbose_name='Данные')
+
+    class Meta:
+        verbose_name = 'Сегмент истории цен'
+        verbose_name_plural = 'Сегменты истории цен'
+        ordering = ['product', 'start_at']
+        indexes = [
+            models.Index(fields=['product', 'end_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.points_count} точек"
+
+
+class SellerSalesRollup(models.Model):
+    """Выручка и проданные единицы товара продавца за день, неделю или месяц"""
+    PERIOD_CHOICES = [
+        ('day', 'День'),
+        ('week', 'Неделя'),
+        ('month', 'Месяц'),
+    ]
+
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sales_rollups', verbose_name='Продавец')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='sales_rollups', verbose_name='Товар')
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES, verbose_name='Период')
+    period_start = models.DateField(verbose_name='Начало периода')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Выручка')
+    units = models.PositiveIntegerField(default=0, verbose_name='Продано единиц')
+    orders_count = models.PositiveIntegerField(default=0, verbose_name='Заказов')
+
+    class Meta:
+        verbose_name = 'Продажи продавца за период'
+        verbose_name_plural = 'Продажи продавцов за периоды'
+        ordering = ['seller', 'period', 'period_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['seller', 'period', 'period_start', 'product'], name='unique_seller_sales_rollup'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.seller_id} {self.period} {self.period_start}: {self.revenue}"
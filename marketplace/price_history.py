@@ -0,0 +1,167 @@
+"""
+История цен товаров.
+
+Каждое изменение цены пишется строкой ProductPriceChange. Строки старше
+суток периодически сворачиваются в сегменты ProductPriceSegment
+(до SEGMENT_MAX_POINTS точек в delta/varint-кодировке) и удаляются,
+поэтому запрос графика читает несколько сегментов и короткий хвост
+несвернутых изменений.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.timeseries import decode_series, downsample_steps, encode_series
+from .models import ProductPriceChange, ProductPriceSegment
+
+SEGMENT_MAX_POINTS = 1024
+COMPACT_AFTER = timedelta(days=1)
+
+
+def _to_cents(value):
+    return int(value * 100) if value is not None else 0
+
+
+def _from_cents(value):
+    return (Decimal(value) / 100).quantize(Decimal('0.01'))
+
+
+def _to_timestamp(moment):
+    return int(moment.timestamp())
+
+
+def _from_timestamp(value):
+    return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+
+
+def _change_point(change):
+    return _to_timestamp(change.changed_at), _to_cents(change.price), _to_cents(change.old_price)
+
+
+def record_price_change(product, changed_at=None):
+    """Добавляет текущую цену товара в историю"""
+    return ProductPriceChange.objects.create(
+        product=product,
+        price=product.price,
+        old_price=product.old_price,
+        changed_at=changed_at or timezone.now(),
+    )
+
+
+def _build_segments(product_id, points, tail=None):
+    """
+    Сегменты из точек: сначала дописывается последний неполный сегмент tail,
+    затем создаются новые. Возвращает (to_update, to_create).
+    """
+    to_update, to_create = [], []
+    if tail is not None:
+        free = SEGMENT_MAX_POINTS - tail.points_count
+        if free > 0:
+            merged = decode_series(tail.data) + points[:free]
+            points = points[free:]
+            tail.data = encode_series(merged)
+            tail.points_count = len(merged)
+            tail.end_at = _from_timestamp(merged[-1][0])
+            to_update.append(tail)
+
+    for offset in range(0, len(points), SEGMENT_MAX_POINTS):
+        chunk = points[offset:offset + SEGMENT_MAX_POINTS]
+        to_create.append(ProductPriceSegment(
+            product_id=product_id,
+            start_at=_from_timestamp(chunk[0][0]),
+            end_at=_from_timestamp(chunk[-1][0]),
+            points_count=len(chunk),
+            data=encode_series(chunk),
+        ))
+    return to_update, to_create
+
+
+def compact_price_history(older_than=COMPACT_AFTER, batch_size=500, now=None):
+    """
+    Сворачивает изменения цен старше older_than в сегменты пачками по batch_size товаров.
+    Возвращает количество свернутых изменений.
+    """
+    cutoff = (now or timezone.now()) - older_than
+    product_ids = list(
+        ProductPriceChange.objects.filter(changed_at__lt=cutoff)
+        .values_list('product_id', flat=True).distinct().order_by('product_id')
+    )
+
+    compacted = 0
+    for offset in range(0, len(product_ids), batch_size):
+        batch = product_ids[offset:offset + batch_size]
+        with transaction.atomic():
+            changes = list(
+                ProductPriceChange.objects.select_for_update()
+                .filter(product_id__in=batch, changed_at__lt=cutoff)
+                .order_by('product_id', 'changed_at', 'pk')
+            )
+            last_segment_ids = (
+                ProductPriceSegment.objects.filter(product_id__in=batch)
+                .values('product_id').annotate(last_pk=Max('pk')).values_list('last_pk', flat=True)
+            )
+            tails = {
+                segment.product_id: segment
+                for segment in ProductPriceSegment.objects.filter(pk__in=list(last_segment_ids))
+            }
+
+            points = {}
+            for change in changes:
+                points.setdefault(change.product_id, []).append(_change_point(change))
+
+            to_update, to_create = [], []
+            for product_id, product_points in points.items():
+                updated, created = _build_segments(product_id, product_points, tails.get(product_id))
+                to_update.extend(updated)
+                to_create.extend(created)
+
+            ProductPriceSegment.objects.bulk_update(to_update, ['data', 'points_count', 'end_at'])
+            ProductPriceSegment.objects.bulk_create(to_create)
+            ProductPriceChange.objects.filter(pk__in=[change.pk for change in changes]).delete()
+            compacted += len(changes)
+    return compacted
+
+
+def _load_points(product_id, start, end):
+    """Точки из сегментов и несвернутых изменений, пересекающих [start, end], плюс точка до start"""
+    segments = list(
+        ProductPriceSegment.objects.filter(product_id=product_id, end_at__gte=start, start_at__lte=end)
+        .order_by('start_at')
+    )
+    if not segments or segments[0].start_at > start:
+        previous = (
+            ProductPriceSegment.objects.filter(product_id=product_id, end_at__lt=start)
+            .order_by('-end_at').first()
+        )
+        if previous is not None:
+            segments.insert(0, previous)
+
+    points = [point for segment in segments for point in decode_series(segment.data)]
+    raw = ProductPriceChange.objects.filter(product_id=product_id, changed_at__lte=end)
+    if points:
+        raw = raw.filter(changed_at__gt=_from_timestamp(points[-1][0]))
+    points.extend(_change_point(change) for change in raw.order_by('changed_at', 'pk'))
+    return points
+
+
+def get_price_series(product_id, start, end, max_points=200):
+    """
+    Ряд цены для графика на [start, end], прореженный до max_points интервалов:
+    цена и старая цена на конец интервала, минимум и максимум внутри него.
+    """
+    points = _load_points(product_id, start, end)
+    buckets = downsample_steps(points, _to_timestamp(start), _to_timestamp(end), max_points)
+    return [
+        {
+            'at': _from_timestamp(bucket_start),
+            'price': _from_cents(price),
+            'min_price': _from_cents(low),
+            'max_price': _from_cents(high),
+            'old_price': _from_cents(old_price) if old_price else None,
+        }
+        for bucket_start, (_, price, old_price), low, high in buckets
+    ]
@@ -0,0 +1,199 @@
+"""
+Учет уникальных просмотров товаров.
+
+Просмотры не пишутся в Product на каждый запрос: по каждому товару за
+день ведется скетч HyperLogLog (~4 КБ), в который добавляется
+идентификатор зрителя. Повторный просмотр тем же зрителем скетч не
+меняет и записи не вызывает. Периодически оценки складываются в
+Product.views_count одним UPDATE (services.fold_product_views).
+Режим хранения выбирается настройкой MARKETPLACE_VIEWS_STORAGE.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.hyperloglog import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+VIEWS_SKETCH_KEY = 'marketplace:views:{}:{}'
+VIEWS_COUNTER_KEY = 'marketplace:views:{}:count'
+VIEWS_SLOT_KEY = 'marketplace:views:{}:slot:{}'
+VIEWS_FOLDED_KEY = 'marketplace:views:{}:folded'
+VIEWS_LOCK_KEY = '{}:lock'
+VIEWS_LOCK_TIMEOUT = 5
+VIEWS_LOCK_ATTEMPTS = 50
+VIEWS_LOCK_WAIT = 0.01
+
+
+class CacheViewStore:
+    """
+    Скетчи в кеше (Redis). Товары со скетчами за день регистрируются
+    без общего множества: первый скетч создается через cache.add, после
+    чего товар получает номер слота атомарным cache.incr счетчика дня.
+    Существующий скетч сливается с новым под блокировкой (cache.add).
+    Дни со скетчами определяются по счетчикам за время жизни ключей.
+    """
+    timeout = 3 * 24 * 60 * 60
+
+    def get_sketch(self, day, product_id):
+        data = cache.get(VIEWS_SKETCH_KEY.format(day, product_id))
+        return HyperLogLog.from_bytes(data) if data is not None else None
+
+    def set_sketch(self, day, product_id, sketch, created=False):
+        key = VIEWS_SKETCH_KEY.format(day, product_id)
+        if created and cache.add(key, sketch.to_bytes(), self.timeout):
+            counter_key = VIEWS_COUNTER_KEY.format(day)
+            cache.add(counter_key, 0, self.timeout)
+            slot = cache.incr(counter_key)
+            cache.set(VIEWS_SLOT_KEY.format(day, slot), product_id, self.timeout)
+            return
+        # Параллельные просмотры читают один скетч: без блокировки get -> set
+        # затер бы регистры, выставленные другим запросом
+        with self._lock(key):
+            existing = self.get_sketch(day, product_id)
+            if existing is not None:
+                sketch.merge(existing)
+            cache.set(key, sketch.to_bytes(), self.timeout)
+
+    @contextmanager
+    def _lock(self, key):
+        lock_key = VIEWS_LOCK_KEY.format(key)
+        for _ in range(VIEWS_LOCK_ATTEMPTS):
+            if cache.add(lock_key, True, VIEWS_LOCK_TIMEOUT):
+                break
+            time.sleep(VIEWS_LOCK_WAIT)
+        else:
+            # Держатель блокировки завис: скетч все равно обновляется, в худшем случае недосчет
+            logger.warning('Views sketch lock %s not acquired', lock_key)
+            yield
+            return
+        try:
+            yield
+        finally:
+            cache.delete(lock_key)
+
+    def get_days(self, today=None):
+        today = date.fromisoformat(today) if today else timezone.localdate()
+        candidates = [
+            (today - timedelta(days=offset)).isoformat()
+            for offset in range(self.timeout // (24 * 60 * 60) + 1)
+        ]
+        counters = cache.get_many([VIEWS_COUNTER_KEY.format(day) for day in candidates])
+        return sorted(day for day in candidates if counters.get(VIEWS_COUNTER_KEY.format(day)))
+
+    def _slot_keys(self, day):
+        count = cache.get(VIEWS_COUNTER_KEY.format(day), 0)
+        return [VIEWS_SLOT_KEY.format(day, slot) for slot in range(1, count + 1)]
+
+    def get_product_ids(self, day):
+        return set(cache.get_many(self._slot_keys(day)).values())
+
+    def get_folded(self, day):
+        return cache.get(VIEWS_FOLDED_KEY.format(day), {})
+
+    def set_folded(self, day, folded):
+        cache.set(VIEWS_FOLDED_KEY.format(day), folded, self.timeout)
+
+    def drop_day(self, day):
+        product_ids = self.get_product_ids(day)
+        cache.delete_many(
+            [VIEWS_SKETCH_KEY.format(day, product_id) for product_id in product_ids]
+            + self._slot_keys(day)
+            + [VIEWS_COUNTER_KEY.format(day), VIEWS_FOLDED_KEY.format(day)]
+        )
+
+
+class InMemoryViewStore:
+    """Скетчи в памяти процесса — для тестов и локального запуска"""
+    sketches = {}
+    folded = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls.sketches.clear()
+            cls.folded.clear()
+
+    def get_sketch(self, day, product_id):
+        data = self.sketches.get(day, {}).get(product_id)
+        return HyperLogLog.from_bytes(data) if data is not None else None
+
+    def set_sketch(self, day, product_id, sketch, created=False):
+        with self._lock:
+            existing = self.get_sketch(day, product_id)
+            if existing is not None:
+                sketch.merge(existing)
+            self.sketches.setdefault(day, {})[product_id] = sketch.to_bytes()
+
+    def get_days(self, today=None):
+        return sorted(self.sketches)
+
+    def get_product_ids(self, day):
+        return set(self.sketches.get(day, {}))
+
+    def get_folded(self, day):
+        return dict(self.folded.get(day, {}))
+
+    def set_folded(self, day, folded):
+        self.folded[day] = folded
+
+    def drop_day(self, day):
+        with self._lock:
+            self.sketches.pop(day, None)
+            self.folded.pop(day, None)
+
+
+VIEW_STORES = {
+    'cache': CacheViewStore,
+    'memory': InMemoryViewStore,
+}
+
+
+def get_view_store():
+    return VIEW_STORES[settings.MARKETPLACE_VIEWS_STORAGE]()
+
+
+def get_viewer_id(request):
+    """Идентификатор зрителя: пользователь, сессия или хеш IP и User-Agent"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'u:{user.pk}'
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        return f's:{session.session_key}'
+    fingerprint = f"{request.META.get('REMOTE_ADDR', '')}|{request.META.get('HTTP_USER_AGENT', '')}"
+    return 'a:' + hashlib.sha1(fingerprint.encode()).hexdigest()
+
+
+def track_product_view(product_id, viewer_id, day=None):
+    """
+    Добавляет зрителя в скетч товара за день.
+    Возвращает True, если скетч изменился (новый зритель).
+    """
+    day = (day or timezone.localdate()).isoformat()
+    store = get_view_store()
+    sketch = store.get_sketch(day, product_id)
+    created = sketch is None
+    if created:
+        sketch = HyperLogLog()
+    if not sketch.add(viewer_id):
+        return False
+    store.set_sketch(day, product_id, sketch, created=created)
+    return True
+
+
+def get_unique_views(product_id, day=None):
+    """Оценка уникальных зрителей товара за день"""
+    day = (day or timezone.localdate()).isoformat()
+    sketch = get_view_store().get_sketch(day, product_id)
+    return sketch.count() if sketch is not None else 0
@@ -0,0 +1,112 @@
+"""
+Рекомендации «с этим товаром покупают».
+
+Матрица совместных покупок строится векторно в NumPy: пары
+(заказ, товар) сортируются по заказу, все пары товаров внутри
+заказа порождаются через np.repeat, а одинаковые пары
+считаются np.unique по ключу left * N + right. Из каждой строки
+матрицы в ProductRecommendation сохраняются top-K соседей.
+"""
+
+import numpy as np
+from django.db import transaction
+
+from .models import OrderItem, ProductRecommendation
+
+DEFAULT_TOP_K = 10
+# Крупные (оптовые) заказы дают квадратичное число пар и мало говорят о связи товаров
+DEFAULT_MAX_ORDER_SIZE = 50
+EXCLUDED_ORDER_STATUSES = ('cancelled', 'returned')
+
+
+def load_order_products():
+    """Массивы (order_ids, product_ids) без повторов внутри заказа"""
+    rows = (
+        OrderItem.objects.exclude(order__status__in=EXCLUDED_ORDER_STATUSES)
+        .values_list('order_id', 'product_id')
+        .distinct()
+        .order_by()
+    )
+    pairs = np.array(list(rows.iterator(chunk_size=5000)), dtype=np.int64).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def co_purchase_counts(order_ids, product_ids, max_order_size=DEFAULT_MAX_ORDER_SIZE):
+    """
+    Ненулевые элементы матрицы совместных покупок.
+    Возвращает (left, right, counts) — id товаров и число общих заказов, left != right.
+    """
+    empty = np.empty(0, dtype=np.int64)
+    if not len(order_ids):
+        return empty, empty, empty
+
+    products, product_index = np.unique(product_ids, return_inverse=True)
+    order = np.argsort(order_ids, kind='stable')
+    orders, product_index = order_ids[order], product_index[order]
+
+    _, starts, sizes = np.unique(orders, return_index=True, return_counts=True)
+    keep = (sizes > 1) & (sizes <= max_order_size)
+    starts, sizes = starts[keep], sizes[keep]
+    if not len(sizes):
+        return empty, empty, empty
+
+    # Для каждого элемента заказа — начало заказа, размер и позиция в отсортированном массиве
+    element_starts = np.repeat(starts, sizes)
+    element_sizes = np.repeat(sizes, sizes)
+    positions = element_starts + np.arange(len(element_starts)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+
+    # Каждый элемент в паре со всеми элементами своего заказа
+    left = np.repeat(positions, element_sizes)
+    pair_offsets = np.arange(len(left)) - np.repeat(np.cumsum(element_sizes) - element_sizes, element_sizes)
+    right = np.repeat(element_starts, element_sizes) + pair_offsets
+    distinct = left != right
+    left, right = product_index[left[distinct]], product_index[right[distinct]]
+
+    keys, counts = np.unique(left * len(products) + right, return_counts=True)
+    return products[keys // len(products)], products[keys % len(products)], counts
+
+
+def top_k_neighbours(left, right, counts, top_k=DEFAULT_TOP_K):
+    """
+    Оставляет по top_k соседей каждого товара: по убыванию числа
+    общих заказов, при равенстве — по id. Возвращает (left, right, counts, ranks).
+    """
+    order = np.lexsort((right, -counts, left))
+    left, right, counts = left[order], right[order], counts[order]
+    if not len(left):
+        return left, right, counts, left
+
+    group_starts = np.flatnonzero(np.r_[True, left[1:] != left[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(left)])
+    ranks = np.arange(len(left)) - np.repeat(group_starts, group_sizes)
+    keep = ranks < top_k
+    return left[keep], right[keep], counts[keep], ranks[keep] + 1
+
+
+def build_recommendations(top_k=DEFAULT_TOP_K, max_order_size=DEFAULT_MAX_ORDER_SIZE, batch_size=1000):
+    """Перестраивает таблицу ProductRecommendation. Возвращает количество строк"""
+    left, right, counts = co_purchase_counts(*load_order_products(), max_order_size=max_order_size)
+    left, right, counts, ranks = top_k_neighbours(left, right, counts, top_k=top_k)
+
+    rows = [
+        ProductRecommendation(product_id=product_id, recommended_id=recommended_id, rank=rank, score=score)
+        for product_id, recommended_id, score, rank in zip(
+            left.tolist(), right.tolist(), counts.tolist(), ranks.tolist()
+        )
+    ]
+    with transaction.atomic():
+        ProductRecommendation.objects.all().delete()
+        ProductRecommendation.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def get_recommendations(product_id, limit=DEFAULT_TOP_K):
+    """Рекомендованные активные товары — один запрос по индексу (product, rank)"""
+    rows = (
+        ProductRecommendation.objects.filter(
+            product_id=product_id, rank__lte=limit, recommended__status='active'
+        )
+        .select_related('recommended__category', 'recommended__brand')
+        .order_by('rank')
+    )
+    return [row.recommended for row in rows]
@@ -0,0 +1,274 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, F, Prefetch, Q
+from core.slugs import SlugResolver
+from .models import Cart, CartItem, Order, OrderItem, Product, ProductCategory, StockShard
+
+CATEGORY_TREE_CACHE_KEY = 'marketplace:category_tree'
+
+product_slugs = SlugResolver(Product)
+
+
+def _get_category_rows():
+    """Плоский список всех категорий, кешируется целиком"""
+    rows = cache.get(CATEGORY_TREE_CACHE_KEY)
+    if rows is None:
+        rows = list(
+            ProductCategory.objects.order_by('depth', 'sort_order', 'name').values(
+                'id', 'parent_id', 'name', 'slug', 'icon', 'path', 'depth', 'is_active'
+            )
+        )
+        cache.set(CATEGORY_TREE_CACHE_KEY, rows, settings.CACHE_TIMEOUTS['long'])
+    return rows
+
+
+def invalidate_category_tree():
+    cache.delete(CATEGORY_TREE_CACHE_KEY)
+
+
+def get_category_index():
+    """Словарь id -> категория"""
+    return {row['id']: row for row in _get_category_rows()}
+
+
+def resolve_category(value):
+    """Категория по id или slug из кешированного списка категорий (без запроса к БД)"""
+    value = str(value)
+    field = 'id' if value.isdigit() else 'slug'
+    value = int(value) if field == 'id' else value
+    return next((row for row in _get_category_rows() if row[field] == value), None)
+
+
+def get_category_tree(active_only=True):
+    """Дерево категорий для навигационного меню"""
+    nodes = {}
+    roots = []
+    # Строки отсортированы по depth, поэтому родитель всегда обработан раньше детей
+    for row in _get_category_rows():
+        if active_only and not row['is_active']:
+            continue
+        node = {**row, 'children': []}
+        if row['parent_id'] is None:
+            roots.append(node)
+        elif row['parent_id'] in nodes:
+            nodes[row['parent_id']]['children'].append(node)
+        else:
+            # Родитель скрыт — скрываем и поддерево
+            continue
+        nodes[row['id']] = node
+    return roots
+
+
+# Границы ценовых корзин для фасета цены: [min, max)
+PRICE_BUCKETS = [
+    (0, 500),
+    (500, 1000),
+    (1000, 3000),
+    (3000, 10000),
+    (10000, None),
+]
+
+PRODUCT_ORDERINGS = {
+    'new': ('-created_at',),
+    'price': ('price', '-created_at'),
+    '-price': ('-price', '-created_at'),
+    'rating': ('-rating', '-reviews_count'),
+    'popular': ('-sales_count', '-created_at'),
+}
+
+
+def _split_param(value):
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = str(value).split(',')
+    return [item.strip() for item in items if item.strip()]
+
+
+def _int_list(value):
+    return [int(item) for item in _split_param(value) if item.isdigit()]
+
+
+def _apply_text_search(queryset, text):
+    """Полнотекстовый поиск по названию и описаниям"""
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = (
+            SearchVector('name', weight='A', config='russian')
+            + SearchVector('short_description', weight='B', config='russian')
+            + SearchVector('description', weight='C', config='russian')
+        )
+        query = SearchQuery(text, config='russian', search_type='websearch')
+        return queryset.annotate(search_rank=SearchRank(vector, query)).filter(search_rank__gt=0)
+
+    condition = Q()
+    for word in text.split():
+        condition &= (
+            Q(name__icontains=word)
+            | Q(short_description__icontains=word)
+            | Q(description__icontains=word)
+        )
+    return queryset.filter(condition)
+
+
+def build_product_filters(params):
+    """
+    Условия фильтрации по каждому фасету.
+
+    Возвращает словарь {фасет: Q}, чтобы счетчики фасета можно было
+    считать без учета его собственного фильтра.
+    """
+    filters = {}
+
+    category = params.get('category')
+    if category:
+        row = resolve_category(category)
+        filters['category'] = Q(category__path__startswith=row['path']) if row else Q(pk__in=[])
+
+    brands = _int_list(params.get('brand'))
+    if brands:
+        filters['brand'] = Q(brand_id__in=brands)
+
+    tags = _split_param(params.get('tags'))
+    if tags:
+        tagged = Product.tags.through.objects.filter(producttag__slug__in=tags).values('product_id')
+        filters['tags'] = Q(pk__in=tagged)
+
+    price = Q()
+    if params.get('price_min') is not None:
+        price &= Q(price__gte=params['price_min'])
+    if params.get('price_max') is not None:
+        price &= Q(price__lte=params['price_max'])
+    if price:
+        filters['price'] = price
+
+    if params.get('rating_min') is not None:
+        filters['rating'] = Q(rating__gte=params['rating_min'])
+
+    if params.get('is_featured'):
+        filters['is_featured'] = Q(is_featured=True)
+
+    if params.get('in_stock'):
+        sharded_in_stock = StockShard.objects.filter(quantity__gt=0).values('product_id')
+        filters['in_stock'] = (
+            Q(stock_shards_count=0, stock_quantity__gt=F('reserved_quantity'))
+            | Q(stock_shards_count__gt=0, pk__in=sharded_in_stock)
+        )
+
+    return filters
+
+
+def _filtered(base, filters, exclude=None):
+    conditions = [condition for name, condition in filters.items() if name != exclude]
+    return base.filter(*conditions)
+
+
+def get_product_facets(base, filters):
+    """
+    Счетчики фасетов: по одному агрегирующему запросу на фасет,
+    а не COUNT на каждое значение.
+    """
+    brands = (
+        _filtered(base, filters, exclude='brand')
+        .filter(brand__isnull=False)
+        .values('brand_id', 'brand__name')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'brand__name')
+    )
+    categories = (
+        _filtered(base, filters, exclude='category')
+        .values('category_id', 'category__name')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'category__name')
+    )
+    tags = (
+        _filtered(base, filters, exclude='tags')
+        .filter(tags__isnull=False)
+        .values('tags__slug', 'tags__name')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'tags__name')
+    )
+
+    bucket_counts = {}
+    for index, (low, high) in enumerate(PRICE_BUCKETS):
+        condition = Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        bucket_counts[f'bucket_{index}'] = Count('id', filter=condition)
+    bucket_counts['featured'] = Count('id', filter=Q(is_featured=True))
+    price_stats = _filtered(base, filters, exclude='price').aggregate(**bucket_counts)
+
+    return {
+        'brands': [
+            {'id': row['brand_id'], 'name': row['brand__name'], 'count': row['count']}
+            for row in brands
+        ],
+        'categories': [
+            {'id': row['category_id'], 'name': row['category__name'], 'count': row['count']}
+            for row in categories
+        ],
+        'tags': [
+            {'slug': row['tags__slug'], 'name': row['tags__name'], 'count': row['count']}
+            for row in tags
+        ],
+        'price': [
+            {'min': low, 'max': high, 'count': price_stats[f'bucket_{index}']}
+            for index, (low, high) in enumerate(PRICE_BUCKETS)
+        ],
+        'featured': price_stats['featured'],
+    }
+
+
+def search_products(params):
+    """
+    Поиск товаров с фильтрами и фасетами.
+
+    Возвращает (queryset результатов, фасеты).
+    """
+    base = Product.objects.filter(status__in=['active', 'out_of_stock'])
+    text = (params.get('q') or '').strip()
+    if text:
+        base = _apply_text_search(base, text)
+
+    filters = build_product_filters(params)
+    results = _filtered(base, filters).select_related('category', 'brand')
+
+    ordering = params.get('ordering')
+    if ordering in PRODUCT_ORDERINGS:
+        results = results.order_by(*PRODUCT_ORDERINGS[ordering])
+    elif text and connection.vendor == 'postgresql':
+        results = results.order_by('-search_rank', '-sales_count')
+
+    return results, get_product_facets(base, filters)
+
+
+def get_cart_details(user):
+    """Корзина с товарами фиксированным числом запросов (корзина, позиции, шарды)"""
+    items = (
+        CartItem.objects.select_related('product')
+        .prefetch_related('product__stock_shards')
+        .order_by('created_at')
+    )
+    cart, _ = Cart.objects.prefetch_related(Prefetch('items', queryset=items)).get_or_create(user=user)
+    return cart
+
+
+def get_buyer_orders(user):
+    """Заказы покупателя вместе с позициями и товарами"""
+    return Order.objects.filter(buyer=user).prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('product').order_by('pk'))
+    )
+
+
+def get_product_detail(product_id):
+    """Активный товар для карточки или None"""
+    return (
+        Product.objects.filter(pk=product_id, status='active')
+        .select_related('category', 'brand', 'rating_stats')
+        .prefetch_related('stock_shards')
+        .first()
+    )
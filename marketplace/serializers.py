@@ -0,0 +1,180 @@
+from rest_framework import serializers
+from .models import Brand, Order, OrderItem, Product, ProductCategory
+from .selectors import PRODUCT_ORDERINGS
+
+
+class ProductCategoryShortSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductCategory
+        fields = ('id', 'name', 'slug')
+
+
+class BrandShortSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Brand
+        fields = ('id', 'name', 'slug')
+
+
+class ProductListSerializer(serializers.ModelSerializer):
+    """Сериализатор товара для списков и поиска"""
+    category = ProductCategoryShortSerializer(read_only=True)
+    brand = BrandShortSerializer(read_only=True)
+    discount_percentage = serializers.ReadOnlyField()
+    is_in_stock = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Product
+        fields = (
+            'id', 'name', 'slug', 'short_description', 'price', 'old_price',
+            'discount_percentage', 'category', 'brand', 'rating', 'reviews_count',
+            'is_featured', 'is_in_stock', 'status'
+        )
+
+
+class ProductDetailSerializer(ProductListSerializer):
+    """Карточка товара"""
+    available_quantity = serializers.ReadOnlyField()
+    rating_distribution = serializers.SerializerMethodField()
+
+    class Meta(ProductListSerializer.Meta):
+        fields = ProductListSerializer.Meta.fields + (
+            'description', 'weight', 'dimensions', 'model', 'available_quantity',
+            'views_count', 'sales_count', 'rating_distribution', 'meta_title', 'meta_description'
+        )
+
+    def get_rating_distribution(self, obj):
+        stats = getattr(obj, 'rating_stats', None)
+        if stats is None:
+            return {stars: 0 for stars in range(1, 6)}
+        return stats.distribution
+
+
+class ProductSearchSerializer(serializers.Serializer):
+    """Параметры поиска товаров"""
+    q = serializers.CharField(required=False, allow_blank=True, max_length=200)
+    category = serializers.CharField(required=False, help_text='id или slug категории')
+    brand = serializers.CharField(required=False, help_text='id брендов через запятую')
+    tags = serializers.CharField(required=False, help_text='slug тегов через запятую')
+    price_min = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, min_value=0)
+    price_max = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, min_value=0)
+    rating_min = serializers.DecimalField(max_digits=3, decimal_places=2, required=False, min_value=0)
+    is_featured = serializers.BooleanField(required=False)
+    in_stock = serializers.BooleanField(required=False)
+    ordering = serializers.ChoiceField(choices=list(PRODUCT_ORDERINGS), required=False)
+
+
+class CartProductSerializer(serializers.ModelSerializer):
+    is_in_stock = serializers.ReadOnlyField()
+    available_quantity = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Product
+        fields = ('id', 'name', 'slug', 'price', 'is_in_stock', 'available_quantity')
+
+
+class CartItemSerializer(serializers.Serializer):
+    """Позиция корзины (CartItem или CartLine из сессии/кеша)"""
+    product = CartProductSerializer(read_only=True)
+    quantity = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    total_price = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class CartItemCreateSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class CartItemUpdateSerializer(serializers.Serializer):
+    quantity = serializers.IntegerField(min_value=0)
+
+
+class CartSummarySerializer(serializers.Serializer):
+    total_amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    total_items = serializers.IntegerField()
+    positions = serializers.IntegerField()
+
+
+class CartSerializer(serializers.Serializer):
+    """Корзина с товарами и итогами"""
+    items = CartItemSerializer(many=True, read_only=True)
+    summary = CartSummarySerializer(read_only=True)
+    prices_changed = serializers.BooleanField(read_only=True)
+
+
+class CheckoutSerializer(serializers.ModelSerializer):
+    """Данные доставки для оформления заказа"""
+    idempotency_key = serializers.CharField(required=False, max_length=64)
+
+    class Meta:
+        model = Order
+        fields = (
+            'delivery_address', 'delivery_city', 'delivery_phone',
+            'delivery_notes', 'notes', 'idempotency_key'
+        )
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ('id', 'product', 'product_name', 'quantity', 'price', 'total_price')
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = (
+            'id', 'order_number', 'status', 'payment_status', 'subtotal',
+            'delivery_cost', 'total_amount', 'delivery_address', 'delivery_city',
+            'delivery_phone', 'delivery_notes', 'notes', 'items', 'created_at'
+        )
+
+
+class AutocompleteParamsSerializer(serializers.Serializer):
+    """Параметры автодополнения"""
+    q = serializers.CharField(max_length=100, trim_whitespace=True)
+    type = serializers.ChoiceField(choices=['products', 'brands'], default='products')
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=50, default=10)
+
+
+class AutocompleteItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    label = serializers.CharField()
+
+
+class PriceHistoryParamsSerializer(serializers.Serializer):
+    """Параметры графика цены"""
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    points = serializers.IntegerField(required=False, min_value=2, max_value=1000, default=200)
+
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError('start должен быть раньше end')
+        return attrs
+
+
+class PricePointSerializer(serializers.Serializer):
+    at = serializers.DateTimeField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    old_price = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+
+
+class SellerDashboardParamsSerializer(serializers.Serializer):
+    """Параметры дашборда продавца"""
+    period = serializers.ChoiceField(choices=['day', 'week', 'month'], default='day')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    top = serializers.IntegerField(required=False, min_value=1, max_value=100, default=10)
+
+
+class ExportParamsSerializer(serializers.Serializer):
+    """Параметры выгрузки. Параметр format занят DRF, поэтому file_format"""
+    file_format = serializers.ChoiceField(choices=['csv', 'jsonl'], default='csv')
+    since = serializers.DateTimeField(required=False)
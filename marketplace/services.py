@@ -0,0 +1,747 @@
+import random
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from core.exceptions import InsufficientStockError, NotFoundError, ServiceError
+from notifications.models import Notification
+from .analytics import record_order_sales
+from .models import (
+    Cart, CartItem, Order, OrderEvent, OrderItem, Product, ProductCategory, ProductPriceChange,
+    ProductRatingStats, ProductReview, StockReservation, StockShard
+)
+from .selectors import invalidate_category_tree
+from .stock_monitor import schedule_stock_check
+
+RESERVATION_TTL = timedelta(minutes=15)
+
+
+def rebuild_category_paths():
+    """Пересчитывает материализованные пути всего дерева категорий"""
+    categories = list(ProductCategory.objects.only('id', 'parent_id', 'path', 'depth'))
+    children = {}
+    for category in categories:
+        children.setdefault(category.parent_id, []).append(category)
+
+    changed = []
+    stack = [(category, '') for category in children.get(None, [])]
+    while stack:
+        category, parent_path = stack.pop()
+        path = ProductCategory.build_path(parent_path, category.pk)
+        depth = parent_path.count('/')
+        if (category.path, category.depth) != (path, depth):
+            category.path, category.depth = path, depth
+            changed.append(category)
+        stack.extend((child, path) for child in children.get(category.pk, []))
+
+    ProductCategory.objects.bulk_update(changed, ['path', 'depth'], batch_size=500)
+    invalidate_category_tree()
+    return len(changed)
+
+
+# --- Резервирование остатков ---
+
+def _per_product_delta(totals):
+    """CASE pk WHEN ... THEN n — разные приращения для разных товаров в одном UPDATE"""
+    return Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in totals.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def reserve_stock(product_id, quantity, user=None, order=None, ttl=RESERVATION_TTL):
+    """
+    Резервирует товар одним условным UPDATE без предварительного чтения:
+    UPDATE ... SET reserved = reserved + n WHERE stock >= reserved + n.
+    Если остатка не хватает, ни одна строка не обновится.
+    Для шардированных товаров списание идет со случайного шарда.
+    """
+    if quantity <= 0:
+        raise ValueError('Количество должно быть положительным')
+
+    shards_count = Product.objects.filter(pk=product_id).values_list('stock_shards_count', flat=True).first()
+
+    with transaction.atomic():
+        _take_stock(product_id, shards_count, quantity)
+        schedule_stock_check([product_id])
+        return StockReservation.objects.create(
+            product_id=product_id,
+            user=user,
+            order=order,
+            quantity=quantity,
+            expires_at=timezone.now() + ttl if ttl else None,
+        )
+
+
+def _take_stock(product_id, shards_count, quantity):
+    if shards_count:
+        _take_from_shards(product_id, shards_count, quantity)
+        return
+    updated = Product.objects.filter(
+        pk=product_id,
+        stock_quantity__gte=F('reserved_quantity') + quantity,
+    ).update(reserved_quantity=F('reserved_quantity') + quantity, updated_at=timezone.now())
+    if not updated:
+        raise InsufficientStockError(product_id, quantity)
+
+
+def _finish_reservations(reservation_ids, new_status, sell=False):
+    """
+    Переводит активные резервы в конечный статус и снимает их с остатков.
+    Возвращает количество обработанных резервов.
+    """
+    with transaction.atomic():
+        rows = list(
+            StockReservation.objects.select_for_update()
+            .filter(pk__in=reservation_ids, status='active')
+            .values_list('pk', 'product_id', 'quantity')
+        )
+        if not rows:
+            return 0
+
+        totals = defaultdict(int)
+        for _, product_id, quantity in rows:
+            totals[product_id] += quantity
+
+        StockReservation.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(
+            status=new_status, updated_at=timezone.now()
+        )
+
+        sharded = dict(
+            Product.objects.filter(pk__in=totals, stock_shards_count__gt=0)
+            .values_list('pk', 'stock_shards_count')
+        )
+        for product_id, shards_count in sharded.items():
+            _return_to_shards(product_id, shards_count, totals.pop(product_id), sell=sell)
+
+        if totals:
+            delta = _per_product_delta(totals)
+            changes = {'reserved_quantity': F('reserved_quantity') - delta, 'updated_at': timezone.now()}
+            if sell:
+                changes['stock_quantity'] = F('stock_quantity') - delta
+                changes['sales_count'] = F('sales_count') + delta
+            Product.objects.filter(pk__in=totals).update(**changes)
+        schedule_stock_check([product_id for _, product_id, _ in rows])
+        return len(rows)
+
+
+def release_reservations(reservation_ids):
+    """Снимает резервы, возвращая товар в свободный остаток"""
+    return _finish_reservations(reservation_ids, 'released')
+
+
+def confirm_reservations(reservation_ids):
+    """Превращает резервы в продажи: списывает остаток и увеличивает sales_count"""
+    return _finish_reservations(reservation_ids, 'converted', sell=True)
+
+
+def expire_reservations(batch_size=500, now=None):
+    """
+    Пакетно снимает просроченные резервы.
+    Каждая пачка — одна транзакция с блокировкой строк (SKIP LOCKED),
+    поэтому несколько воркеров могут чистить параллельно.
+    """
+    now = now or timezone.now()
+    expired = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(status='active', expires_at__lte=now)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            expired += _finish_reservations(batch, 'expired')
+    return expired
+
+
+# --- Шардированные остатки ---
+
+def _take_from_shards(product_id, shards_count, quantity):
+    """
+    Списывает свободный остаток с шардов. Шарды перебираются в случайном
+    порядке условными UPDATE; если ни в одном шарде не хватает товара,
+    остаток собирается из нескольких шардов под блокировкой.
+    """
+    indexes = list(range(shards_count))
+    random.shuffle(indexes)
+    for index in indexes:
+        updated = StockShard.objects.filter(
+            product_id=product_id, index=index, quantity__gte=quantity
+        ).update(quantity=F('quantity') - quantity)
+        if updated:
+            return
+
+    shards = list(StockShard.objects.select_for_update().filter(product_id=product_id).order_by('index'))
+    if sum(shard.quantity for shard in shards) < quantity:
+        raise InsufficientStockError(product_id, quantity)
+
+    remaining = quantity
+    for shard in shards:
+        taken = min(shard.quantity, remaining)
+        shard.quantity -= taken
+        remaining -= taken
+    StockShard.objects.bulk_update(shards, ['quantity'])
+
+
+def _return_to_shards(product_id, shards_count, quantity, sell=False):
+    """Возвращает снятый резерв в случайный шард или учитывает его как продажу"""
+    field = 'sold' if sell else 'quantity'
+    StockShard.objects.filter(
+        product_id=product_id, index=random.randrange(shards_count)
+    ).update(**{field: F(field) + quantity})
+
+
+def _fold_shards(product_id, shards):
+    """Переносит накопленные продажи в Product и пересчитывает резерв"""
+    sold = sum(shard.sold for shard in shards)
+    available = sum(shard.quantity for shard in shards)
+    # Все F() в SET ссылаются на значения до обновления
+    Product.objects.filter(pk=product_id).update(
+        stock_quantity=F('stock_quantity') - sold,
+        sales_count=F('sales_count') + sold,
+        reserved_quantity=Greatest(F('stock_quantity') - sold - available, Value(0)),
+        updated_at=timezone.now(),
+    )
+    return available
+
+
+def enable_sharded_stock(product_id, shards_count):
+    """Включает шардированный режим: свободный остаток делится на N шардов"""
+    if shards_count < 1:
+        raise ValueError('Количество шардов должно быть положительным')
+
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product_id)
+        if product.stock_shards_count:
+            return rebalance_stock_shards(product_id)
+
+        available = max(product.stock_quantity - product.reserved_quantity, 0)
+        StockShard.objects.bulk_create([
+            StockShard(product=product, index=index, quantity=quantity)
+            for index, quantity in enumerate(_split_evenly(available, shards_count))
+        ])
+        product.stock_shards_count = shards_count
+        product.save(update_fields=['stock_shards_count'])
+        return available
+
+
+def disable_sharded_stock(product_id):
+    """Возвращает остаток из шардов в строку товара"""
+    with transaction.atomic():
+        Product.objects.select_for_update().only('pk').get(pk=product_id)
+        shards = list(StockShard.objects.select_for_update().filter(product_id=product_id))
+        _fold_shards(product_id, shards)
+        StockShard.objects.filter(product_id=product_id).delete()
+        Product.objects.filter(pk=product_id).update(stock_shards_count=0)
+
+
+def rebalance_stock_shards(product_id):
+    """
+    Синхронизирует шарды с товаром: переносит продажи в Product,
+    пересчитывает reserved_quantity и выравнивает остаток между шардами.
+    """
+    with transaction.atomic():
+        shards = list(StockShard.objects.select_for_update().filter(product_id=product_id).order_by('index'))
+        if not shards:
+            return 0
+        available = _fold_shards(product_id, shards)
+        for shard, quantity in zip(shards, _split_evenly(available, len(shards))):
+            shard.quantity = quantity
+            shard.sold = 0
+        StockShard.objects.bulk_update(shards, ['quantity', 'sold'])
+        return available
+
+
+def sync_stock_shards():
+    """Периодическая синхронизация всех шардированных товаров"""
+    product_ids = list(Product.objects.filter(stock_shards_count__gt=0).values_list('pk', flat=True))
+    for product_id in product_ids:
+        rebalance_stock_shards(product_id)
+    return len(product_ids)
+
+
+def restock_product(product_id, quantity):
+    """Приход товара на склад"""
+    with transaction.atomic():
+        shards_count = Product.objects.filter(pk=product_id).values_list('stock_shards_count', flat=True).first()
+        Product.objects.filter(pk=product_id).update(
+            stock_quantity=F('stock_quantity') + quantity, updated_at=timezone.now()
+        )
+        if shards_count:
+            _return_to_shards(product_id, shards_count, quantity)
+        schedule_stock_check([product_id])
+
+
+def _split_evenly(total, parts):
+    base, extra = divmod(total, parts)
+    return [base + (1 if index < extra else 0) for index in range(parts)]
+
+
+# --- Оформление заказа ---
+
+def checkout(user, lines, delivery, idempotency_key=None):
+    """
+    Оформляет заказ из позиций корзины {product_id: {'quantity', ...}} в одной транзакции:
+    резервирует остатки всех товаров, создает OrderItem одним bulk_create
+    и считает суммы заказа в SQL. Повтор с тем же idempotency_key
+    возвращает уже созданный заказ.
+
+    Возвращает (order, created).
+    """
+    if idempotency_key:
+        existing = Order.objects.filter(buyer=user, idempotency_key=idempotency_key).first()
+        if existing is not None:
+            return existing, False
+    if not lines:
+        raise ServiceError('Корзина пуста')
+
+    try:
+        with transaction.atomic():
+            order = _create_order(user, lines, delivery, idempotency_key)
+    except IntegrityError:
+        # Параллельный повтор того же запроса успел создать заказ первым
+        if idempotency_key:
+            existing = Order.objects.filter(buyer=user, idempotency_key=idempotency_key).first()
+            if existing is not None:
+                return existing, False
+        raise
+    return order, True
+
+
+def _create_order(user, lines, delivery, idempotency_key):
+    products = {
+        row['pk']: row
+        for row in Product.objects.filter(pk__in=lines, status='active').values('pk', 'price', 'stock_shards_count')
+    }
+    missing = set(lines) - set(products)
+    if missing:
+        raise NotFoundError(f'Товары недоступны для заказа: {", ".join(map(str, sorted(missing)))}')
+
+    order = Order.objects.create(
+        buyer=user,
+        subtotal=0,
+        total_amount=0,
+        idempotency_key=idempotency_key or None,
+        **delivery,
+    )
+
+    # Фиксированный порядок блокировок исключает взаимоблокировки между заказами
+    reservations, items = [], []
+    for product_id in sorted(lines):
+        quantity = lines[product_id]['quantity']
+        product = products[product_id]
+        _take_stock(product_id, product['stock_shards_count'], quantity)
+        reservations.append(StockReservation(product_id=product_id, user=user, order=order, quantity=quantity))
+        items.append(OrderItem(
+            order=order,
+            product_id=product_id,
+            quantity=quantity,
+            price=product['price'],
+            total_price=product['price'] * quantity,
+        ))
+    StockReservation.objects.bulk_create(reservations)
+    OrderItem.objects.bulk_create(items)
+    schedule_stock_check(lines)
+    record_order_event(order, 'created')
+
+    subtotal = (
+        OrderItem.objects.filter(order=OuterRef('pk'))
+        .values('order')
+        .annotate(total=Sum('total_price'))
+        .values('total')
+    )
+    Order.objects.filter(pk=order.pk).update(
+        subtotal=Subquery(subtotal),
+        total_amount=Subquery(subtotal) + F('delivery_cost'),
+    )
+    order.refresh_from_db(fields=['subtotal', 'total_amount'])
+    return order
+
+
+ORDER_EVENT_MAX_ATTEMPTS = 5
+
+
+def record_order_event(order, event_type):
+    """
+    Записывает событие заказа в outbox в текущей транзакции.
+    Обработка ставится в очередь orders только после коммита.
+    """
+    event = OrderEvent.objects.create(order=order, event_type=event_type)
+
+    def enqueue():
+        from .tasks import process_order
+        process_order.delay(order.pk)
+
+    transaction.on_commit(enqueue)
+    return event
+
+
+def mark_order_paid(order_id):
+    """Отмечает заказ оплаченным; списание остатков выполняет воркер"""
+    with transaction.atomic():
+        order = Order.objects.select_for_update().filter(pk=order_id).first()
+        if order is None:
+            raise NotFoundError('Заказ не найден')
+        if order.payment_status == 'paid':
+            return order
+        if order.status == 'cancelled':
+            raise ServiceError('Заказ отменен')
+        order.payment_status = 'paid'
+        order.save(update_fields=['payment_status', 'updated_at'])
+        record_order_event(order, 'paid')
+    return order
+
+
+def cancel_order(order_id):
+    """Отменяет неоплаченный заказ; резервы снимает воркер"""
+    with transaction.atomic():
+        order = Order.objects.select_for_update().filter(pk=order_id).first()
+        if order is None:
+            raise NotFoundError('Заказ не найден')
+        if order.status == 'cancelled':
+            return order
+        if order.payment_status == 'paid' or order.status != 'pending':
+            raise ServiceError('Заказ уже в обработке, отмена невозможна')
+        order.status = 'cancelled'
+        order.save(update_fields=['status', 'updated_at'])
+        record_order_event(order, 'cancelled')
+    return order
+
+
+def mark_order_delivered(order_id):
+    """Отмечает заказ доставленным (в том числе с оплатой при получении)"""
+    with transaction.atomic():
+        order = Order.objects.select_for_update().filter(pk=order_id).first()
+        if order is None:
+            raise NotFoundError('Заказ не найден')
+        if order.status == 'delivered':
+            return order
+        if order.status in ('cancelled', 'returned'):
+            raise ServiceError('Заказ отменен')
+        order.status = 'delivered'
+        order.delivered_at = timezone.now()
+        order.save(update_fields=['status', 'delivered_at', 'updated_at'])
+        record_order_event(order, 'delivered')
+    return order
+
+
+def _notify_sellers(order, notification_type, title):
+    seller_ids = set(
+        OrderItem.objects.filter(order=order).values_list('product__seller_id', flat=True)
+    )
+    Notification.objects.bulk_create([
+        Notification(
+            user_id=seller_id,
+            title=title,
+            message=f'Заказ {order.order_number}',
+            notification_type=notification_type,
+            extra_data={'order_id': order.pk, 'order_number': order.order_number},
+        )
+        for seller_id in sorted(seller_ids)
+    ])
+
+
+def _notify_buyer(order, notification_type, title):
+    Notification.objects.create(
+        user_id=order.buyer_id,
+        title=title,
+        message=f'Заказ {order.order_number}',
+        notification_type=notification_type,
+        extra_data={'order_id': order.pk, 'order_number': order.order_number},
+    )
+
+
+def _active_reservation_ids(order):
+    return list(order.reservations.filter(status='active').values_list('pk', flat=True))
+
+
+def _handle_order_created(order):
+    _notify_sellers(order, 'order_created', 'Новый заказ')
+
+
+def _handle_order_paid(order):
+    # Резервы превращаются в продажи: остаток и sales_count обновляются пакетно
+    confirm_reservations(_active_reservation_ids(order))
+    Order.objects.filter(pk=order.pk, status='pending').update(status='confirmed', updated_at=timezone.now())
+    record_order_sales(order)
+    _notify_sellers(order, 'order_paid', 'Заказ оплачен')
+    _notify_buyer(order, 'order_paid', 'Заказ оплачен')
+
+
+def _handle_order_cancelled(order):
+    release_reservations(_active_reservation_ids(order))
+    _notify_buyer(order, 'order_cancelled', 'Заказ отменен')
+
+
+def _handle_order_delivered(order):
+    # При оплате при получении резервы еще активны
+    confirm_reservations(_active_reservation_ids(order))
+    record_order_sales(order)
+
+
+ORDER_EVENT_HANDLERS = {
+    'created': _handle_order_created,
+    'paid': _handle_order_paid,
+    'cancelled': _handle_order_cancelled,
+    'delivered': _handle_order_delivered,
+}
+
+
+def process_order_events(order_id=None, batch_size=100):
+    """
+    Обрабатывает пачку событий из outbox. Каждое событие — в своей транзакции;
+    строки блокируются с SKIP LOCKED, чтобы несколько воркеров не брали одно событие.
+    Возвращает количество обработанных событий.
+    """
+    pending = OrderEvent.objects.filter(status='pending')
+    if order_id is not None:
+        pending = pending.filter(order_id=order_id)
+    event_ids = list(pending.order_by('pk').values_list('pk', flat=True)[:batch_size])
+
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    processed = 0
+    for event_id in event_ids:
+        with transaction.atomic():
+            event = (
+                OrderEvent.objects.select_for_update(skip_locked=skip_locked)
+                .select_related('order')
+                .filter(pk=event_id, status='pending')
+                .first()
+            )
+            if event is None:
+                continue
+            try:
+                with transaction.atomic():
+                    ORDER_EVENT_HANDLERS[event.event_type](event.order)
+            except Exception as e:
+                event.attempts += 1
+                event.last_error = str(e)
+                if event.attempts >= ORDER_EVENT_MAX_ATTEMPTS:
+                    event.status = 'failed'
+                event.save(update_fields=['attempts', 'last_error', 'status', 'updated_at'])
+                continue
+            event.status = 'processed'
+            event.attempts += 1
+            event.processed_at = timezone.now()
+            event.save(update_fields=['status', 'attempts', 'processed_at', 'updated_at'])
+            processed += 1
+    return processed
+
+
+# --- Просмотры товаров ---
+
+def fold_product_views(today=None):
+    """
+    Переносит оценки уникальных просмотров из скетчей в Product.views_count
+    одним UPDATE. Учитывается только прирост с прошлого переноса;
+    скетчи прошедших дней после переноса удаляются.
+    Возвращает количество добавленных просмотров.
+    """
+    from .product_views import get_view_store
+
+    today = (today or timezone.localdate()).isoformat()
+    store = get_view_store()
+    totals = defaultdict(int)
+    finished_days = []
+
+    for day in store.get_days(today):
+        folded = store.get_folded(day)
+        for product_id in store.get_product_ids(day):
+            sketch = store.get_sketch(day, product_id)
+            if sketch is None:
+                continue
+            estimate = sketch.count()
+            delta = estimate - folded.get(product_id, 0)
+            if delta > 0:
+                totals[product_id] += delta
+                folded[product_id] = estimate
+        store.set_folded(day, folded)
+        if day < today:
+            finished_days.append(day)
+
+    if totals:
+        Product.objects.filter(pk__in=totals).update(
+            views_count=F('views_count') + _per_product_delta(totals), updated_at=timezone.now()
+        )
+    for day in finished_days:
+        store.drop_day(day)
+    return sum(totals.values())
+
+
+# --- Рейтинги товаров ---
+
+def apply_rating_change(product_id, rating, sign):
+    """
+    Добавляет (sign=1) или убирает (sign=-1) одобренную оценку из агрегатов
+    товара и обновляет Product.rating и reviews_count. Возвращает статистику
+    или None, если убирать не из чего (товар удаляется вместе со статистикой).
+    """
+    with transaction.atomic():
+        stats_rows = ProductRatingStats.objects.filter(product_id=product_id)
+        if sign > 0:
+            ProductRatingStats.objects.bulk_create([ProductRatingStats(product_id=product_id)], ignore_conflicts=True)
+        else:
+            # При каскадном удалении товара строка статистики удаляется раньше отзывов
+            stats_rows = stats_rows.filter(rating_count__gt=0, **{f'stars_{rating}__gt': 0})
+        # UPDATE блокирует строку статистики до конца транзакции, параллельные отзывы сериализуются
+        updated = stats_rows.update(**{
+            'rating_sum': F('rating_sum') + sign * rating,
+            'rating_count': F('rating_count') + sign,
+            f'stars_{rating}': F(f'stars_{rating}') + sign,
+        })
+        if not updated:
+            return None
+        stats = ProductRatingStats.objects.get(product_id=product_id)
+        Product.objects.filter(pk=product_id).update(
+            rating=stats.average, reviews_count=stats.rating_count, updated_at=timezone.now()
+        )
+    return stats
+
+
+def reconcile_product_ratings(batch_size=500):
+    """
+    Пересчитывает агрегаты оценок всех товаров одним сгруппированным запросом
+    (нужно после массовых .update() отзывов, которые не вызывают сигналы).
+    Возвращает количество товаров, у которых изменились рейтинг или число отзывов.
+    """
+    star_counts = {f'stars_{stars}': Count('pk', filter=Q(rating=stars)) for stars in range(1, 6)}
+    rows = (
+        ProductReview.objects.filter(is_approved=True)
+        .values('product')
+        .annotate(rating_sum=Sum('rating'), rating_count=Count('pk'), **star_counts)
+        .order_by()
+    )
+    stats = {}
+    for row in rows:
+        product_id = row.pop('product')
+        stats[product_id] = ProductRatingStats(product_id=product_id, **row)
+
+    with transaction.atomic():
+        ProductRatingStats.objects.exclude(product_id__in=stats).delete()
+        ProductRatingStats.objects.bulk_create(
+            stats.values(),
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=['rating_sum', 'rating_count', *star_counts],
+        )
+
+        changed = []
+        now = timezone.now()
+        products = Product.objects.filter(Q(pk__in=stats) | Q(reviews_count__gt=0) | Q(rating__gt=0))
+        for product in products.only('pk', 'rating', 'reviews_count').iterator(chunk_size=batch_size):
+            product_stats = stats.get(product.pk, ProductRatingStats())
+            values = (product_stats.average, product_stats.rating_count)
+            if (product.rating, product.reviews_count) != values:
+                product.rating, product.reviews_count = values
+                product.updated_at = now
+                changed.append(product)
+        Product.objects.bulk_update(changed, ['rating', 'reviews_count', 'updated_at'], batch_size=batch_size)
+    return len(changed)
+
+
+# --- Корзины ---
+
+REPRICE_CHUNK_SIZE = 500
+
+def _column(model, name):
+    return connection.ops.quote_name(model._meta.get_field(name).column)
+
+
+def _reprice_sql():
+    """UPDATE ... FROM по таблицам и колонкам из метаданных моделей (db_table может быть переопределен)"""
+    qn = connection.ops.quote_name
+    return f"""
+        UPDATE {qn(CartItem._meta.db_table)} AS item
+        SET {_column(CartItem, 'price')} = product.{_column(Product, 'price')},
+            {_column(CartItem, 'updated_at')} = %s
+        FROM {qn(Product._meta.db_table)} AS product
+        WHERE item.{_column(CartItem, 'product')} = product.{_column(Product, 'id')}
+          AND item.{_column(CartItem, 'product')} = ANY(%s)
+          AND item.{_column(CartItem, 'price')} <> product.{_column(Product, 'price')}
+        RETURNING item.{_column(CartItem, 'cart')}
+    """
+
+
+def _reprice_chunk(product_ids, now):
+    """Обновляет цены позиций корзин по товарам; возвращает id затронутых корзин"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(_reprice_sql(), [now, list(product_ids)])
+            return {row[0] for row in cursor.fetchall()}
+
+    stale = CartItem.objects.filter(product_id__in=product_ids).exclude(price=F('product__price'))
+    cart_ids = set(stale.values_list('cart_id', flat=True))
+    if cart_ids:
+        CartItem.objects.filter(pk__in=stale.values('pk')).update(
+            price=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('price')[:1]),
+            updated_at=now,
+        )
+    return cart_ids
+
+
+def reprice_carts(product_ids, chunk_size=REPRICE_CHUNK_SIZE):
+    """
+    Переносит текущие цены товаров в позиции сохраненных корзин
+    (UPDATE ... FROM на PostgreSQL) пачками по chunk_size товаров,
+    отмечает затронутые корзины для уведомления покупателя.
+    Возвращает количество затронутых корзин.
+    """
+    product_ids = sorted(set(product_ids))
+    now = timezone.now()
+    affected = set()
+    for offset in range(0, len(product_ids), chunk_size):
+        with transaction.atomic():
+            cart_ids = _reprice_chunk(product_ids[offset:offset + chunk_size], now)
+            if cart_ids:
+                Cart.objects.filter(pk__in=cart_ids).update(prices_changed_at=now)
+        Cart.invalidate_summaries(cart_ids)
+        affected |= cart_ids
+    return len(affected)
+
+
+def bulk_update_prices(prices, chunk_size=REPRICE_CHUNK_SIZE):
+    """
+    Массовое изменение цен {product_id: price}: пакетный UPDATE товаров,
+    запись истории цен и один пересчет корзин после коммита.
+    Возвращает количество товаров, у которых цена изменилась.
+    """
+    now = timezone.now()
+    changed = []
+    with transaction.atomic():
+        for product in Product.objects.filter(pk__in=prices).only('pk', 'price', 'old_price').order_by('pk'):
+            price = Decimal(prices[product.pk])
+            if product.price != price:
+                product.price = price
+                product.updated_at = now
+                changed.append(product)
+        Product.objects.bulk_update(changed, ['price', 'updated_at'], batch_size=chunk_size)
+        ProductPriceChange.objects.bulk_create(
+            [
+                ProductPriceChange(product=product, price=product.price, old_price=product.old_price, changed_at=now)
+                for product in changed
+            ],
+            batch_size=chunk_size,
+        )
+        if changed:
+            schedule_cart_repricing([product.pk for product in changed])
+    return len(changed)
+
+
+def schedule_cart_repricing(product_ids):
+    """Ставит пересчет корзин после коммита изменения цен"""
+    product_ids = sorted(set(product_ids))
+
+    def enqueue():
+        from .tasks import reprice_carts_task
+        reprice_carts_task.delay(product_ids)
+
+    transaction.on_commit(enqueue)
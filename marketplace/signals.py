@@ -0,0 +1,110 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from .cart_storage import merge_session_cart
+from .models import Cart, CartItem, Product, ProductCategory, ProductReview
+from .price_history import record_price_change
+from .stock_monitor import schedule_stock_check
+from .selectors import invalidate_category_tree, product_slugs
+from .services import apply_rating_change, schedule_cart_repricing
+
+
+@receiver([post_save, post_delete], sender=ProductCategory)
+def category_tree_changed(sender, **kwargs):
+    invalidate_category_tree()
+
+
+@receiver([post_save, post_delete], sender=CartItem)
+def cart_item_changed(sender, instance, **kwargs):
+    Cart.invalidate_summary(instance.cart_id)
+
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, 'session'):
+        merge_session_cart(request, user)
+
+
+def _approved_rating(review):
+    """(product_id, rating) одобренного отзыва или None"""
+    if review.is_approved and review.rating:
+        return review.product_id, review.rating
+    return None
+
+
+@receiver(post_init, sender=ProductReview)
+def remember_review_rating(sender, instance, **kwargs):
+    instance._approved_rating = _approved_rating(instance)
+
+
+@receiver(post_save, sender=ProductReview)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else instance._approved_rating
+    new = _approved_rating(instance)
+    if old == new:
+        return
+    if old is not None:
+        apply_rating_change(*old, sign=-1)
+    if new is not None:
+        apply_rating_change(*new, sign=1)
+    instance._approved_rating = new
+
+
+@receiver(post_delete, sender=ProductReview)
+def review_deleted(sender, instance, **kwargs):
+    if instance._approved_rating is not None:
+        apply_rating_change(*instance._approved_rating, sign=-1)
+
+
+@receiver(post_init, sender=Product)
+def remember_product_price(sender, instance, **kwargs):
+    # Отложенные (.only/.defer) поля не читаем, чтобы не вызывать лишних запросов
+    instance._saved_prices = (instance.__dict__.get('price'), instance.__dict__.get('old_price'))
+
+
+@receiver(post_save, sender=Product)
+def product_price_changed(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    prices = (instance.__dict__.get('price'), instance.__dict__.get('old_price'))
+    if created:
+        changed = True
+    elif update_fields is not None and not {'price', 'old_price'} & set(update_fields):
+        changed = False
+    else:
+        # Цена не была загружена (отложенное поле) — сравнивать не с чем
+        changed = instance._saved_prices[0] is not None and prices != instance._saved_prices
+    if changed:
+        record_price_change(instance)
+        if not created:
+            schedule_cart_repricing([instance.pk])
+    instance._saved_prices = prices
+
+
+@receiver(post_save, sender=Product)
+def product_stock_changed(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created:
+        return
+    stock_fields = {'stock_quantity', 'reserved_quantity', 'min_stock_level', 'status'}
+    if update_fields is None or stock_fields & set(update_fields):
+        schedule_stock_check([instance.pk])
+
+
+@receiver(post_init, sender=Product)
+def remember_product_slug(sender, instance, **kwargs):
+    instance._saved_slug = instance.__dict__.get('slug')
+
+
+@receiver(post_save, sender=Product)
+def product_slug_changed(sender, instance, **kwargs):
+    slug = instance.__dict__.get('slug')
+    if slug != instance._saved_slug or kwargs.get('created'):
+        product_slugs.invalidate(instance._saved_slug, slug)
+    instance._saved_slug = slug
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    product_slugs.invalidate(instance._saved_slug)
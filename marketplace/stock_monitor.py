@@ -0,0 +1,134 @@
+"""
+Контроль низких остатков.
+
+Изменения остатков (резервы, продажи, приход) ставят проверку
+затронутых товаров после коммита; периодический обход всего каталога
+ищет товары по индексу product_stock_margin_idx
+(stock_quantity - reserved_quantity - min_stock_level). Проверка
+одним UPDATE переключает статус active/out_of_stock и отправляет
+продавцу одно уведомление на все его товары с низким остатком.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from notifications.models import Notification
+from .models import Product
+
+STOCK_CHECK_LOCK_KEY = 'marketplace:stock_check:{}'
+STOCK_CHECK_TRAILING_KEY = 'marketplace:stock_check_trailing:{}'
+# Не чаще одной проверки товара за интервал — горячие товары резервируются непрерывно.
+# Изменения внутри интервала проверяются одной отложенной проверкой в его конце.
+STOCK_CHECK_INTERVAL = 30
+MONITORED_STATUSES = ('active', 'out_of_stock')
+ALERT_PRODUCTS_LIMIT = 20
+
+
+def _with_margin(queryset):
+    # Выражение совпадает с индексом product_stock_margin_idx
+    return queryset.alias(
+        stock_margin=F('stock_quantity') - F('reserved_quantity') - F('min_stock_level'),
+        available=F('stock_quantity') - F('reserved_quantity'),
+    )
+
+
+def schedule_stock_check(product_ids):
+    """
+    Ставит проверку остатков товаров после коммита текущей транзакции.
+    Первая проверка за интервал выполняется сразу, последующие
+    схлопываются в одну отложенную на STOCK_CHECK_INTERVAL.
+    """
+    immediate, trailing = [], []
+    for product_id in set(product_ids):
+        if cache.add(STOCK_CHECK_LOCK_KEY.format(product_id), True, STOCK_CHECK_INTERVAL):
+            immediate.append(product_id)
+        elif cache.add(STOCK_CHECK_TRAILING_KEY.format(product_id), True, STOCK_CHECK_INTERVAL):
+            trailing.append(product_id)
+    if not immediate and not trailing:
+        return
+
+    def enqueue():
+        from .tasks import check_stock
+        if immediate:
+            check_stock.delay(sorted(immediate))
+        if trailing:
+            # Отложенная проверка читает остатки на момент выполнения и видит все изменения интервала
+            check_stock.apply_async(args=[sorted(trailing)], countdown=STOCK_CHECK_INTERVAL)
+
+    transaction.on_commit(enqueue)
+
+
+def update_stock_statuses(product_ids=None):
+    """
+    Переключает active -> out_of_stock при нулевом свободном остатке и обратно
+    одним UPDATE. Возвращает количество измененных товаров.
+    """
+    # Свободный остаток шардированных товаров хранится в шардах, их статус не переключается
+    products = _with_margin(Product.objects.filter(status__in=MONITORED_STATUSES, stock_shards_count=0))
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+    return products.filter(
+        Q(status='active', available__lte=0) | Q(status='out_of_stock', available__gt=0)
+    ).update(
+        status=Case(When(available__lte=0, then=Value('out_of_stock')), default=Value('active')),
+        updated_at=timezone.now(),
+    )
+
+
+def send_low_stock_alerts(product_ids=None, now=None):
+    """
+    Одно уведомление продавцу на все его товары, у которых свободный остаток
+    опустился ниже минимального. Повторно товар попадает в уведомление
+    только после пополнения. Возвращает количество уведомлений.
+    """
+    now = now or timezone.now()
+    products = _with_margin(Product.objects.filter(status__in=MONITORED_STATUSES))
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+
+    with transaction.atomic():
+        # Пополненные товары снова могут попасть в уведомление
+        products.filter(stock_margin__gte=0, low_stock_alerted_at__isnull=False).update(low_stock_alerted_at=None)
+
+        low = list(
+            products.filter(stock_margin__lt=0, low_stock_alerted_at__isnull=True)
+            .select_for_update()
+            .order_by('seller_id', 'pk')
+            .values('pk', 'seller_id', 'name', 'stock_quantity', 'reserved_quantity', 'min_stock_level')
+        )
+        if not low:
+            return 0
+
+        by_seller = {}
+        for product in low:
+            by_seller.setdefault(product['seller_id'], []).append(product)
+
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=seller_id,
+                title='Заканчиваются товары',
+                message='\n'.join(
+                    f"{product['name']}: осталось {product['stock_quantity'] - product['reserved_quantity']}"
+                    f" (минимум {product['min_stock_level']})"
+                    for product in seller_products[:ALERT_PRODUCTS_LIMIT]
+                ),
+                notification_type='low_stock',
+                extra_data={'product_ids': [product['pk'] for product in seller_products]},
+            )
+            for seller_id, seller_products in by_seller.items()
+        ])
+        Product.objects.filter(pk__in=[product['pk'] for product in low]).update(low_stock_alerted_at=now)
+    return len(by_seller)
+
+
+def check_stock_levels(product_ids=None):
+    """Проверка остатков: статусы и уведомления. product_ids=None — обход всего каталога"""
+    if product_ids is not None:
+        # Изменения после начала проверки снова могут поставить отложенную проверку:
+        # иначе ключ держался бы до конца интервала и они не проверялись бы вовсе
+        cache.delete_many([STOCK_CHECK_TRAILING_KEY.format(product_id) for product_id in product_ids])
+    flipped = update_stock_statuses(product_ids)
+    alerts = send_low_stock_alerts(product_ids)
+    return flipped, alerts
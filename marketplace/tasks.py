@@ -0,0 +1,34 @@
+from core.tasks import task
+from .recommendations import build_recommendations
+from .services import fold_product_views, process_order_events, reprice_carts
+from .stock_monitor import check_stock_levels
+
+
+@task(name='marketplace.tasks.process_order')
+def process_order(order_id=None):
+    """Обработка событий заказа (очередь orders)"""
+    return process_order_events(order_id=order_id)
+
+
+@task(name='marketplace.tasks.fold_product_views')
+def fold_views():
+    """Перенос уникальных просмотров в Product.views_count"""
+    return fold_product_views()
+
+
+@task(name='marketplace.tasks.build_recommendations')
+def rebuild_recommendations():
+    """Пересчет рекомендаций по совместным покупкам"""
+    return build_recommendations()
+
+
+@task(name='marketplace.tasks.check_stock')
+def check_stock(product_ids=None):
+    """Проверка низких остатков (product_ids=None — весь каталог)"""
+    return check_stock_levels(product_ids)
+
+
+@task(name='marketplace.tasks.reprice_carts')
+def reprice_carts_task(product_ids):
+    """Обновление цен в корзинах после изменения цен товаров"""
+    return reprice_carts(product_ids)
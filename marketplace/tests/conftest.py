@@ -0,0 +1,60 @@
+import pytest
+
+
+@pytest.fixture
+def api_client():
+    """API клиент для тестов"""
+    from rest_framework.test import APIClient
+    return APIClient()
+
+
+@pytest.fixture
+def buyer():
+    """Покупатель"""
+    from accounts.tests.factories import UserFactory
+    return UserFactory()
+
+
+@pytest.fixture
+def buyer_client(api_client, buyer):
+    """API клиент с авторизованным покупателем"""
+    api_client.force_authenticate(user=buyer)
+    api_client.user = buyer
+    return api_client
+
+
+@pytest.fixture(autouse=True)
+def reset_memory_carts():
+    """Корзины в памяти не должны переживать тест"""
+    from marketplace.cart_storage import InMemoryCartStorage
+    InMemoryCartStorage.reset()
+    yield
+    InMemoryCartStorage.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_view_sketches():
+    """Скетчи просмотров в памяти не должны переживать тест"""
+    from marketplace.product_views import InMemoryViewStore
+    InMemoryViewStore.reset()
+    yield
+    InMemoryViewStore.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_sequence_pools():
+    """Блоки последовательностей откатываются вместе с транзакцией теста"""
+    from core.sequences import reset_pools
+    reset_pools()
+    yield
+    reset_pools()
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    """Настоящий кеш в памяти вместо DummyCache (add/get работают)"""
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    from django.core.cache import cache
+    cache.clear()
+    yield cache
+    cache.clear()
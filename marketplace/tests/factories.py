@@ -0,0 +1,76 @@
+import factory
+from decimal import Decimal
+from factory import Faker, SubFactory
+from factory.django import DjangoModelFactory
+from accounts.tests.factories import BusinessUserFactory, UserFactory
+from marketplace.models import Brand, Cart, CartItem, Product, ProductCategory, ProductReview
+
+
+class ProductCategoryFactory(DjangoModelFactory):
+    """Фабрика для категорий товаров"""
+
+    class Meta:
+        model = ProductCategory
+
+    name = factory.Sequence(lambda n: f'Категория {n}')
+    slug = factory.Sequence(lambda n: f'category-{n}')
+
+
+class BrandFactory(DjangoModelFactory):
+    """Фабрика для брендов"""
+
+    class Meta:
+        model = Brand
+
+    name = factory.Sequence(lambda n: f'Бренд {n}')
+    slug = factory.Sequence(lambda n: f'brand-{n}')
+
+
+class ProductFactory(DjangoModelFactory):
+    """Фабрика для товаров"""
+
+    class Meta:
+        model = Product
+
+    seller = SubFactory(BusinessUserFactory)
+    name = factory.Sequence(lambda n: f'Товар {n}')
+    slug = factory.Sequence(lambda n: f'product-{n}')
+    description = Faker('text', max_nb_chars=200)
+    category = SubFactory(ProductCategoryFactory)
+    price = Decimal('100.00')
+    stock_quantity = 10
+    status = 'active'
+
+
+class CartFactory(DjangoModelFactory):
+    """Фабрика для корзин"""
+
+    class Meta:
+        model = Cart
+
+    user = SubFactory(UserFactory)
+
+
+class CartItemFactory(DjangoModelFactory):
+    """Фабрика для товаров в корзине"""
+
+    class Meta:
+        model = CartItem
+
+    cart = SubFactory(CartFactory)
+    product = SubFactory(ProductFactory)
+    quantity = 1
+
+
+class ProductReviewFactory(DjangoModelFactory):
+    """Фабрика для отзывов на товары"""
+
+    class Meta:
+        model = ProductReview
+
+    product = SubFactory(ProductFactory)
+    author = SubFactory(UserFactory)
+    rating = 5
+    title = factory.Sequence(lambda n: f'Отзыв {n}')
+    content = Faker('text', max_nb_chars=100)
+    is_approved = True
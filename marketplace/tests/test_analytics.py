@@ -0,0 +1,120 @@
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from django.core.management import call_command
+from django.utils import timezone
+from marketplace.analytics import record_order_sales
+from marketplace.models import Order, SellerSalesRollup
+from marketplace.services import checkout, mark_order_delivered, mark_order_paid
+from .factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+DELIVERY = {
+    'delivery_address': 'ул. Ленина, 1',
+    'delivery_city': 'Москва',
+    'delivery_phone': '+79990000000',
+}
+
+
+def place_order(buyer, lines, created_at=None):
+    order, _ = checkout(buyer, {product.pk: {'quantity': quantity} for product, quantity in lines}, DELIVERY)
+    if created_at is not None:
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+        order.refresh_from_db()
+    return order
+
+
+def rollup_values(period):
+    return sorted(
+        SellerSalesRollup.objects.filter(period=period)
+        .values_list('product_id', 'period_start', 'revenue', 'units', 'orders_count')
+    )
+
+
+class TestSellerRollups:
+    """Тесты сумм продаж продавцов"""
+
+    def test_paid_order_recorded_once(self, buyer, django_capture_on_commit_callbacks):
+        product = ProductFactory(price=Decimal('10.00'), stock_quantity=20)
+        order = place_order(buyer, [(product, 3)], timezone.make_aware(datetime(2024, 5, 15, 12)))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            mark_order_paid(order.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            mark_order_delivered(order.pk)
+
+        assert rollup_values('day') == [(product.pk, date(2024, 5, 15), Decimal('30.00'), 3, 1)]
+        assert rollup_values('week') == [(product.pk, date(2024, 5, 13), Decimal('30.00'), 3, 1)]
+        assert rollup_values('month') == [(product.pk, date(2024, 5, 1), Decimal('30.00'), 3, 1)]
+
+    def test_increments_existing_rows(self, buyer):
+        first, second = ProductFactory(price=Decimal('5.00')), ProductFactory(price=Decimal('7.00'))
+        moment = timezone.make_aware(datetime(2024, 5, 15, 12))
+        record_order_sales(place_order(buyer, [(first, 1), (second, 2)], moment))
+        record_order_sales(place_order(buyer, [(first, 4)], moment))
+
+        assert rollup_values('day') == sorted([
+            (first.pk, date(2024, 5, 15), Decimal('25.00'), 5, 2),
+            (second.pk, date(2024, 5, 15), Decimal('14.00'), 2, 1),
+        ])
+
+    def test_backfill_matches_incremental(self, buyer):
+        product = ProductFactory(price=Decimal('10.00'), stock_quantity=50)
+        orders = [
+            place_order(buyer, [(product, quantity)], timezone.make_aware(datetime(2024, month, 28, 12)))
+            for month, quantity in ((4, 1), (5, 2), (5, 3))
+        ]
+        Order.objects.filter(pk__in=[order.pk for order in orders]).update(payment_status='paid')
+        place_order(buyer, [(product, 9)], timezone.make_aware(datetime(2024, 5, 28, 12)))
+        for order in orders:
+            record_order_sales(order)
+        expected = {period: rollup_values(period) for period in ('day', 'week', 'month')}
+
+        call_command('backfill_seller_rollups')
+
+        assert {period: rollup_values(period) for period in ('day', 'week', 'month')} == expected
+        call_command('backfill_seller_rollups', '--since=2024-05-01')
+        assert rollup_values('month') == expected['month']
+
+
+    def test_backfill_since_rebuilds_from_month_start(self, buyer):
+        product = ProductFactory(price=Decimal('10.00'), stock_quantity=50)
+        # 2024-04-29 — понедельник: неделя захватывает конец апреля и начало мая
+        recorded, unrecorded, in_month = [
+            place_order(buyer, [(product, quantity)], timezone.make_aware(datetime(2024, month, day, 12)))
+            for month, day, quantity in ((4, 29, 1), (4, 30, 2), (5, 5, 3))
+        ]
+        Order.objects.all().update(payment_status='paid')
+        record_order_sales(recorded)
+
+        call_command('backfill_seller_rollups', '--since=2024-05-20')
+
+        in_month.refresh_from_db()
+        assert in_month.sales_recorded
+        assert record_order_sales(unrecorded)
+        incremental = {period: rollup_values(period) for period in ('day', 'week', 'month')}
+        call_command('backfill_seller_rollups')
+        assert {period: rollup_values(period) for period in ('day', 'week', 'month')} == incremental
+
+
+class TestSellerDashboardApi:
+    """Тесты дашборда продавца"""
+
+    def test_dashboard_reads_rollups(self, buyer, api_client, django_assert_max_num_queries):
+        first, second = ProductFactory(price=Decimal('10.00')), ProductFactory(price=Decimal('1.00'))
+        second.seller = first.seller
+        second.save()
+        moment = timezone.make_aware(datetime(2024, 5, 15, 12))
+        record_order_sales(place_order(buyer, [(first, 2), (second, 5)], moment))
+        api_client.force_authenticate(user=first.seller)
+
+        with django_assert_max_num_queries(2):
+            response = api_client.get('/api/marketplace/seller/dashboard/', {
+                'period': 'month', 'start': '2024-05-01', 'end': '2024-05-31'
+            })
+
+        assert response.data['total_revenue'] == Decimal('25.00')
+        assert response.data['total_units'] == 7
+        assert [row['product_id'] for row in response.data['top_products']] == [first.pk, second.pk]
+        assert response.data['series'][0]['period_start'] == date(2024, 5, 1)
@@ -0,0 +1,49 @@
+import pytest
+from rest_framework import status
+from core import autocomplete as autocomplete_module
+from .factories import BrandFactory, ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+AUTOCOMPLETE_URL = '/api/marketplace/autocomplete/'
+
+
+@pytest.fixture(autouse=True)
+def index_dir(settings, tmp_path):
+    settings.AUTOCOMPLETE_INDEX_DIR = str(tmp_path)
+    autocomplete_module.reset_readers()
+    yield tmp_path
+    autocomplete_module.reset_readers()
+
+
+class TestAutocompleteAPI:
+    """Тесты подсказок при вводе"""
+
+    def test_products_by_sales(self, api_client):
+        rare = ProductFactory(name='Корм для кошек', sales_count=3)
+        popular = ProductFactory(name='Сухой корм для собак', sales_count=40)
+        ProductFactory(name='Корм черновик', status='draft', sales_count=100)
+
+        response = api_client.get(AUTOCOMPLETE_URL, {'q': 'Кор'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == [
+            {'id': popular.pk, 'label': 'Сухой корм для собак'},
+            {'id': rare.pk, 'label': 'Корм для кошек'},
+        ]
+
+    def test_brands_by_product_sales(self, api_client):
+        royal = BrandFactory(name='Royal Canin')
+        rex = BrandFactory(name='Rex')
+        ProductFactory(brand=rex, sales_count=5)
+        ProductFactory(brand=royal, sales_count=20)
+
+        response = api_client.get(AUTOCOMPLETE_URL, {'q': 'r', 'type': 'brands', 'limit': 1})
+
+        assert response.data == [{'id': royal.pk, 'label': 'Royal Canin'}]
+
+    def test_query_required(self, api_client):
+        response = api_client.get(AUTOCOMPLETE_URL, {'type': 'breeds'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert set(response.data) == {'q', 'type'}
@@ -0,0 +1,172 @@
+import pytest
+from decimal import Decimal
+from rest_framework import status
+from marketplace.models import Cart, CartItem
+from accounts.tests.factories import UserFactory
+from marketplace.cart_storage import InMemoryCartStorage
+from .factories import CartFactory, CartItemFactory, ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class TestCartSummary:
+    """Тесты итогов корзины"""
+
+    def test_aggregate_totals(self):
+        cart = CartFactory()
+        CartItemFactory(cart=cart, product=ProductFactory(price=Decimal('10.50')), quantity=2)
+        CartItemFactory(cart=cart, product=ProductFactory(price=Decimal('5.00')), quantity=3)
+
+        cart = Cart.objects.get(pk=cart.pk)
+        assert cart.total_amount == Decimal('36.00')
+        assert cart.total_items == 5
+
+    def test_empty_cart(self):
+        cart = CartFactory()
+
+        assert cart.get_summary() == {'total_amount': Decimal('0'), 'total_items': 0, 'positions': 0}
+
+    def test_summary_cached_and_invalidated(self, locmem_cache, django_assert_num_queries):
+        cart = CartFactory()
+        item = CartItemFactory(cart=cart, quantity=1)
+        cart.get_summary()
+
+        with django_assert_num_queries(0):
+            assert cart.get_summary()['total_items'] == 1
+
+        item.quantity = 4
+        item.save()
+        assert cart.get_summary()['total_items'] == 4
+
+        item.delete()
+        assert cart.get_summary()['total_items'] == 0
+
+    def test_item_copies_product_price(self):
+        product = ProductFactory(price=Decimal('99.90'))
+        cart = CartFactory()
+
+        item = CartItem.objects.create(cart=cart, product_id=product.pk, quantity=1)
+
+        assert item.price == Decimal('99.90')
+
+
+class TestCartAPI:
+    """Тесты API корзины"""
+
+    def test_add_and_get_cart(self, buyer_client):
+        product = ProductFactory(price=Decimal('100'))
+
+        response = buyer_client.post('/api/marketplace/cart/items/', {'product_id': product.id, 'quantity': 2})
+        assert response.status_code == status.HTTP_201_CREATED
+
+        buyer_client.post('/api/marketplace/cart/items/', {'product_id': product.id, 'quantity': 1})
+        response = buyer_client.get('/api/marketplace/cart/')
+
+        assert response.data['items'][0]['quantity'] == 3
+        assert response.data['summary']['total_amount'] == '300.00'
+
+    def test_cart_not_written_to_database(self, buyer_client):
+        product = ProductFactory()
+
+        buyer_client.post('/api/marketplace/cart/items/', {'product_id': product.id})
+
+        assert not CartItem.objects.exists()
+        assert buyer_client.get('/api/marketplace/cart/summary/').data['total_items'] == 1
+
+    def test_explicit_save_persists_cart(self, buyer_client):
+        first, second = ProductFactory(), ProductFactory()
+        CartItemFactory(cart=CartFactory(user=buyer_client.user), product=first, quantity=5)
+
+        buyer_client.patch(f'/api/marketplace/cart/items/{first.id}/', {'quantity': 2})
+        buyer_client.post('/api/marketplace/cart/items/', {'product_id': second.id})
+        response = buyer_client.post('/api/marketplace/cart/save/')
+
+        assert response.status_code == status.HTTP_200_OK
+        saved = dict(CartItem.objects.values_list('product_id', 'quantity'))
+        assert saved == {first.id: 2, second.id: 1}
+
+    def test_cannot_add_more_than_available(self, buyer_client):
+        product = ProductFactory(stock_quantity=1)
+
+        response = buyer_client.post('/api/marketplace/cart/items/', {'product_id': product.id, 'quantity': 2})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert buyer_client.get('/api/marketplace/cart/').data['items'] == []
+
+    def test_update_and_delete_item(self, buyer_client):
+        product = ProductFactory()
+        buyer_client.post('/api/marketplace/cart/items/', {'product_id': product.id})
+        url = f'/api/marketplace/cart/items/{product.id}/'
+
+        response = buyer_client.patch(url, {'quantity': 3})
+        assert response.data['quantity'] == 3
+
+        response = buyer_client.delete(url)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert buyer_client.get('/api/marketplace/cart/').data['items'] == []
+
+    def test_missing_item(self, buyer_client):
+        response = buyer_client.delete(f'/api/marketplace/cart/items/{ProductFactory().id}/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestDatabaseCartStorage:
+    """Тесты режима хранения корзины в БД"""
+
+    @pytest.fixture(autouse=True)
+    def database_storage(self, settings):
+        settings.MARKETPLACE_CART_STORAGE = 'database'
+
+    def test_add_writes_rows(self, buyer_client):
+        product = ProductFactory()
+
+        buyer_client.post('/api/marketplace/cart/items/', {'product_id': product.id, 'quantity': 2})
+
+        assert CartItem.objects.get().quantity == 2
+
+    def test_cart_fixed_number_of_queries(self, buyer_client, django_assert_max_num_queries):
+        cart = CartFactory(user=buyer_client.user)
+        for _ in range(5):
+            CartItemFactory(cart=cart)
+
+        with django_assert_max_num_queries(3):
+            response = buyer_client.get('/api/marketplace/cart/')
+        assert len(response.data['items']) == 5
+
+
+class TestAnonymousCart:
+    """Тесты анонимной корзины и переноса при входе"""
+
+    @pytest.fixture(autouse=True)
+    def persistent_sessions(self, locmem_cache):
+        pass
+
+    def test_anonymous_cart_merged_on_login(self, client):
+        product = ProductFactory()
+        user = UserFactory()
+        client.post('/api/marketplace/cart/items/', {'product_id': product.id, 'quantity': 2})
+
+        client.force_login(user)
+
+        storage = InMemoryCartStorage.carts[user.pk]
+        assert storage == {str(product.id): {'quantity': 2, 'price': '100.00'}}
+        assert 'marketplace_cart' not in client.session
+
+    def test_anonymous_cart_merged_on_api_login(self, client):
+        product = ProductFactory()
+        user = UserFactory(email='buyer@example.com')
+        user.set_password('testpassword123')
+        user.save()
+        client.post('/api/marketplace/cart/items/', {'product_id': product.id, 'quantity': 2})
+
+        response = client.post('/api/auth/login/', {'email': 'buyer@example.com', 'password': 'testpassword123'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert InMemoryCartStorage.carts[user.pk] == {str(product.id): {'quantity': 2, 'price': '100.00'}}
+        assert 'marketplace_cart' not in client.session
@@ -0,0 +1,87 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from marketplace.models import Cart, CartItem, Product, ProductPriceChange
+from marketplace.services import _reprice_sql, bulk_update_prices, reprice_carts
+from .factories import CartFactory, CartItemFactory, ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestRepriceCarts:
+    """Тесты пересчета цен в корзинах"""
+
+    def test_updates_stale_items_and_flags_carts(self):
+        product, other = ProductFactory(price=Decimal('10.00')), ProductFactory(price=Decimal('5.00'))
+        stale, fresh = CartFactory(), CartFactory()
+        CartItemFactory(cart=stale, product=product, quantity=2)
+        CartItemFactory(cart=stale, product=other)
+        CartItemFactory(cart=fresh, product=other)
+        product.price = Decimal('12.00')
+        product.save()
+
+        assert reprice_carts([product.pk, other.pk], chunk_size=1) == 1
+
+        assert CartItem.objects.get(cart=stale, product=product).price == Decimal('12.00')
+        assert Cart.objects.get(pk=stale.pk).prices_changed_at is not None
+        assert Cart.objects.get(pk=fresh.pk).prices_changed_at is None
+        assert Cart.objects.get(pk=stale.pk).total_amount == Decimal('29.00')
+
+    def test_price_change_triggers_repricing(self, django_capture_on_commit_callbacks):
+        product = ProductFactory(price=Decimal('10.00'))
+        item = CartItemFactory(product=product)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product.price = Decimal('8.00')
+            product.save()
+
+        assert CartItem.objects.get(pk=item.pk).price == Decimal('8.00')
+
+    def test_bulk_update_prices(self, django_capture_on_commit_callbacks):
+        products = ProductFactory.create_batch(3, price=Decimal('10.00'))
+        CartItemFactory(product=products[0])
+
+        with django_capture_on_commit_callbacks(execute=True):
+            changed = bulk_update_prices({products[0].pk: '9.00', products[1].pk: '10.00', products[2].pk: '11'})
+
+        assert changed == 2
+        assert CartItem.objects.get().price == Decimal('9.00')
+        assert ProductPriceChange.objects.filter(price=Decimal('11.00')).count() == 1
+
+
+    def test_reprice_sql_uses_model_tables(self, monkeypatch):
+        monkeypatch.setattr(CartItem._meta, 'db_table', 'shop_cart_lines')
+
+        sql = _reprice_sql()
+
+        assert f"UPDATE {connection.ops.quote_name('shop_cart_lines')} AS item" in sql
+        assert f"FROM {connection.ops.quote_name(Product._meta.db_table)} AS product" in sql
+
+
+class TestCartPriceNotice:
+    """Тесты уведомления об изменении цен"""
+
+    def test_session_cart_repriced_on_read(self, settings, api_client):
+        # Сессии хранятся в кеше — в тестах нужен настоящий кеш
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        product = ProductFactory(price=Decimal('10.00'))
+        api_client.post('/api/marketplace/cart/items/', {'product_id': product.pk, 'quantity': 3}, format='json')
+        product.price = Decimal('7.00')
+        product.save()
+
+        response = api_client.get('/api/marketplace/cart/')
+
+        assert response.data['prices_changed'] is True
+        assert Decimal(response.data['summary']['total_amount']) == Decimal('21.00')
+        assert api_client.get('/api/marketplace/cart/').data['prices_changed'] is False
+
+    def test_database_cart_flag_cleared_after_view(self, settings, buyer_client, buyer):
+        settings.MARKETPLACE_CART_STORAGE = 'database'
+        product = ProductFactory(price=Decimal('10.00'))
+        CartItemFactory(cart=CartFactory(user=buyer), product=product)
+        product.price = Decimal('11.00')
+        product.save()
+        reprice_carts([product.pk])
+
+        assert buyer_client.get('/api/marketplace/cart/').data['prices_changed'] is True
+        assert buyer_client.get('/api/marketplace/cart/').data['prices_changed'] is False
@@ -0,0 +1,87 @@
+import pytest
+from marketplace.models import ProductCategory
+from marketplace.selectors import get_category_tree
+from marketplace.services import rebuild_category_paths
+from .factories import ProductCategoryFactory, ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def tree():
+    dogs = ProductCategoryFactory(name='Собаки')
+    food = ProductCategoryFactory(name='Корм', parent=dogs)
+    dry = ProductCategoryFactory(name='Сухой корм', parent=food)
+    cats = ProductCategoryFactory(name='Кошки')
+    return {'dogs': dogs, 'food': food, 'dry': dry, 'cats': cats}
+
+
+class TestCategoryPath:
+    """Тесты материализованного пути категорий"""
+
+    def test_path_built_on_create(self, tree):
+        assert tree['dogs'].depth == 0
+        assert tree['dry'].depth == 2
+        assert tree['dry'].path.startswith(tree['food'].path)
+        assert tree['food'].path.startswith(tree['dogs'].path)
+
+    def test_descendants(self, tree):
+        descendants = set(tree['dogs'].get_descendants())
+
+        assert descendants == {tree['food'], tree['dry']}
+        assert tree['food'] in tree['food'].get_descendants(include_self=True)
+
+    def test_ancestors(self, tree):
+        assert list(tree['dry'].get_ancestors()) == [tree['dogs'], tree['food']]
+
+    def test_products_include_subcategories(self, tree):
+        in_dry = ProductFactory(category=tree['dry'])
+        in_food = ProductFactory(category=tree['food'])
+        ProductFactory(category=tree['cats'])
+
+        assert set(tree['dogs'].get_products()) == {in_dry, in_food}
+        assert list(tree['food'].get_products(include_descendants=False)) == [in_food]
+
+    def test_move_updates_subtree(self, tree):
+        food = tree['food']
+        food.parent = tree['cats']
+        food.save()
+
+        dry = ProductCategory.objects.get(pk=tree['dry'].pk)
+        assert dry.path.startswith(tree['cats'].path)
+        assert dry.depth == 2
+        assert not tree['dogs'].get_descendants().exists()
+
+    def test_cannot_move_into_own_subtree(self, tree):
+        dogs = tree['dogs']
+        dogs.parent = tree['dry']
+
+        with pytest.raises(ValueError):
+            dogs.save()
+
+    def test_rebuild_paths(self, tree):
+        ProductCategory.objects.update(path='', depth=0)
+
+        assert rebuild_category_paths() == 4
+        assert ProductCategory.objects.get(pk=tree['dry'].pk).path == tree['dry'].path
+
+    def test_str_with_parent(self, tree):
+        assert str(ProductCategory.objects.get(pk=tree['food'].pk)) == 'Собаки > Корм'
+
+
+class TestCategoryTree:
+    """Тесты дерева категорий для меню"""
+
+    def test_nested_tree(self, tree):
+        roots = get_category_tree()
+
+        assert [node['name'] for node in roots] == ['Кошки', 'Собаки']
+        dogs = roots[1]
+        assert dogs['children'][0]['name'] == 'Корм'
+        assert dogs['children'][0]['children'][0]['name'] == 'Сухой корм'
+
+    def test_inactive_subtree_hidden(self, tree):
+        ProductCategory.objects.filter(pk=tree['food'].pk).update(is_active=False)
+
+        dogs = [node for node in get_category_tree() if node['name'] == 'Собаки'][0]
+        assert dogs['children'] == []
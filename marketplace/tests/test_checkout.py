@@ -0,0 +1,121 @@
+import pytest
+from decimal import Decimal
+from rest_framework import status
+from core.exceptions import InsufficientStockError
+from marketplace.models import Order, Product, StockReservation
+from marketplace.services import checkout, enable_sharded_stock
+from .factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+DELIVERY = {
+    'delivery_address': 'ул. Ленина, 1',
+    'delivery_city': 'Москва',
+    'delivery_phone': '+79990000000',
+}
+
+
+class TestCheckoutService:
+    """Тесты оформления заказа"""
+
+    def test_creates_order_with_items_and_totals(self, buyer):
+        first = ProductFactory(price=Decimal('10.50'), stock_quantity=5)
+        second = ProductFactory(price=Decimal('3.00'), stock_quantity=5)
+
+        order, created = checkout(buyer, {first.pk: {'quantity': 2}, second.pk: {'quantity': 3}}, DELIVERY)
+
+        assert created
+        assert order.subtotal == Decimal('30.00')
+        assert order.total_amount == Decimal('30.00')
+        assert order.items.count() == 2
+        assert StockReservation.objects.filter(order=order, status='active').count() == 2
+        assert Product.objects.get(pk=first.pk).reserved_quantity == 2
+
+    def test_order_numbers_are_sequential(self, buyer, django_capture_on_commit_callbacks):
+        product = ProductFactory(stock_quantity=10)
+
+        numbers = []
+        for _ in range(3):
+            with django_capture_on_commit_callbacks(execute=True):
+                numbers.append(checkout(buyer, {product.pk: {'quantity': 1}}, DELIVERY)[0].order_number)
+
+        assert numbers == ['ORD-00000001', 'ORD-00000002', 'ORD-00000003']
+
+    def test_rolled_back_block_is_not_reused(self, buyer):
+        product = ProductFactory(stock_quantity=10)
+
+        first, _ = checkout(buyer, {product.pk: {'quantity': 1}}, DELIVERY)
+        second, _ = checkout(buyer, {product.pk: {'quantity': 1}}, DELIVERY)
+
+        # Без коммита остаток блока не попадает в пул, следующий номер — из нового блока
+        assert first.order_number == 'ORD-00000001'
+        assert second.order_number == 'ORD-00000021'
+
+    def test_idempotent_replay(self, buyer):
+        product = ProductFactory(stock_quantity=10)
+        lines = {product.pk: {'quantity': 2}}
+
+        order, created = checkout(buyer, lines, DELIVERY, idempotency_key='abc')
+        replay, replay_created = checkout(buyer, lines, DELIVERY, idempotency_key='abc')
+
+        assert created and not replay_created
+        assert replay.pk == order.pk
+        assert Product.objects.get(pk=product.pk).reserved_quantity == 2
+
+    def test_insufficient_stock_rolls_back(self, buyer):
+        available = ProductFactory(stock_quantity=10)
+        scarce = ProductFactory(stock_quantity=1)
+
+        with pytest.raises(InsufficientStockError):
+            checkout(buyer, {available.pk: {'quantity': 2}, scarce.pk: {'quantity': 5}}, DELIVERY)
+
+        assert not Order.objects.exists()
+        assert Product.objects.get(pk=available.pk).reserved_quantity == 0
+
+    def test_sharded_product(self, buyer):
+        product = ProductFactory(stock_quantity=8)
+        enable_sharded_stock(product.pk, 4)
+
+        order, _ = checkout(buyer, {product.pk: {'quantity': 3}}, DELIVERY)
+
+        assert order.items.get().quantity == 3
+        assert Product.objects.get(pk=product.pk).available_quantity == 5
+
+
+class TestCheckoutApi:
+    """Тесты API оформления заказа"""
+
+    def test_checkout_from_cart(self, buyer_client):
+        product = ProductFactory(price=Decimal('20.00'), stock_quantity=5)
+        buyer_client.post('/api/marketplace/cart/items/', {'product_id': product.pk, 'quantity': 2}, format='json')
+
+        response = buyer_client.post('/api/marketplace/checkout/', DELIVERY, format='json', HTTP_IDEMPOTENCY_KEY='k1')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Decimal(response.data['total_amount']) == Decimal('40.00')
+        assert len(response.data['items']) == 1
+        assert buyer_client.get('/api/marketplace/cart/summary/').data['total_items'] == 0
+
+        replay = buyer_client.post('/api/marketplace/checkout/', DELIVERY, format='json', HTTP_IDEMPOTENCY_KEY='k1')
+        assert replay.status_code == status.HTTP_200_OK
+        assert replay.data['order_number'] == response.data['order_number']
+
+    def test_empty_cart(self, buyer_client):
+        response = buyer_client.post('/api/marketplace/checkout/', DELIVERY, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_orders_list_and_detail(self, buyer, buyer_client):
+        product = ProductFactory(stock_quantity=5)
+        order, _ = checkout(buyer, {product.pk: {'quantity': 1}}, DELIVERY)
+
+        response = buyer_client.get('/api/marketplace/orders/')
+        assert response.data['count'] == 1
+
+        response = buyer_client.get(f'/api/marketplace/orders/{order.order_number}/')
+        assert response.data['items'][0]['product'] == product.pk
+
+    def test_checkout_requires_auth(self, api_client):
+        response = api_client.post('/api/marketplace/checkout/', DELIVERY, format='json')
+
+        assert response.status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.utils import timezone
+from marketplace.models import Product
+from marketplace.services import apply_rating_change, checkout, reserve_stock
+from .factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+DELIVERY = {
+    'delivery_address': 'ул. Ленина, 1',
+    'delivery_city': 'Москва',
+    'delivery_phone': '+79990000000',
+}
+
+
+def streamed(response):
+    return b''.join(response.streaming_content).decode()
+
+
+class TestSellerExport:
+    """Тесты потоковой выгрузки"""
+
+    def test_products_csv_only_own(self, api_client):
+        own = ProductFactory(price=Decimal('12.50'))
+        ProductFactory()
+        api_client.force_authenticate(user=own.seller)
+
+        response = api_client.get('/api/marketplace/seller/export/products/')
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/csv')
+        rows = list(csv.DictReader(io.StringIO(streamed(response))))
+        assert [(row['id'], row['price']) for row in rows] == [(str(own.pk), '12.50')]
+
+    def test_incremental_by_watermark(self, api_client):
+        old, changed = ProductFactory(), ProductFactory()
+        changed.seller = old.seller
+        changed.save()
+        Product.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        api_client.force_authenticate(user=old.seller)
+
+        first = api_client.get('/api/marketplace/seller/export/products/', {'file_format': 'jsonl'})
+        assert len(streamed(first).splitlines()) == 2
+
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = api_client.get('/api/marketplace/seller/export/products/', {'file_format': 'jsonl', 'since': since})
+        assert [json.loads(line)['id'] for line in streamed(response).splitlines()] == [changed.pk]
+
+        response = api_client.get(
+            '/api/marketplace/seller/export/products/', {'since': first['X-Export-Watermark']}
+        )
+        assert len(streamed(response).splitlines()) == 1  # только заголовок
+
+    def test_incremental_sees_bulk_updates(self, api_client):
+        product = ProductFactory(stock_quantity=5)
+        Product.objects.filter(pk=product.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        api_client.force_authenticate(user=product.seller)
+
+        reserve_stock(product.pk, 2)
+        apply_rating_change(product.pk, 4, 1)
+
+        response = api_client.get('/api/marketplace/seller/export/products/', {'file_format': 'jsonl', 'since': since})
+        row = json.loads(streamed(response))
+        assert (row['id'], row['reserved_quantity'], row['reviews_count']) == (product.pk, 2, 1)
+
+    def test_orders_export(self, api_client, buyer):
+        product = ProductFactory(price=Decimal('3.00'))
+        checkout(buyer, {product.pk: {'quantity': 2}}, DELIVERY)
+        api_client.force_authenticate(user=product.seller)
+
+        response = api_client.get('/api/marketplace/seller/export/orders/', {'file_format': 'jsonl'})
+
+        row = json.loads(streamed(response))
+        assert (row['product_id'], row['quantity'], row['total_price']) == (product.pk, 2, '6.00')
+        assert row['order_order_number'].startswith('ORD-')
+
+    def test_command(self, tmp_path):
+        ProductFactory.create_batch(3)
+        output = tmp_path / 'products.csv'
+
+        call_command('export_marketplace_data', 'products', '--output', str(output), stderr=io.StringIO())
+
+        assert len(output.read_text(encoding='utf-8').splitlines()) == 4
@@ -0,0 +1,139 @@
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from core.exceptions import InsufficientStockError
+from marketplace.models import Product, StockReservation, StockShard
+from marketplace.services import (
+    confirm_reservations, disable_sharded_stock, enable_sharded_stock, expire_reservations,
+    rebalance_stock_shards, release_reservations, reserve_stock, restock_product
+)
+from .factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestStockReservation:
+    """Тесты резервирования остатков"""
+
+    def test_reserve_increments_reserved(self, buyer):
+        product = ProductFactory(stock_quantity=5)
+
+        reservation = reserve_stock(product.pk, 3, user=buyer)
+
+        product.refresh_from_db()
+        assert reservation.status == 'active'
+        assert reservation.expires_at > timezone.now()
+        assert product.reserved_quantity == 3
+        assert product.available_quantity == 2
+
+    def test_cannot_reserve_more_than_available(self):
+        product = ProductFactory(stock_quantity=1)
+        reserve_stock(product.pk, 1)
+
+        with pytest.raises(InsufficientStockError):
+            reserve_stock(product.pk, 1)
+
+        product.refresh_from_db()
+        assert product.reserved_quantity == 1
+        assert StockReservation.objects.count() == 1
+
+    def test_release_returns_stock_once(self):
+        product = ProductFactory(stock_quantity=2)
+        reservation = reserve_stock(product.pk, 2)
+
+        assert release_reservations([reservation.pk]) == 1
+        assert release_reservations([reservation.pk]) == 0
+
+        product.refresh_from_db()
+        assert product.reserved_quantity == 0
+
+    def test_confirm_converts_to_sale(self):
+        product = ProductFactory(stock_quantity=10)
+        first = reserve_stock(product.pk, 2)
+        second = reserve_stock(product.pk, 3)
+
+        confirm_reservations([first.pk, second.pk])
+
+        product.refresh_from_db()
+        assert product.stock_quantity == 5
+        assert product.reserved_quantity == 0
+        assert product.sales_count == 5
+        assert set(StockReservation.objects.values_list('status', flat=True)) == {'converted'}
+
+    def test_expire_sweeps_only_expired(self):
+        product = ProductFactory(stock_quantity=10)
+        other = ProductFactory(stock_quantity=10)
+        expired = reserve_stock(product.pk, 4, ttl=timedelta(minutes=1))
+        reserve_stock(other.pk, 1, ttl=timedelta(minutes=1))
+        fresh = reserve_stock(product.pk, 1, ttl=timedelta(hours=1))
+
+        swept = expire_reservations(batch_size=1, now=timezone.now() + timedelta(minutes=5))
+
+        assert swept == 2
+        product.refresh_from_db()
+        assert product.reserved_quantity == 1
+        assert StockReservation.objects.get(pk=expired.pk).status == 'expired'
+        assert StockReservation.objects.get(pk=fresh.pk).status == 'active'
+
+
+class TestShardedStock:
+    """Тесты шардированного остатка"""
+
+    @pytest.fixture
+    def product(self):
+        product = ProductFactory(stock_quantity=10, reserved_quantity=2)
+        enable_sharded_stock(product.pk, 4)
+        return Product.objects.get(pk=product.pk)
+
+    def test_enable_splits_available_stock(self, product):
+        quantities = sorted(StockShard.objects.filter(product=product).values_list('quantity', flat=True))
+
+        assert quantities == [2, 2, 2, 2]
+        assert product.available_quantity == 8
+        assert product.is_in_stock
+
+    def test_reserve_takes_from_shards(self, product):
+        reserve_stock(product.pk, 2)
+
+        product = Product.objects.get(pk=product.pk)
+        assert product.available_quantity == 6
+        assert product.reserved_quantity == 2
+
+    def test_reserve_collects_across_shards(self, product):
+        reserve_stock(product.pk, 7)
+
+        with pytest.raises(InsufficientStockError):
+            reserve_stock(product.pk, 2)
+        assert Product.objects.get(pk=product.pk).available_quantity == 1
+
+    def test_release_and_confirm_then_sync(self, product):
+        sold = reserve_stock(product.pk, 3)
+        released = reserve_stock(product.pk, 1)
+
+        confirm_reservations([sold.pk])
+        release_reservations([released.pk])
+        rebalance_stock_shards(product.pk)
+
+        product = Product.objects.get(pk=product.pk)
+        assert product.stock_quantity == 7
+        assert product.sales_count == 3
+        assert product.reserved_quantity == 2
+        assert product.available_quantity == 5
+        assert sorted(product.stock_shards.values_list('sold', flat=True)) == [0, 0, 0, 0]
+
+    def test_disable_restores_row_stock(self, product):
+        reserve_stock(product.pk, 3)
+
+        disable_sharded_stock(product.pk)
+
+        product = Product.objects.get(pk=product.pk)
+        assert product.stock_shards_count == 0
+        assert product.reserved_quantity == 5
+        assert product.available_quantity == 5
+
+    def test_restock(self, product):
+        restock_product(product.pk, 5)
+
+        product = Product.objects.get(pk=product.pk)
+        assert product.stock_quantity == 15
+        assert product.available_quantity == 13
@@ -0,0 +1,90 @@
+import pytest
+from django.core.management import call_command
+from marketplace.models import Order, OrderEvent, Product
+from marketplace.services import cancel_order, checkout, mark_order_paid, process_order_events
+from notifications.models import Notification
+from .factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+DELIVERY = {
+    'delivery_address': 'ул. Ленина, 1',
+    'delivery_city': 'Москва',
+    'delivery_phone': '+79990000000',
+}
+
+
+@pytest.fixture
+def place_order(buyer, django_capture_on_commit_callbacks):
+    def place(product, quantity=2):
+        with django_capture_on_commit_callbacks(execute=True):
+            order, _ = checkout(buyer, {product.pk: {'quantity': quantity}}, DELIVERY)
+        return order
+    return place
+
+
+class TestOrderEvents:
+    """Тесты обработки событий заказа"""
+
+    def test_created_event_processed_on_commit(self, place_order):
+        product = ProductFactory(stock_quantity=5)
+
+        order = place_order(product)
+
+        assert order.events.get().status == 'processed'
+        assert Notification.objects.filter(user=product.seller, notification_type='order_created').exists()
+
+    def test_event_not_processed_without_commit(self, buyer):
+        product = ProductFactory(stock_quantity=5)
+
+        order, _ = checkout(buyer, {product.pk: {'quantity': 1}}, DELIVERY)
+
+        assert order.events.get().status == 'pending'
+
+    def test_paid_finalizes_stock(self, place_order, django_capture_on_commit_callbacks):
+        product = ProductFactory(stock_quantity=5)
+        order = place_order(product, quantity=2)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            mark_order_paid(order.pk)
+
+        product = Product.objects.get(pk=product.pk)
+        assert (product.stock_quantity, product.reserved_quantity, product.sales_count) == (3, 0, 2)
+        order = Order.objects.get(pk=order.pk)
+        assert (order.status, order.payment_status) == ('confirmed', 'paid')
+        assert not order.reservations.filter(status='active').exists()
+
+    def test_cancel_releases_stock(self, place_order, django_capture_on_commit_callbacks):
+        product = ProductFactory(stock_quantity=5)
+        order = place_order(product, quantity=2)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            cancel_order(order.pk)
+
+        product = Product.objects.get(pk=product.pk)
+        assert (product.stock_quantity, product.reserved_quantity) == (5, 0)
+
+    def test_failed_handler_is_retried(self, buyer, monkeypatch):
+        from marketplace import services
+
+        product = ProductFactory(stock_quantity=5)
+        order, _ = checkout(buyer, {product.pk: {'quantity': 1}}, DELIVERY)
+
+        def fail(order):
+            raise RuntimeError('boom')
+        monkeypatch.setitem(services.ORDER_EVENT_HANDLERS, 'created', fail)
+        assert process_order_events() == 0
+        event = OrderEvent.objects.get(order=order)
+        assert (event.status, event.attempts, event.last_error) == ('pending', 1, 'boom')
+
+        monkeypatch.undo()
+        assert process_order_events() == 1
+
+    def test_drain_command(self, buyer):
+        product = ProductFactory(stock_quantity=5)
+        for _ in range(3):
+            checkout(buyer, {product.pk: {'quantity': 1}}, DELIVERY)
+
+        call_command('process_order_events', batch_size=2)
+
+        assert not OrderEvent.objects.filter(status='pending').exists()
@@ -0,0 +1,84 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from marketplace.models import Product, ProductPriceChange, ProductPriceSegment
+from marketplace.price_history import compact_price_history, get_price_series, record_price_change
+from .factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def set_price(product, price, at, old_price=None):
+    product.price, product.old_price = Decimal(price), old_price and Decimal(old_price)
+    record_price_change(product, changed_at=at)
+
+
+class TestPriceChangeRecording:
+    """Тесты записи изменений цены"""
+
+    def test_create_and_change_recorded(self):
+        product = ProductFactory(price=Decimal('100.00'))
+        product.price = Decimal('90.00')
+        product.old_price = Decimal('100.00')
+        product.save()
+        product.name = 'Другое название'
+        product.save()
+
+        assert list(product.price_changes.values_list('price', flat=True)) == [Decimal('100.00'), Decimal('90.00')]
+
+    def test_deferred_price_not_loaded(self, django_assert_num_queries):
+        product = ProductFactory()
+        product = Product.objects.only('pk', 'name', 'slug').get(pk=product.pk)
+
+        with django_assert_num_queries(1):
+            product.save(update_fields=['name'])
+
+        assert product.price_changes.count() == 1
+
+
+class TestPriceHistoryCompaction:
+    """Тесты сжатия истории и графика"""
+
+    def test_compaction_preserves_series(self, monkeypatch):
+        from marketplace import price_history
+        monkeypatch.setattr(price_history, 'SEGMENT_MAX_POINTS', 4)
+        product = ProductFactory(price=Decimal('50.00'))
+        ProductPriceChange.objects.all().delete()
+        for day in range(10):
+            set_price(product, 100 + day, START + timedelta(days=day), old_price=200 if day % 2 else None)
+        before = get_price_series(product.pk, START, START + timedelta(days=10), max_points=10)
+
+        assert compact_price_history(now=START + timedelta(days=7)) == 6
+        assert compact_price_history(now=START + timedelta(days=20)) == 4
+
+        assert not ProductPriceChange.objects.exists()
+        assert list(ProductPriceSegment.objects.values_list('points_count', flat=True)) == [4, 4, 2]
+        assert get_price_series(product.pk, START, START + timedelta(days=10), max_points=10) == before
+        assert before[3]['price'] == Decimal('103.00')
+        assert before[3]['old_price'] == Decimal('200.00')
+
+    def test_value_carried_from_before_range(self):
+        product = ProductFactory()
+        ProductPriceChange.objects.all().delete()
+        set_price(product, '10.00', START)
+        set_price(product, '12.00', START + timedelta(days=5))
+        compact_price_history(now=START + timedelta(days=3))
+
+        series = get_price_series(product.pk, START + timedelta(days=2), START + timedelta(days=8), max_points=3)
+
+        assert [(point['min_price'], point['price']) for point in series] == [
+            (Decimal('10.00'), Decimal('10.00')),
+            (Decimal('10.00'), Decimal('12.00')),
+            (Decimal('12.00'), Decimal('12.00')),
+        ]
+
+    def test_api(self, api_client):
+        product = ProductFactory(price=Decimal('100.00'))
+
+        response = api_client.get(f'/api/marketplace/products/{product.pk}/price-history/', {'points': 5})
+
+        assert response.status_code == 200
+        assert len(response.data) == 1
+        assert response.data[0]['price'] == '100.00'
@@ -0,0 +1,142 @@
+import pytest
+from datetime import date
+from marketplace.models import Product
+from core.hyperloglog import HyperLogLog
+from marketplace.product_views import (
+    VIEWS_LOCK_KEY, VIEWS_SKETCH_KEY, CacheViewStore, InMemoryViewStore, get_unique_views, track_product_view,
+)
+from marketplace.services import fold_product_views
+from .factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestProductViews:
+    """Тесты учета уникальных просмотров"""
+
+    def test_repeat_views_counted_once(self):
+        product = ProductFactory()
+
+        assert track_product_view(product.pk, 'u:1')
+        assert not track_product_view(product.pk, 'u:1')
+        track_product_view(product.pk, 'u:2')
+
+        assert get_unique_views(product.pk) == 2
+
+    def test_fold_adds_only_increment(self, django_assert_num_queries):
+        first, second = ProductFactory(), ProductFactory()
+        for viewer in range(30):
+            track_product_view(first.pk, f'u:{viewer}')
+        track_product_view(second.pk, 'u:1')
+
+        with django_assert_num_queries(1):
+            assert fold_product_views() == 31
+        track_product_view(second.pk, 'u:2')
+        fold_product_views()
+
+        assert Product.objects.get(pk=first.pk).views_count == 30
+        assert Product.objects.get(pk=second.pk).views_count == 2
+
+    def test_past_days_dropped_after_fold(self):
+        product = ProductFactory()
+        track_product_view(product.pk, 'u:1', day=date(2024, 1, 1))
+        track_product_view(product.pk, 'u:1', day=date(2024, 1, 2))
+
+        fold_product_views(today=date(2024, 1, 2))
+
+        assert InMemoryViewStore().get_days() == ['2024-01-02']
+        assert Product.objects.get(pk=product.pk).views_count == 2
+
+    def test_cache_store(self, settings):
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        settings.MARKETPLACE_VIEWS_STORAGE = 'cache'
+        product = ProductFactory()
+        for viewer in ('u:1', 'u:2', 'u:1'):
+            track_product_view(product.pk, viewer, day=date(2024, 1, 1))
+
+        assert fold_product_views(today=date(2024, 1, 2)) == 2
+        assert get_unique_views(product.pk, day=date(2024, 1, 1)) == 0
+
+    def test_cache_store_concurrent_first_views(self, locmem_cache):
+        first, second = ProductFactory(), ProductFactory()
+        store = CacheViewStore()
+        day = '2024-01-01'
+
+        # Оба запроса не нашли скетч и создают его одновременно
+        for product, viewers in ((first, ['u:1']), (second, ['u:2']), (first, ['u:3', 'u:4'])):
+            sketch = HyperLogLog()
+            for viewer in viewers:
+                sketch.add(viewer)
+            store.set_sketch(day, product.pk, sketch, created=True)
+
+        assert store.get_product_ids(day) == {first.pk, second.pk}
+        assert store.get_sketch(day, first.pk).count() == 3
+        assert store.get_days(today='2024-01-02') == [day]
+
+
+    @pytest.mark.parametrize('store_class', [CacheViewStore, InMemoryViewStore])
+    def test_interleaved_updates_keep_both_viewers(self, locmem_cache, store_class):
+        product = ProductFactory()
+        store = store_class()
+        day = '2024-01-01'
+        sketch = HyperLogLog()
+        sketch.add('u:1')
+        store.set_sketch(day, product.pk, sketch, created=True)
+
+        # Оба запроса прочитали скетч до того, как другой его записал
+        first, second = store.get_sketch(day, product.pk), store.get_sketch(day, product.pk)
+        first.add('u:2')
+        second.add('u:3')
+        store.set_sketch(day, product.pk, first)
+        store.set_sketch(day, product.pk, second)
+
+        assert store.get_sketch(day, product.pk).count() == 3
+        assert locmem_cache.get(VIEWS_LOCK_KEY.format(VIEWS_SKETCH_KEY.format(day, product.pk))) is None
+
+
+class TestProductDetailApi:
+    """Тесты карточки товара"""
+
+    def test_detail_tracks_viewer(self, buyer_client):
+        product = ProductFactory()
+
+        response = buyer_client.get(f'/api/marketplace/products/{product.pk}/')
+        buyer_client.get(f'/api/marketplace/products/{product.pk}/')
+
+        assert response.status_code == 200
+        assert response.data['name'] == product.name
+        assert get_unique_views(product.pk) == 1
+
+    def test_inactive_product(self, api_client):
+        product = ProductFactory(status='draft')
+
+        response = api_client.get(f'/api/marketplace/products/{product.pk}/')
+
+        assert response.status_code == 404
+
+
+class TestProductSlugResolution:
+    """Тесты разрешения slug товара"""
+
+    @pytest.fixture
+    def locmem_cache(self, settings):
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+    def test_slug_resolved_from_cache(self, locmem_cache, django_assert_num_queries):
+        from marketplace.selectors import product_slugs
+
+        product = ProductFactory(slug='korm')
+        product_slugs.resolve('korm')
+
+        with django_assert_num_queries(0):
+            assert product_slugs.resolve('korm') == product.pk
+
+    def test_slug_change_invalidates(self, locmem_cache, api_client):
+        product = ProductFactory(slug='old-slug')
+        assert api_client.get('/api/marketplace/products/new-slug/').status_code == 404
+
+        product.slug = 'new-slug'
+        product.save()
+
+        assert api_client.get('/api/marketplace/products/new-slug/').data['id'] == product.pk
+        assert api_client.get('/api/marketplace/products/old-slug/').status_code == 404
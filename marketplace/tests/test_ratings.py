@@ -0,0 +1,86 @@
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+from marketplace.models import Product, ProductRatingStats, ProductReview
+from marketplace.services import reconcile_product_ratings
+from .factories import ProductFactory, ProductReviewFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def rating_of(product):
+    product = Product.objects.get(pk=product.pk)
+    return product.rating, product.reviews_count
+
+
+class TestIncrementalRatings:
+    """Тесты инкрементального рейтинга"""
+
+    def test_approved_reviews_counted(self):
+        product = ProductFactory()
+        ProductReviewFactory(product=product, rating=5)
+        ProductReviewFactory(product=product, rating=4)
+        ProductReviewFactory(product=product, rating=1, is_approved=False)
+
+        assert rating_of(product) == (Decimal('4.50'), 2)
+        assert ProductRatingStats.objects.get(product=product).distribution == {1: 0, 2: 0, 3: 0, 4: 1, 5: 1}
+
+    def test_approve_edit_and_delete(self):
+        product = ProductFactory()
+        ProductReviewFactory(product=product, rating=5)
+        review = ProductReviewFactory(product=product, rating=2, is_approved=False)
+
+        review.is_approved = True
+        review.save()
+        assert rating_of(product) == (Decimal('3.50'), 2)
+
+        review.rating = 4
+        review.save()
+        assert rating_of(product) == (Decimal('4.50'), 2)
+        assert ProductRatingStats.objects.get(product=product).stars_2 == 0
+
+        ProductReview.objects.get(pk=review.pk).delete()
+        assert rating_of(product) == (Decimal('5.00'), 1)
+
+    def test_delete_reviewed_product_and_seller(self):
+        product = ProductFactory()
+        ProductReviewFactory(product=product, rating=5)
+        other = ProductFactory(seller=product.seller)
+        ProductReviewFactory(product=other, rating=4)
+        ProductReviewFactory(product=other, rating=2)
+
+        product.delete()
+        assert not ProductRatingStats.objects.filter(product_id=product.pk).exists()
+
+        other.seller.delete()
+        assert not Product.objects.filter(pk=other.pk).exists()
+        assert not ProductRatingStats.objects.exists()
+
+    def test_unrelated_save_does_not_touch_stats(self, django_assert_num_queries):
+        review = ProductReviewFactory(rating=3)
+        review.title = 'Новый заголовок'
+
+        with django_assert_num_queries(1):
+            review.save()
+
+
+class TestReconcileRatings:
+    """Тесты пересчета рейтингов"""
+
+    def test_fixes_bulk_updates(self):
+        product, stale = ProductFactory(), ProductFactory(rating=Decimal('3.00'), reviews_count=7)
+        ProductReviewFactory(product=product, rating=5, is_approved=False)
+        ProductReviewFactory(product=product, rating=3, is_approved=False)
+        ProductReview.objects.filter(product=product).update(is_approved=True)
+
+        assert reconcile_product_ratings() == 2
+        assert rating_of(product) == (Decimal('4.00'), 2)
+        assert rating_of(stale) == (Decimal('0.00'), 0)
+        assert ProductRatingStats.objects.get(product=product).stars_3 == 1
+
+    def test_command_is_idempotent(self):
+        ProductReviewFactory(rating=4)
+
+        call_command('reconcile_product_ratings')
+
+        assert reconcile_product_ratings() == 0
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from collections import Counter
+from itertools import permutations
+from marketplace.models import ProductRecommendation
+from marketplace.recommendations import build_recommendations, co_purchase_counts, top_k_neighbours
+from marketplace.services import checkout
+from .factories import ProductFactory
+
+DELIVERY = {
+    'delivery_address': 'ул. Ленина, 1',
+    'delivery_city': 'Москва',
+    'delivery_phone': '+79990000000',
+}
+
+
+class TestCoPurchaseMatrix:
+    """Тесты векторного подсчета совместных покупок"""
+
+    def test_matches_pair_loop(self):
+        rng = np.random.default_rng(1)
+        order_ids = rng.integers(0, 200, size=2000)
+        product_ids = rng.integers(0, 60, size=2000) * 7
+        pairs = sorted(set(zip(order_ids.tolist(), product_ids.tolist())))
+        order_ids = np.array([order for order, _ in pairs])
+        product_ids = np.array([product for _, product in pairs])
+
+        left, right, counts = co_purchase_counts(order_ids, product_ids)
+
+        baskets = {}
+        for order, product in pairs:
+            baskets.setdefault(order, []).append(product)
+        expected = Counter(pair for basket in baskets.values() for pair in permutations(basket, 2))
+        assert dict(zip(zip(left.tolist(), right.tolist()), counts.tolist())) == expected
+
+    def test_large_orders_skipped(self):
+        order_ids = np.array([1, 1, 2, 2, 2])
+        product_ids = np.array([10, 20, 10, 20, 30])
+
+        left, right, counts = co_purchase_counts(order_ids, product_ids, max_order_size=2)
+
+        assert list(zip(left.tolist(), right.tolist(), counts.tolist())) == [(10, 20, 1), (20, 10, 1)]
+
+    def test_top_k(self):
+        left = np.array([1, 1, 1, 2])
+        right = np.array([2, 3, 4, 1])
+        counts = np.array([1, 5, 5, 1])
+
+        left, right, counts, ranks = top_k_neighbours(left, right, counts, top_k=2)
+
+        assert list(zip(left.tolist(), right.tolist(), ranks.tolist())) == [(1, 3, 1), (1, 4, 2), (2, 1, 1)]
+
+
+@pytest.mark.django_db
+class TestRecommendationsApi:
+    """Тесты рекомендаций по заказам"""
+
+    def test_build_and_serve(self, buyer, api_client, django_assert_num_queries):
+        food, bowl, toy = ProductFactory(), ProductFactory(), ProductFactory()
+        checkout(buyer, {food.pk: {'quantity': 1}, bowl.pk: {'quantity': 1}}, DELIVERY)
+        checkout(buyer, {food.pk: {'quantity': 1}, bowl.pk: {'quantity': 1}, toy.pk: {'quantity': 1}}, DELIVERY)
+
+        assert build_recommendations() == 6
+        assert ProductRecommendation.objects.get(product=food, rank=1).recommended == bowl
+
+        with django_assert_num_queries(1):
+            response = api_client.get(f'/api/marketplace/products/{food.pk}/recommendations/')
+        assert [item['id'] for item in response.data] == [bowl.pk, toy.pk]
@@ -0,0 +1,73 @@
+import pytest
+from decimal import Decimal
+from rest_framework import status
+from marketplace.models import ProductTag
+from .factories import BrandFactory, ProductCategoryFactory, ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+SEARCH_URL = '/api/marketplace/products/'
+
+
+@pytest.fixture
+def catalog():
+    dogs = ProductCategoryFactory(name='Собаки')
+    food = ProductCategoryFactory(name='Корм', parent=dogs)
+    toys = ProductCategoryFactory(name='Игрушки')
+    royal = BrandFactory(name='Royal')
+    acana = BrandFactory(name='Acana')
+    grain_free = ProductTag.objects.create(name='Беззерновой', slug='grain-free')
+
+    products = {
+        'royal_food': ProductFactory(name='Корм Royal для щенков', category=food, brand=royal, price=Decimal('450')),
+        'acana_food': ProductFactory(name='Корм Acana', category=food, brand=acana, price=Decimal('2500')),
+        'ball': ProductFactory(name='Мяч', category=toys, brand=royal, price=Decimal('300'), is_featured=True),
+        'draft': ProductFactory(name='Корм черновик', category=food, status='draft'),
+    }
+    products['acana_food'].tags.add(grain_free)
+    return {'dogs': dogs, 'royal': royal, 'acana': acana, **products}
+
+
+class TestProductSearchAPI:
+    """Тесты поиска товаров"""
+
+    def test_text_search(self, api_client, catalog):
+        response = api_client.get(SEARCH_URL, {'q': 'Корм'})
+
+        assert response.status_code == status.HTTP_200_OK
+        names = {item['name'] for item in response.data['results']}
+        assert names == {'Корм Royal для щенков', 'Корм Acana'}
+
+    def test_category_filter_includes_subcategories(self, api_client, catalog):
+        response = api_client.get(SEARCH_URL, {'category': catalog['dogs'].slug})
+
+        assert response.data['count'] == 2
+
+    def test_brand_facet_ignores_own_filter(self, api_client, catalog):
+        response = api_client.get(SEARCH_URL, {'brand': str(catalog['acana'].id)})
+
+        assert response.data['count'] == 1
+        brand_counts = {row['name']: row['count'] for row in response.data['facets']['brands']}
+        assert brand_counts == {'Royal': 2, 'Acana': 1}
+
+    def test_price_buckets(self, api_client, catalog):
+        response = api_client.get(SEARCH_URL, {'brand': str(catalog['royal'].id)})
+
+        buckets = {row['min']: row['count'] for row in response.data['facets']['price']}
+        assert buckets[0] == 2
+        assert buckets[1000] == 0
+        assert response.data['facets']['featured'] == 1
+
+    def test_tags_and_price_filters(self, api_client, catalog):
+        response = api_client.get(SEARCH_URL, {'tags': 'grain-free', 'price_min': '1000'})
+
+        assert [item['name'] for item in response.data['results']] == ['Корм Acana']
+
+    def test_facets_use_fixed_number_of_queries(self, api_client, catalog, django_assert_max_num_queries):
+        with django_assert_max_num_queries(7):
+            api_client.get(SEARCH_URL, {'q': 'Корм', 'brand': str(catalog['royal'].id)})
+
+    def test_invalid_params(self, api_client, catalog):
+        response = api_client.get(SEARCH_URL, {'price_min': 'abc'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,82 @@
+import pytest
+from django.core.management import call_command
+from marketplace.models import Product
+from marketplace.services import reserve_stock, restock_product
+from marketplace.stock_monitor import STOCK_CHECK_LOCK_KEY, check_stock_levels
+from notifications.models import Notification
+from .factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def status_of(product):
+    return Product.objects.get(pk=product.pk).status
+
+
+class TestStockMonitor:
+    """Тесты контроля низких остатков"""
+
+    def test_status_flips_both_ways(self):
+        empty = ProductFactory(stock_quantity=3, reserved_quantity=3)
+        restocked = ProductFactory(stock_quantity=5, status='out_of_stock')
+        draft = ProductFactory(stock_quantity=0, status='draft')
+
+        flipped, _ = check_stock_levels()
+
+        assert flipped == 2
+        assert (status_of(empty), status_of(restocked), status_of(draft)) == ('out_of_stock', 'active', 'draft')
+
+    def test_one_alert_per_seller(self):
+        first = ProductFactory(stock_quantity=2, min_stock_level=5)
+        second = ProductFactory(stock_quantity=1, min_stock_level=5, seller=first.seller)
+        ProductFactory(stock_quantity=50, min_stock_level=5, seller=first.seller)
+        other = ProductFactory(stock_quantity=0, min_stock_level=1)
+
+        _, alerts = check_stock_levels()
+
+        assert alerts == 2
+        notification = Notification.objects.get(user=first.seller, notification_type='low_stock')
+        assert sorted(notification.extra_data['product_ids']) == sorted([first.pk, second.pk])
+        assert Notification.objects.filter(user=other.seller).count() == 1
+
+    def test_alert_not_repeated_until_restocked(self):
+        product = ProductFactory(stock_quantity=2, min_stock_level=5)
+        check_stock_levels()
+
+        assert check_stock_levels([product.pk]) == (0, 0)
+
+        Product.objects.filter(pk=product.pk).update(stock_quantity=10)
+        check_stock_levels([product.pk])
+        Product.objects.filter(pk=product.pk).update(stock_quantity=3)
+        assert check_stock_levels([product.pk]) == (0, 1)
+
+    def test_triggered_by_stock_changes(self, django_capture_on_commit_callbacks):
+        product = ProductFactory(stock_quantity=2, min_stock_level=1)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            reserve_stock(product.pk, 2)
+        assert status_of(product) == 'out_of_stock'
+
+        with django_capture_on_commit_callbacks(execute=True):
+            restock_product(product.pk, 5)
+        assert status_of(product) == 'active'
+
+    def test_changes_inside_interval_checked_later(self, locmem_cache, django_capture_on_commit_callbacks):
+        product = ProductFactory(stock_quantity=6, min_stock_level=2)
+
+        # Первая проверка сразу, следующие внутри интервала — отложенные (в тестах задачи выполняются синхронно)
+        for quantity in (1, 1, 4):
+            with django_capture_on_commit_callbacks(execute=True):
+                reserve_stock(product.pk, quantity)
+
+        product.refresh_from_db()
+        assert product.status == 'out_of_stock'
+        assert product.low_stock_alerted_at is not None
+        assert locmem_cache.get(STOCK_CHECK_LOCK_KEY.format(product.pk))
+
+    def test_command(self):
+        product = ProductFactory(stock_quantity=0)
+
+        call_command('check_low_stock')
+
+        assert status_of(product) == 'out_of_stock'
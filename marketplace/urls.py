@@ -0,0 +1,25 @@
+from django.urls import path
+from . import views
+
+app_name = 'marketplace'
+
+urlpatterns = [
+    path('products/', views.product_search, name='product_search'),          # GET /api/marketplace/products/
+    path('autocomplete/', views.product_autocomplete, name='product_autocomplete'),  # GET /api/marketplace/autocomplete/?q=кор
+    path('products/<int:product_id>/', views.product_detail, name='product_detail'),  # GET /api/marketplace/products/1/
+    path('products/<slug:slug>/', views.product_detail_by_slug, name='product_detail_by_slug'),  # GET /api/marketplace/products/korm-dlya-koshek/
+    path('products/<int:product_id>/recommendations/', views.product_recommendations, name='product_recommendations'),
+    path('products/<int:product_id>/price-history/', views.product_price_history, name='product_price_history'),
+    path('categories/', views.categories_tree, name='categories_tree'),      # GET /api/marketplace/categories/
+    path('cart/', views.cart_detail, name='cart_detail'),                      # GET /api/marketplace/cart/
+    path('cart/summary/', views.cart_summary, name='cart_summary'),            # GET /api/marketplace/cart/summary/
+    path('cart/items/', views.cart_items, name='cart_items'),                  # POST /api/marketplace/cart/items/
+    path('cart/items/<int:product_id>/', views.cart_item_detail, name='cart_item_detail'),  # PATCH/DELETE
+    path('cart/save/', views.cart_save, name='cart_save'),                     # POST /api/marketplace/cart/save/
+    path('checkout/', views.checkout_view, name='checkout'),                   # POST /api/marketplace/checkout/
+    path('orders/', views.orders_list, name='orders_list'),                    # GET /api/marketplace/orders/
+    path('orders/<str:order_number>/', views.order_detail, name='order_detail'),  # GET /api/marketplace/orders/ORD-00000001/
+    path('seller/dashboard/', views.seller_dashboard, name='seller_dashboard'),  # GET /api/marketplace/seller/dashboard/
+    path('seller/export/products/', views.seller_export, {'kind': 'products'}, name='seller_export_products'),
+    path('seller/export/orders/', views.seller_export, {'kind': 'orders'}, name='seller_export_orders'),
+]
@@ -1,3 +1,269 @@
-from django.shortcuts import render
+from datetime import timedelta
 
-# Create your views here.
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from core.autocomplete import autocomplete
+from core.exceptions import NotFoundError, ServiceError
+from .analytics import get_seller_dashboard
+from .cart_storage import get_cart_storage
+from .exports import EXPORT_FORMATS, stream_export
+from .price_history import get_price_series
+from .product_views import get_viewer_id, track_product_view
+from .recommendations import get_recommendations
+from .selectors import (
+    get_buyer_orders, get_category_tree, get_product_detail, product_slugs, search_products
+)
+from .serializers import (
+    AutocompleteItemSerializer, AutocompleteParamsSerializer, CartItemCreateSerializer, CartItemSerializer,
+    CartItemUpdateSerializer, CartSerializer, CartSummarySerializer, CheckoutSerializer, ExportParamsSerializer,
+    OrderSerializer, PriceHistoryParamsSerializer, PricePointSerializer, ProductDetailSerializer,
+    ProductListSerializer, ProductSearchSerializer, SellerDashboardParamsSerializer
+)
+from .services import checkout
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def product_search(request):
+    """
+    Поиск товаров с фильтрами и счетчиками фасетов
+    (бренды, категории, теги, ценовые диапазоны)
+    """
+    params = ProductSearchSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    products, facets = search_products(params.validated_data)
+
+    paginator = PageNumberPagination()
+    page = paginator.paginate_queryset(products, request)
+    response = paginator.get_paginated_response(ProductListSerializer(page, many=True).data)
+    response.data['facets'] = facets
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def product_autocomplete(request):
+    """Подсказки при вводе: товары или бренды по началу слова, популярные первыми"""
+    params = AutocompleteParamsSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = params.validated_data
+    suggestions = autocomplete(data['type'], data['q'], data['limit'])
+    return Response(AutocompleteItemSerializer(suggestions, many=True).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def product_detail(request, product_id):
+    """Карточка товара; просмотр учитывается в скетче уникальных зрителей"""
+    return _product_detail_response(request, product_id)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def product_detail_by_slug(request, slug):
+    """Карточка товара по slug; slug разрешается в id через кеш"""
+    product_id = product_slugs.resolve(slug)
+    if product_id is None:
+        return Response({'error': 'Товар не найден'}, status=status.HTTP_404_NOT_FOUND)
+    return _product_detail_response(request, product_id)
+
+
+def _product_detail_response(request, product_id):
+    product = get_product_detail(product_id)
+    if product is None:
+        return Response({'error': 'Товар не найден'}, status=status.HTTP_404_NOT_FOUND)
+    track_product_view(product.pk, get_viewer_id(request))
+    return Response(ProductDetailSerializer(product).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def product_recommendations(request, product_id):
+    """С этим товаром покупают"""
+    products = get_recommendations(product_id)
+    return Response(ProductListSerializer(products, many=True).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def product_price_history(request, product_id):
+    """График цены товара (по умолчанию за 90 дней)"""
+    params = PriceHistoryParamsSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    end = params.validated_data.get('end') or timezone.now()
+    start = params.validated_data.get('start') or end - timedelta(days=90)
+    series = get_price_series(product_id, start, end, params.validated_data['points'])
+    return Response(PricePointSerializer(series, many=True).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def categories_tree(request):
+    """Дерево активных категорий для навигации"""
+    return Response(get_category_tree())
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def cart_detail(request):
+    """Корзина текущего пользователя с товарами и итогами"""
+    contents = get_cart_storage(request).get_contents()
+    return Response(CartSerializer(contents).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def cart_summary(request):
+    """Итоги корзины для бейджа в шапке"""
+    return Response(CartSummarySerializer(get_cart_storage(request).get_summary()).data)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+def cart_items(request):
+    """Добавить товар в корзину"""
+    serializer = CartItemCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        item = get_cart_storage(request).add(**serializer.validated_data)
+    except NotFoundError as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+    except ServiceError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(CartItemSerializer(item).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['PATCH', 'DELETE'])
+@permission_classes([permissions.AllowAny])
+def cart_item_detail(request, product_id):
+    """
+    PATCH: Изменить количество товара (0 — удалить)
+    DELETE: Удалить товар из корзины
+    """
+    storage = get_cart_storage(request)
+    try:
+        if request.method == 'DELETE':
+            storage.remove(product_id)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = CartItemUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        item = storage.update(product_id, serializer.validated_data['quantity'])
+    except NotFoundError as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+    except ServiceError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if item is None:
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(CartItemSerializer(item).data)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def cart_save(request):
+    """Сохранить корзину в БД (чтобы не потерять при истечении кеша)"""
+    storage = get_cart_storage(request)
+    storage.persist()
+    return Response(CartSerializer(storage.get_contents()).data)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def checkout_view(request):
+    """
+    Оформить заказ из корзины.
+    Ключ идемпотентности передается в заголовке Idempotency-Key или в теле запроса.
+    """
+    serializer = CheckoutSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    delivery = dict(serializer.validated_data)
+    idempotency_key = delivery.pop('idempotency_key', None)
+    idempotency_key = request.headers.get('Idempotency-Key') or idempotency_key
+
+    storage = get_cart_storage(request)
+    try:
+        order, created = checkout(request.user, storage.get_lines(), delivery, idempotency_key)
+    except NotFoundError as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+    except ServiceError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if created:
+        storage.clear()
+    order = get_buyer_orders(request.user).get(pk=order.pk)
+    return Response(
+        OrderSerializer(order).data,
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    )
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def orders_list(request):
+    """Заказы текущего пользователя"""
+    orders = get_buyer_orders(request.user)
+    paginator = PageNumberPagination()
+    page = paginator.paginate_queryset(orders, request)
+    return paginator.get_paginated_response(OrderSerializer(page, many=True).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def order_detail(request, order_number):
+    """Заказ текущего пользователя по номеру"""
+    order = get_buyer_orders(request.user).filter(order_number=order_number).first()
+    if order is None:
+        return Response({'error': 'Заказ не найден'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(OrderSerializer(order).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def seller_dashboard(request):
+    """Выручка и продажи текущего продавца по периодам и товарам"""
+    params = SellerDashboardParamsSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    end = params.validated_data.get('end') or timezone.localdate()
+    start = params.validated_data.get('start') or end - timedelta(days=30)
+    return Response(get_seller_dashboard(
+        request.user, params.validated_data['period'], start, end, params.validated_data['top']
+    ))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def seller_export(request, kind):
+    """
+    Потоковая выгрузка товаров или заказов продавца (сотрудники выгружают всех продавцов).
+    Заголовок X-Export-Watermark — значение since для следующей инкрементальной выгрузки.
+    """
+    params = ExportParamsSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    file_format = params.validated_data['file_format']
+    seller = None if request.user.is_staff else request.user
+    watermark, content = stream_export(kind, file_format, seller, params.validated_data.get('since'))
+
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{kind}-{watermark:%Y%m%d%H%M%S}.{file_format}"'
+    response['X-Export-Watermark'] = watermark.isoformat()
+    return response
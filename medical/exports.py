@@ -0,0 +1,221 @@
+"""
+Выгрузка медицинской истории питомца в PDF.
+
+PDF формируется фоновой задачей: визиты читаются серверным курсором
+пачками (iterator с prefetch прививок и процедур на пачку) и сразу
+рисуются на холсте, файл пишется во временный файл и сохраняется в
+контентно-адресуемое хранилище. Перед постановкой задачи считается
+отпечаток данных (количество и время последнего изменения записей):
+если история не менялась, клиент получает уже готовую выгрузку.
+Выгрузка, которая дольше EXPORT_STALE_AFTER ждет или формируется
+(воркер упал, задача потерялась), ставится в очередь заново.
+
+Celery не входит в requirements.txt: без него задача рендера идет в
+фоновом потоке веб-процесса (core.tasks.LocalTask). Запрос не ждет PDF,
+но рендер занимает процесс, а при его перезапуске задача теряется и
+выгрузку перезапускает только проверка EXPORT_STALE_AFTER.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+from .models import MedicalExport, MedicalRecord, MedicalVisit, Treatment, Vaccination
+
+logger = logging.getLogger(__name__)
+
+# Меняется вместе с оформлением PDF, чтобы старые файлы не переиспользовались
+EXPORT_LAYOUT_VERSION = 1
+EXPORT_CHUNK_SIZE = 200
+EXPORT_STALE_AFTER = timedelta(minutes=15)
+SPOOL_MAX_SIZE = 5 * 1024 * 1024
+FONT_NAME = 'MedicalExportSans'
+FALLBACK_FONT = 'Helvetica'
+MARGIN = 50
+
+
+def data_fingerprint(pet):
+    """Отпечаток медицинских данных питомца: четыре агрегирующих запроса"""
+    visits = MedicalVisit.objects.filter(medical_record__pet=pet)
+    parts = [EXPORT_LAYOUT_VERSION, pet.pk, pet.updated_at.isoformat()]
+    for queryset in (
+        # Заметки медкарты попадают в PDF
+        MedicalRecord.objects.filter(pet=pet),
+        visits,
+        Vaccination.objects.filter(visit__medical_record__pet=pet),
+        Treatment.objects.filter(visit__medical_record__pet=pet),
+    ):
+        stats = queryset.aggregate(count=Count('pk'), last=Max('updated_at'))
+        parts.extend([stats['count'], stats['last'] and stats['last'].isoformat()])
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def request_export(pet, user):
+    """
+    Готовая или формирующаяся выгрузка с теми же данными, иначе новая задача.
+    Возвращает (export, created).
+    """
+    fingerprint = data_fingerprint(pet)
+    existing = (
+        MedicalExport.objects.filter(pet=pet, fingerprint=fingerprint)
+        .exclude(status='failed')
+        .order_by('-created_at')
+        .first()
+    )
+    if existing is not None:
+        if existing.status != 'ready' and existing.updated_at < timezone.now() - EXPORT_STALE_AFTER:
+            _restart(existing)
+        return existing, False
+
+    export = MedicalExport.objects.create(pet=pet, requested_by=user, fingerprint=fingerprint)
+    _enqueue(export.pk)
+    return export, True
+
+
+def _enqueue(export_id):
+    def enqueue():
+        from .tasks import render_medical_export
+        render_medical_export.delay(export_id)
+
+    transaction.on_commit(enqueue)
+
+
+def _restart(export):
+    """Зависшая выгрузка снова становится pending и ставится в очередь"""
+    now = timezone.now()
+    # Условие на status и updated_at: выгрузку перезапускает только один из параллельных запросов
+    restarted = MedicalExport.objects.filter(
+        pk=export.pk, status=export.status, updated_at=export.updated_at
+    ).update(status='pending', updated_at=now)
+    if restarted:
+        logger.warning('Medical export %s stuck in %s, re-enqueued', export.pk, export.status)
+        export.status, export.updated_at = 'pending', now
+        _enqueue(export.pk)
+
+
+def _font():
+    path = settings.MEDICAL_EXPORT_FONT
+    if FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return FONT_NAME
+    if path and os.path.exists(path):
+        pdfmetrics.registerFont(TTFont(FONT_NAME, path))
+        return FONT_NAME
+    return FALLBACK_FONT
+
+
+class _PdfWriter:
+    """Построчная запись текста на страницы A4 с переносом"""
+
+    def __init__(self, output):
+        # invariant: без даты создания, одинаковые данные дают одинаковый файл
+        self.canvas = Canvas(output, pagesize=A4, invariant=1)
+        self.font = _font()
+        self.width, self.height = A4
+        self.y = self.height - MARGIN
+
+    def text(self, value, size=10, indent=0):
+        for line in simpleSplit(str(value), self.font, size, self.width - 2 * MARGIN - indent) or ['']:
+            if self.y < MARGIN:
+                self.canvas.showPage()
+                self.y = self.height - MARGIN
+            self.canvas.setFont(self.font, size)
+            self.canvas.drawString(MARGIN + indent, self.y, line)
+            self.y -= size * 1.4
+
+    def field(self, label, value, indent=0):
+        if value not in (None, ''):
+            self.text(f'{label}: {value}', indent=indent)
+
+    def gap(self, size=8):
+        self.y -= size
+
+    def save(self):
+        self.canvas.save()
+
+
+def _visits(pet):
+    return (
+        MedicalVisit.objects.filter(medical_record__pet=pet)
+        .select_related('clinic', 'veterinarian__profile')
+        .prefetch_related(
+            Prefetch('vaccinations', queryset=Vaccination.objects.select_related('vaccine_type')),
+            Prefetch('treatments', queryset=Treatment.objects.select_related('procedure_type')),
+        )
+        .order_by('visit_date', 'pk')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def write_medical_pdf(pet, output):
+    """Рисует медицинскую историю питомца в output (файловый объект)"""
+    pdf = _PdfWriter(output)
+    pdf.text(f'Медицинская карта: {pet.name}', size=16)
+    pdf.gap()
+    pdf.field('Порода', f'{pet.breed.name} ({pet.breed.get_species_display()})')
+    pdf.field('Дата рождения', f'{pet.birthday:%d.%m.%Y}')
+    pdf.field('Пол', pet.get_gender_display())
+    pdf.field('Вес, кг', pet.weight)
+    pdf.field('Номер чипа', pet.chip_number)
+    pdf.field('Номер паспорта', pet.passport_number)
+    pdf.field('Особые потребности', pet.special_needs)
+    notes = MedicalRecord.objects.filter(pet=pet).values_list('notes', flat=True).first()
+    pdf.field('Заметки', notes)
+
+    for visit in _visits(pet):
+        pdf.gap(12)
+        visit_date = timezone.localtime(visit.visit_date)
+        pdf.text(f'{visit_date:%d.%m.%Y %H:%M} — {visit.clinic.name}', size=12)
+        pdf.field('Врач', visit.veterinarian.profile.full_name)
+        pdf.field('Жалобы', visit.complaint)
+        pdf.field('Осмотр', visit.examination)
+        pdf.field('Диагноз', visit.diagnosis)
+        pdf.field('План лечения', visit.treatment_plan)
+        pdf.field('Рекомендации', visit.recommendations)
+        pdf.field('Вес, кг', visit.weight)
+        for vaccination in visit.vaccinations.all():
+            next_date = vaccination.next_vaccination_date
+            pdf.text(
+                f'Прививка: {vaccination.vaccine_type.name} ({vaccination.vaccine_name}, '
+                f'партия {vaccination.batch_number})'
+                + (f', следующая {next_date:%d.%m.%Y}' if next_date else ''),
+                indent=15,
+            )
+        for treatment in visit.treatments.all():
+            pdf.text(f'Процедура: {treatment.procedure_type.name}. {treatment.description}', indent=15)
+            pdf.field('Препараты', treatment.medications, indent=30)
+    pdf.save()
+
+
+def render_export(export_id):
+    """Формирует PDF выгрузки (задача). Возвращает True, если файл готов"""
+    if not MedicalExport.objects.filter(pk=export_id, status='pending').update(
+        status='processing', updated_at=timezone.now()
+    ):
+        return False
+    export = MedicalExport.objects.select_related('pet__breed').get(pk=export_id)
+
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as output:
+            write_medical_pdf(export.pet, output)
+            export.file.save(f'pet-{export.pet_id}.pdf', File(output, name=f'pet-{export.pet_id}.pdf'), save=False)
+        export.status = 'ready'
+    except Exception as error:
+        logger.exception('Medical export %s failed', export_id)
+        export.status = 'failed'
+        export.error = str(error)
+    export.finished_at = timezone.now()
+    export.save(update_fields=['file', 'status', 'error', 'finished_at', 'updated_at'])
+    return export.status == 'ready'
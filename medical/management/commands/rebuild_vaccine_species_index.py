@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from medical.models import VaccineType
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает индекс применимости вакцин по видам животных'
+
+    def handle(self, *args, **options):
+        vaccine_types = list(VaccineType.objects.all())
+        for vaccine_type in vaccine_types:
+            vaccine_type.sync_species()
+        self.stdout.write(self.style.SUCCESS(f'Обновлено типов вакцин: {len(vaccine_types)}'))
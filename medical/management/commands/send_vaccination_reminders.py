@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from medical.reminders import REMINDER_DAYS_AHEAD, send_vaccination_reminders
+
+
+class Command(BaseCommand):
+    help = 'Отправляет владельцам напоминания о предстоящих прививках питомцев'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=REMINDER_DAYS_AHEAD,
+            help='За сколько дней до срока напоминать'
+        )
+
+    def handle(self, *args, **options):
+        sent = send_vaccination_reminders(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Отправлено напоминаний: {sent}'))
@@ -1,7 +1,11 @@
+import calendar
+
 from django.db import models
+from accounts.models import User
 from pets.models import Pet
 from clinics.models import Veterinarian, Clinic, Service
 from core.mixins import TimeStampedMixin
+from core.storage import content_storage
 
 
 class MedicalRecord(TimeStampedMixin):
@@ -128,6 +132,19 @@ class VaccineType(TimeStampedMixin):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.sync_species()
+
+    def sync_species(self):
+        """Приводит индекс VaccineTypeSpecies в соответствие со списком applicable_species"""
+        species = set(self.applicable_species or [])
+        self.species_links.exclude(species__in=species).delete()
+        VaccineTypeSpecies.objects.bulk_create(
+            [VaccineTypeSpecies(vaccine_type=self, species=value) for value in species],
+            ignore_conflicts=True,
+        )
+
     def is_applicable_for_pet(self, pet):
         """Проверяет подходит ли вакцина для данного питомца"""
         if 'all' in self.applicable_species:
@@ -135,6 +152,34 @@ class VaccineType(TimeStampedMixin):
         return pet.breed.species in self.applicable_species
 
 
+class VaccineTypeSpecies(models.Model):
+    """
+    Индекс применимости вакцин по видам животных (строка на вид из
+    VaccineType.applicable_species, 'all' — для всех видов).
+    Заполняется при сохранении типа вакцины.
+    """
+    vaccine_type = models.ForeignKey(
+        VaccineType, on_delete=models.CASCADE, related_name='species_links', verbose_name='Тип вакцины')
+    species = models.CharField(max_length=20, verbose_name='Вид животного')
+
+    class Meta:
+        verbose_name = 'Применимость вакцины'
+        verbose_name_plural = 'Применимость вакцин'
+        constraints = [
+            models.UniqueConstraint(fields=['species', 'vaccine_type'], name='unique_vaccine_type_species'),
+        ]
+
+    def __str__(self):
+        return f"{self.vaccine_type_id}: {self.species}"
+
+
+def add_months(day, months):
+    """Дата через months месяцев (31 января + 1 месяц = 28/29 февраля)"""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
 class Vaccination(TimeStampedMixin):
     """Вакцинация"""
     visit = models.ForeignKey(
@@ -148,15 +193,26 @@ class Vaccination(TimeStampedMixin):
         null=True, blank=True, verbose_name='Дата следующей вакцинации')
     side_effects = models.TextField(
         blank=True, verbose_name='Побочные эффекты')
+    reminder_sent_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Напоминание о следующей вакцинации отправлено')
 
     class Meta:
         verbose_name = 'Вакцинация'
         verbose_name_plural = 'Вакцинации'
         ordering = ['-vaccination_date']
+        indexes = [
+            models.Index(fields=['next_vaccination_date'], name='vaccination_next_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.vaccine_type.name} - {self.vaccination_date}"
 
+    def save(self, *args, **kwargs):
+        # Периодичность 0 — однократная вакцина
+        if self.next_vaccination_date is None and self.vaccination_date and self.vaccine_type.frequency_months:
+            self.next_vaccination_date = add_months(self.vaccination_date, self.vaccine_type.frequency_months)
+        super().save(*args, **kwargs)
+
 
 class Treatment(TimeStampedMixin):
     """Лечебная процедура"""
@@ -203,4 +259,39 @@ class ProcedureType(TimeStampedMixin):
         ordering = ['category', 'name']
 
     def __str__(self):
-        return f"{self.get_category_display()} - {self.name}"
\ No newline at end of file
+        return f"{self.get_category_display()} - {self.name}"
+
+
+class MedicalExport(TimeStampedMixin):
+    """
+    PDF с медицинской историей питомца, формируется в фоне (medical.exports).
+    fingerprint описывает состояние данных: пока история не менялась,
+    повторный запрос отдает уже готовый файл.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('processing', 'Формируется'),
+        ('ready', 'Готов'),
+        ('failed', 'Ошибка'),
+    ]
+
+    pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='medical_exports', verbose_name='Питомец')
+    requested_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='medical_exports', verbose_name='Запросил')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Статус')
+    fingerprint = models.CharField(max_length=64, verbose_name='Отпечаток данных')
+    file = models.FileField(
+        upload_to='medical/exports/', storage=content_storage, blank=True, verbose_name='Файл')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Сформирован')
+
+    class Meta:
+        verbose_name = 'Выгрузка медицинской карты'
+        verbose_name_plural = 'Выгрузки медицинских карт'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['pet', 'fingerprint'], name='medical_export_fingerprint_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.pet_id} - {self.get_status_display()}"
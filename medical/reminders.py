@@ -0,0 +1,99 @@
+"""
+Напоминания о повторной вакцинации.
+
+Ночная задача одним запросом находит последнюю вакцинацию каждого
+питомца по каждому типу вакцины (оконная функция ROW_NUMBER по
+питомцу и типу) и выбирает те, у которых следующая вакцинация
+наступает в ближайшие N дней. Напоминание отмечается в
+Vaccination.reminder_sent_at: новая вакцинация — новая строка, поэтому
+следующее напоминание придет уже по ней.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import FirstValue, RowNumber
+from django.utils import timezone
+
+from notifications.models import Notification
+from .models import Vaccination
+
+REMINDER_DAYS_AHEAD = 14
+# Давно просроченные прививки не напоминаются (например, после первого запуска)
+OVERDUE_GRACE_DAYS = 30
+
+
+def _latest(expression):
+    return Window(
+        expression,
+        partition_by=[F('visit__medical_record__pet_id'), F('vaccine_type_id')],
+        order_by=[F('vaccination_date').desc(), F('pk').desc()],
+    )
+
+
+def due_vaccinations(days_ahead=REMINDER_DAYS_AHEAD, today=None):
+    """
+    Последние вакцинации (по питомцу и типу вакцины), срок повторения которых
+    наступает до today + days_ahead и о которых еще не напоминали.
+    """
+    today = today or timezone.localdate()
+    # Все условия ссылаются на оконные выражения: иначе Django применит их
+    # до вычисления окна, и "последней" окажется более старая вакцинация
+    return (
+        Vaccination.objects.annotate(
+            position=_latest(RowNumber()),
+            latest_due=_latest(FirstValue('next_vaccination_date')),
+            latest_reminder=_latest(FirstValue('reminder_sent_at')),
+        )
+        .filter(
+            position=1,
+            latest_due__gte=today - timedelta(days=OVERDUE_GRACE_DAYS),
+            latest_due__lte=today + timedelta(days=days_ahead),
+            latest_reminder__isnull=True,
+        )
+        .values(
+            'pk', 'next_vaccination_date', 'vaccine_type_id', 'vaccine_type__name',
+            pet_id=F('visit__medical_record__pet_id'),
+            pet_name=F('visit__medical_record__pet__name'),
+            owner_id=F('visit__medical_record__pet__owner_id'),
+        )
+    )
+
+
+def send_vaccination_reminders(days_ahead=REMINDER_DAYS_AHEAD, today=None):
+    """Создает уведомления владельцам о предстоящих прививках. Возвращает количество"""
+    now = timezone.now()
+    with transaction.atomic():
+        due = list(due_vaccinations(days_ahead, today))
+        if not due:
+            return 0
+
+        # Строки блокируются перед отметкой, чтобы параллельный запуск не продублировал уведомления
+        locked = set(
+            Vaccination.objects.select_for_update(skip_locked=True)
+            .filter(pk__in=[row['pk'] for row in due], reminder_sent_at__isnull=True)
+            .values_list('pk', flat=True)
+        )
+        due = [row for row in due if row['pk'] in locked]
+
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=row['owner_id'],
+                title='Пора делать прививку',
+                message=(
+                    f"{row['pet_name']}: вакцинация «{row['vaccine_type__name']}» "
+                    f"до {row['next_vaccination_date']:%d.%m.%Y}"
+                ),
+                notification_type='vaccination_due',
+                extra_data={
+                    'pet_id': row['pet_id'],
+                    'vaccine_type_id': row['vaccine_type_id'],
+                    'vaccination_id': row['pk'],
+                    'due_date': row['next_vaccination_date'].isoformat(),
+                },
+            )
+            for row in due
+        ], batch_size=1000)
+        Vaccination.objects.filter(pk__in=locked).update(reminder_sent_at=now)
+    return len(due)
@@ -0,0 +1,51 @@
+"""
+Выборки медицинских данных.
+"""
+
+from django.db.models import Q
+
+from clinics.models import Clinic
+from pets.models import Pet
+from .models import VaccineTypeSpecies
+
+ALL_SPECIES = 'all'
+
+
+def get_accessible_pets(user):
+    """
+    Питомцы, медицинские данные которых доступны пользователю:
+    свои, а для ветеринаров и администраторов клиник — пациенты их клиник.
+    """
+    if user.is_staff:
+        return Pet.objects.all()
+    clinics = Clinic.objects.filter(Q(admin=user) | Q(veterinarian__user=user))
+    return Pet.objects.filter(
+        Q(owner=user) | Q(pk__in=Pet.objects.filter(appointments__clinic__in=clinics).values('pk'))
+    )
+
+
+def get_applicable_vaccines(pets):
+    """
+    Применимые вакцины для набора питомцев: {pet_id: [VaccineType, ...]}.
+    Два запроса на любой размер набора: виды питомцев и строки
+    индекса VaccineTypeSpecies для этих видов.
+    """
+    species_by_pet = dict(pets.values_list('pk', 'breed__species'))
+    if not species_by_pet:
+        return {}
+
+    by_species = {}
+    links = (
+        VaccineTypeSpecies.objects.filter(species__in={*species_by_pet.values(), ALL_SPECIES})
+        .select_related('vaccine_type')
+        .order_by('vaccine_type__name')
+    )
+    for link in links:
+        by_species.setdefault(link.species, []).append(link.vaccine_type)
+
+    common = by_species.get(ALL_SPECIES, [])
+    result = {}
+    for pet_id, species in species_by_pet.items():
+        vaccines = {vaccine.pk: vaccine for vaccine in (*common, *by_species.get(species, []))}
+        result[pet_id] = sorted(vaccines.values(), key=lambda vaccine: vaccine.name)
+    return result
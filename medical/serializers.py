@@ -0,0 +1,57 @@
+from django.urls import reverse
+from rest_framework import serializers
+from .models import MedicalExport, VaccineType
+
+MAX_BATCH_PETS = 500
+
+
+class VaccineTypeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VaccineType
+        fields = ['id', 'name', 'description', 'frequency_months']
+
+
+class PetIdsParamsSerializer(serializers.Serializer):
+    """Список питомцев через запятую: ?pet_ids=1,2,3"""
+    pet_ids = serializers.CharField()
+
+    def validate_pet_ids(self, value):
+        try:
+            pet_ids = {int(pet_id) for pet_id in value.split(',') if pet_id.strip()}
+        except ValueError:
+            raise serializers.ValidationError('Ожидается список id через запятую')
+        if not pet_ids:
+            raise serializers.ValidationError('Список питомцев пуст')
+        if len(pet_ids) > MAX_BATCH_PETS:
+            raise serializers.ValidationError(f'Не больше {MAX_BATCH_PETS} питомцев за запрос')
+        return pet_ids
+
+
+class WeightHistoryParamsSerializer(serializers.Serializer):
+    """Параметры графика веса"""
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    points = serializers.IntegerField(required=False, min_value=3, max_value=1000, default=200)
+
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError('start должен быть раньше end')
+        return attrs
+
+
+class WeightPointSerializer(serializers.Serializer):
+    date = serializers.DateTimeField()
+    weight = serializers.DecimalField(max_digits=6, decimal_places=2)
+
+
+class MedicalExportSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MedicalExport
+        fields = ['id', 'pet', 'status', 'error', 'created_at', 'finished_at', 'download_url']
+
+    def get_download_url(self, obj):
+        if obj.status != 'ready':
+            return None
+        return reverse('medical:medical_export_download', args=[obj.pk])
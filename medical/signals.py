@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from clinics.models import Service
+from .models import (
+    Appointment, MedicalRecord, MedicalVisit, ProcedureType, Treatment, Vaccination, VaccineType,
+)
+from .timeline import invalidate_pet_timeline
+from .weights import sync_pet_weight
+
+
+def _visit_pet_id(visit_id):
+    return MedicalVisit.objects.filter(pk=visit_id).values_list('medical_record__pet_id', flat=True).first()
+
+
+def _invalidate_on_commit(pet_ids):
+    # До коммита параллельный запрос прочитал бы старые данные и вернул их в кеш
+    pet_ids = {pet_id for pet_id in pet_ids if pet_id}
+    if pet_ids:
+        transaction.on_commit(lambda: invalidate_pet_timeline(*pet_ids))
+
+
+@receiver([post_save, post_delete], sender=Appointment)
+def appointment_changed(sender, instance, **kwargs):
+    _invalidate_on_commit([instance.pet_id])
+
+
+@receiver([post_save, post_delete], sender=MedicalRecord)
+def medical_record_changed(sender, instance, **kwargs):
+    _invalidate_on_commit([instance.pet_id])
+
+
+@receiver([post_save, post_delete], sender=MedicalVisit)
+def visit_changed(sender, instance, **kwargs):
+    pet_id = MedicalRecord.objects.filter(pk=instance.medical_record_id).values_list('pet_id', flat=True).first()
+    _invalidate_on_commit([pet_id])
+    if pet_id is not None:
+        sync_pet_weight(pet_id)
+
+
+@receiver([post_save, post_delete], sender=Vaccination)
+@receiver([post_save, post_delete], sender=Treatment)
+def visit_entry_changed(sender, instance, **kwargs):
+    _invalidate_on_commit([_visit_pet_id(instance.visit_id)])
+
+
+# Названия типов прививок, процедур и услуг — заголовки событий ленты.
+# Удаление каскадом удаляет события, их сигналы сбрасывают ленту сами.
+# Переименование клиник и врачей ленту не сбрасывает: устаревшие имена
+# держатся не дольше CACHE_TIMEOUTS['long'].
+
+@receiver(post_save, sender=VaccineType)
+def vaccine_type_changed(sender, instance, created, **kwargs):
+    if not created:
+        _invalidate_on_commit(
+            Vaccination.objects.filter(vaccine_type=instance)
+            .values_list('visit__medical_record__pet_id', flat=True).distinct()
+        )
+
+
+@receiver(post_save, sender=ProcedureType)
+def procedure_type_changed(sender, instance, created, **kwargs):
+    if not created:
+        _invalidate_on_commit(
+            Treatment.objects.filter(procedure_type=instance)
+            .values_list('visit__medical_record__pet_id', flat=True).distinct()
+        )
+
+
+@receiver(post_save, sender=Service)
+def service_changed(sender, instance, created, **kwargs):
+    if not created:
+        _invalidate_on_commit(
+            Appointment.objects.filter(service=instance).values_list('pet_id', flat=True).distinct()
+        )
@@ -0,0 +1,15 @@
+from core.tasks import task
+from .exports import render_export
+from .reminders import REMINDER_DAYS_AHEAD, send_vaccination_reminders
+
+
+@task(name='medical.tasks.send_vaccination_reminders')
+def vaccination_reminders(days_ahead=REMINDER_DAYS_AHEAD):
+    """Ночная рассылка напоминаний о прививках"""
+    return send_vaccination_reminders(days_ahead)
+
+
+@task(name='medical.tasks.render_medical_export')
+def render_medical_export(export_id):
+    """Формирование PDF медицинской карты"""
+    return render_export(export_id)
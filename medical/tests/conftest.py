@@ -0,0 +1,22 @@
+import pytest
+
+
+@pytest.fixture
+def api_client():
+    """API клиент для тестов"""
+    from rest_framework.test import APIClient
+    return APIClient()
+
+
+@pytest.fixture
+def owner():
+    """Владелец питомцев"""
+    from accounts.tests.factories import UserFactory
+    return UserFactory()
+
+
+@pytest.fixture
+def owner_client(api_client, owner):
+    """API клиент с авторизованным владельцем"""
+    api_client.force_authenticate(user=owner)
+    return api_client
@@ -0,0 +1,98 @@
+import factory
+from datetime import date
+from decimal import Decimal
+from factory import SubFactory
+from factory.django import DjangoModelFactory
+from django.utils import timezone
+from clinics.tests.factories import ClinicFactory, ServiceFactory, VeterinarianFactory
+from medical.models import (
+    Appointment, MedicalRecord, MedicalVisit, ProcedureType, Treatment, Vaccination, VaccineType
+)
+from pets.tests.factories import PetFactory
+
+
+class MedicalRecordFactory(DjangoModelFactory):
+    """Фабрика для медицинских карт"""
+
+    class Meta:
+        model = MedicalRecord
+        django_get_or_create = ('pet',)
+
+    pet = SubFactory(PetFactory)
+
+
+class MedicalVisitFactory(DjangoModelFactory):
+    """Фабрика для визитов"""
+
+    class Meta:
+        model = MedicalVisit
+
+    medical_record = SubFactory(MedicalRecordFactory)
+    veterinarian = SubFactory(VeterinarianFactory)
+    clinic = SubFactory(ClinicFactory)
+    visit_date = factory.LazyFunction(timezone.now)
+    complaint = 'Плановый осмотр'
+    examination = 'Без особенностей'
+    diagnosis = 'Здоров'
+    treatment_plan = '-'
+
+
+class VaccineTypeFactory(DjangoModelFactory):
+    """Фабрика для типов вакцин"""
+
+    class Meta:
+        model = VaccineType
+
+    name = factory.Sequence(lambda n: f'Вакцина {n}')
+    applicable_species = ['all']
+    frequency_months = 12
+
+
+class VaccinationFactory(DjangoModelFactory):
+    """Фабрика для вакцинаций"""
+
+    class Meta:
+        model = Vaccination
+
+    visit = SubFactory(MedicalVisitFactory)
+    vaccine_type = SubFactory(VaccineTypeFactory)
+    vaccine_name = factory.SelfAttribute('vaccine_type.name')
+    batch_number = factory.Sequence(lambda n: f'B{n:06d}')
+    vaccination_date = date(2025, 1, 1)
+
+
+class ProcedureTypeFactory(DjangoModelFactory):
+    """Фабрика для типов процедур"""
+
+    class Meta:
+        model = ProcedureType
+
+    name = factory.Sequence(lambda n: f'Процедура {n}')
+    category = 'treatment'
+
+
+class TreatmentFactory(DjangoModelFactory):
+    """Фабрика для процедур"""
+
+    class Meta:
+        model = Treatment
+
+    visit = SubFactory(MedicalVisitFactory)
+    procedure_type = SubFactory(ProcedureTypeFactory)
+    description = 'Обработка'
+    cost = Decimal('500.00')
+
+
+class AppointmentFactory(DjangoModelFactory):
+    """Фабрика для записей на прием"""
+
+    class Meta:
+        model = Appointment
+
+    pet = SubFactory(PetFactory)
+    veterinarian = SubFactory(VeterinarianFactory)
+    clinic = SubFactory(ClinicFactory)
+    service = SubFactory(ServiceFactory, clinic=factory.SelfAttribute('..clinic'))
+    scheduled_date = factory.LazyFunction(timezone.now)
+    duration_minutes = factory.SelfAttribute('service.duration_minutes')
+    price = factory.SelfAttribute('service.price')
@@ -0,0 +1,104 @@
+import pytest
+from datetime import date, timedelta
+from django.utils import timezone
+from rest_framework import status
+from core.models import MediaBlob
+from medical.exports import EXPORT_STALE_AFTER, request_export
+from medical.models import MedicalExport
+from pets.tests.factories import PetFactory
+from .factories import MedicalVisitFactory, TreatmentFactory, VaccinationFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def pet(owner):
+    pet = PetFactory(owner=owner, name='Барсик')
+    visit = MedicalVisitFactory(medical_record__pet=pet, diagnosis='Отит')
+    VaccinationFactory(visit=visit, vaccination_date=date(2025, 6, 1))
+    TreatmentFactory(visit=visit)
+    return pet
+
+
+class TestMedicalExport:
+    """Тесты выгрузки медицинской карты в PDF"""
+
+    def test_rendered_in_background(self, pet, owner, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            export, created = request_export(pet, owner)
+
+        export.refresh_from_db()
+        assert created
+        assert export.status == 'ready'
+        assert export.finished_at is not None
+        with export.file.open('rb') as pdf:
+            assert pdf.read(5) == b'%PDF-'
+        assert MediaBlob.objects.get(name=export.file.name).ref_count == 1
+
+    def test_unchanged_history_reuses_export(self, pet, owner, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            first, _ = request_export(pet, owner)
+
+        again, created = request_export(pet, owner)
+        assert (again.pk, created) == (first.pk, False)
+
+        MedicalVisitFactory(medical_record__pet=pet)
+        with django_capture_on_commit_callbacks(execute=True):
+            changed, created = request_export(pet, owner)
+        assert created and changed.pk != first.pk
+
+    def test_notes_change_fingerprint(self, pet, owner, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            first, _ = request_export(pet, owner)
+        record = pet.medical_record
+        record.notes = 'Аллергия на курицу'
+        record.save()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            changed, created = request_export(pet, owner)
+        assert created and changed.pk != first.pk
+
+    def test_stuck_export_reenqueued(self, pet, owner, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False):
+            stuck, _ = request_export(pet, owner)
+        MedicalExport.objects.filter(pk=stuck.pk).update(
+            status='processing', updated_at=timezone.now() - EXPORT_STALE_AFTER - timedelta(minutes=1)
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            again, created = request_export(pet, owner)
+
+        again.refresh_from_db()
+        assert (again.pk, created, again.status) == (stuck.pk, False, 'ready')
+
+    def test_api_poll_and_download(self, pet, owner_client, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = owner_client.post(f'/api/medical/pets/{pet.pk}/exports/')
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        export_id = response.data['id']
+
+        detail = owner_client.get(f'/api/medical/exports/{export_id}/')
+        assert detail.data['status'] == 'ready'
+
+        download = owner_client.get(detail.data['download_url'])
+        assert download.status_code == status.HTTP_200_OK
+        assert download['Content-Type'] == 'application/pdf'
+        assert b''.join(download.streaming_content).startswith(b'%PDF-')
+
+    def test_download_not_ready(self, pet, owner, owner_client):
+        export = MedicalExport.objects.create(pet=pet, requested_by=owner, fingerprint='x')
+
+        response = owner_client.get(f'/api/medical/exports/{export.pk}/download/')
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_foreign_pet(self, owner_client):
+        response = owner_client.post(f'/api/medical/pets/{PetFactory().pk}/exports/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,61 @@
+import pytest
+from datetime import date
+from django.core.management import call_command
+from medical.models import Vaccination, add_months
+from medical.reminders import due_vaccinations, send_vaccination_reminders
+from notifications.models import Notification
+from .factories import MedicalVisitFactory, VaccinationFactory, VaccineTypeFactory
+
+pytestmark = pytest.mark.django_db
+
+TODAY = date(2026, 3, 1)
+
+
+def vaccinate(pet, vaccine_type, vaccination_date, **kwargs):
+    visit = MedicalVisitFactory(medical_record__pet=pet)
+    return VaccinationFactory(visit=visit, vaccine_type=vaccine_type, vaccination_date=vaccination_date, **kwargs)
+
+
+class TestVaccinationReminders:
+    """Тесты напоминаний о прививках"""
+
+    def test_next_date_from_frequency(self):
+        vaccination = VaccinationFactory(vaccination_date=date(2025, 1, 31), vaccine_type__frequency_months=1)
+
+        assert vaccination.next_vaccination_date == date(2025, 2, 28)
+        assert add_months(date(2024, 11, 15), 14) == date(2026, 1, 15)
+
+    def test_only_latest_vaccination_per_type(self):
+        rabies = VaccineTypeFactory(name='Бешенство')
+        complex_type = VaccineTypeFactory(name='Комплексная')
+        old = VaccinationFactory(vaccine_type=rabies, vaccination_date=date(2025, 3, 5))
+        pet = old.visit.medical_record.pet
+        # Ревакцинация уже сделана: старый срок не напоминается
+        vaccinate(pet, rabies, date(2026, 2, 1))
+        due = vaccinate(pet, complex_type, date(2025, 3, 10))
+        vaccinate(pet, VaccineTypeFactory(), date(2025, 6, 1))
+
+        rows = list(due_vaccinations(days_ahead=14, today=TODAY))
+
+        assert [(row['pk'], row['pet_id']) for row in rows] == [(due.pk, pet.pk)]
+
+    def test_notifications_created_once(self, django_assert_max_num_queries):
+        due = VaccinationFactory(vaccination_date=date(2025, 3, 5))
+        VaccinationFactory(vaccination_date=date(2025, 3, 6))
+        # Давно просрочено
+        VaccinationFactory(vaccination_date=date(2024, 12, 1))
+
+        with django_assert_max_num_queries(6):
+            assert send_vaccination_reminders(days_ahead=14, today=TODAY) == 2
+        assert send_vaccination_reminders(days_ahead=14, today=TODAY) == 0
+
+        notification = Notification.objects.get(extra_data__vaccination_id=due.pk)
+        assert notification.user == due.visit.medical_record.pet.owner
+        assert notification.notification_type == 'vaccination_due'
+        assert notification.extra_data['due_date'] == '2026-03-05'
+        assert Vaccination.objects.filter(reminder_sent_at__isnull=False).count() == 2
+
+    def test_command(self, capsys):
+        call_command('send_vaccination_reminders', '--days=7')
+
+        assert 'Отправлено напоминаний: 0' in capsys.readouterr().out
@@ -0,0 +1,113 @@
+import pytest
+from datetime import date, datetime
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from medical.timeline import TIMELINE_CACHE_KEY, build_timeline, get_pet_timeline
+from pets.tests.factories import PetFactory
+from .factories import AppointmentFactory, MedicalVisitFactory, TreatmentFactory, VaccinationFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def moment(year, month, day, hour=12):
+    return timezone.make_aware(datetime(year, month, day, hour))
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    from django.core.cache import cache
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.fixture
+def history(owner):
+    pet = PetFactory(owner=owner)
+    first = MedicalVisitFactory(medical_record__pet=pet, visit_date=moment(2025, 1, 10), diagnosis='Отит')
+    second = MedicalVisitFactory(medical_record__pet=pet, visit_date=moment(2025, 6, 1), diagnosis='Здоров')
+    treatment = TreatmentFactory(visit=first)
+    vaccination = VaccinationFactory(visit=second, vaccination_date=date(2025, 6, 1))
+    upcoming = AppointmentFactory(pet=pet, scheduled_date=moment(2025, 9, 1))
+    # Прием, по которому уже есть визит, в ленту отдельно не попадает
+    done = AppointmentFactory(pet=pet, scheduled_date=moment(2025, 1, 10), status='completed')
+    first.appointment = done
+    first.save()
+    # Чужая история
+    MedicalVisitFactory(visit_date=moment(2025, 3, 1))
+    return {
+        'pet': pet, 'first': first, 'second': second, 'treatment': treatment,
+        'vaccination': vaccination, 'upcoming': upcoming,
+    }
+
+
+class TestPetTimeline:
+    """Тесты медицинской ленты питомца"""
+
+    def test_merged_newest_first(self, history, django_assert_num_queries):
+        with django_assert_num_queries(4):
+            timeline = build_timeline(history['pet'].pk)
+
+        assert [(event['type'], event['id']) for event in timeline] == [
+            ('appointment', history['upcoming'].pk),
+            ('visit', history['second'].pk),
+            ('vaccination', history['vaccination'].pk),
+            ('visit', history['first'].pk),
+            ('treatment', history['treatment'].pk),
+        ]
+        assert timeline[3]['title'] == 'Отит'
+
+    def test_cached_until_medical_write(
+        self, history, locmem_cache, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        pet = history['pet']
+        get_pet_timeline(pet.pk)
+        with django_assert_num_queries(0):
+            get_pet_timeline(pet.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            TreatmentFactory(visit=history['second'])
+
+        assert len(get_pet_timeline(pet.pk)) == 6
+
+        with django_capture_on_commit_callbacks(execute=True):
+            history['upcoming'].delete()
+
+        assert len(get_pet_timeline(pet.pk)) == 5
+
+    def test_invalidated_after_commit(self, history, locmem_cache, django_capture_on_commit_callbacks):
+        pet = history['pet']
+        get_pet_timeline(pet.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                TreatmentFactory(visit=history['second'])
+                # Кеш не сброшен до коммита: иначе его заполнил бы параллельный запрос со старыми данными
+                assert locmem_cache.get(TIMELINE_CACHE_KEY.format(pet.pk)) is not None
+
+        assert len(get_pet_timeline(pet.pk)) == 6
+
+    def test_vaccine_type_rename(self, history, locmem_cache, django_capture_on_commit_callbacks):
+        pet = history['pet']
+        get_pet_timeline(pet.pk)
+        vaccine_type = history['vaccination'].vaccine_type
+
+        with django_capture_on_commit_callbacks(execute=True):
+            vaccine_type.name = 'Бешенство'
+            vaccine_type.save()
+
+        titles = {event['title'] for event in get_pet_timeline(pet.pk) if event['type'] == 'vaccination'}
+        assert titles == {'Бешенство'}
+
+    def test_api(self, owner_client, history):
+        response = owner_client.get(f"/api/medical/pets/{history['pet'].pk}/timeline/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data[1]['details']['treatment_plan'] == '-'
+
+    def test_api_foreign_pet(self, owner_client):
+        response = owner_client.get(f'/api/medical/pets/{PetFactory().pk}/timeline/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,63 @@
+import pytest
+from rest_framework import status
+from medical.models import VaccineTypeSpecies
+from medical.selectors import get_applicable_vaccines
+from pets.models import Pet
+from pets.tests.factories import PetFactory
+from .factories import VaccineTypeFactory
+
+pytestmark = pytest.mark.django_db
+
+APPLICABLE_URL = '/api/medical/vaccines/applicable/'
+
+
+@pytest.fixture
+def vaccines():
+    return {
+        'rabies': VaccineTypeFactory(name='Бешенство', applicable_species=['all']),
+        'feline': VaccineTypeFactory(name='Кошачья', applicable_species=['cat']),
+        'canine': VaccineTypeFactory(name='Собачья', applicable_species=['dog', 'rodent']),
+    }
+
+
+class TestVaccineApplicability:
+    """Тесты индекса применимости вакцин"""
+
+    def test_index_follows_species_list(self, vaccines):
+        canine = vaccines['canine']
+        assert set(canine.species_links.values_list('species', flat=True)) == {'dog', 'rodent'}
+
+        canine.applicable_species = ['dog']
+        canine.save()
+
+        assert list(VaccineTypeSpecies.objects.filter(vaccine_type=canine).values_list('species', flat=True)) == ['dog']
+
+    def test_batch_matches_per_pet_check(self, vaccines, django_assert_num_queries):
+        pets = [PetFactory(breed__species=species) for species in ['cat', 'dog', 'fish']]
+
+        with django_assert_num_queries(2):
+            result = get_applicable_vaccines(Pet.objects.all())
+
+        for pet in pets:
+            expected = sorted(v.name for v in vaccines.values() if v.is_applicable_for_pet(pet))
+            assert [vaccine.name for vaccine in result[pet.pk]] == expected
+
+    def test_api_only_own_pets(self, owner, owner_client, vaccines):
+        cat = PetFactory(owner=owner, breed__species='cat')
+        stranger = PetFactory(breed__species='dog')
+
+        response = owner_client.get(APPLICABLE_URL, {'pet_ids': f'{cat.pk},{stranger.pk}'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == [{
+            'pet_id': cat.pk,
+            'vaccines': [
+                {'id': vaccines['rabies'].pk, 'name': 'Бешенство', 'description': '', 'frequency_months': 12},
+                {'id': vaccines['feline'].pk, 'name': 'Кошачья', 'description': '', 'frequency_months': 12},
+            ],
+        }]
+
+    def test_api_invalid_ids(self, owner_client):
+        response = owner_client.get(APPLICABLE_URL, {'pet_ids': '1,abc'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
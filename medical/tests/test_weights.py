@@ -0,0 +1,78 @@
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework import status
+from medical.weights import get_weight_series
+from pets.tests.factories import PetFactory
+from .factories import MedicalVisitFactory
+
+pytestmark = pytest.mark.django_db
+
+START = timezone.make_aware(datetime(2022, 1, 1))
+
+
+class TestWeightHistory:
+    """Тесты истории веса"""
+
+    def test_pet_weight_follows_latest_visit(self):
+        pet = PetFactory(weight=Decimal('3.00'))
+        MedicalVisitFactory(medical_record__pet=pet, visit_date=START, weight=Decimal('4.10'))
+        latest = MedicalVisitFactory(medical_record__pet=pet, visit_date=START + timedelta(days=30), weight=Decimal('4.50'))
+        MedicalVisitFactory(medical_record__pet=pet, visit_date=START + timedelta(days=60), weight=None)
+        pet.refresh_from_db()
+        assert pet.weight == Decimal('4.50')
+
+        latest.delete()
+        pet.refresh_from_db()
+        assert pet.weight == Decimal('4.10')
+
+    def test_falls_back_to_owner_weight_after_delete(self):
+        pet = PetFactory(weight=Decimal('3.00'), owner_weight=Decimal('3.00'))
+        visit = MedicalVisitFactory(medical_record__pet=pet, visit_date=START, weight=Decimal('4.10'))
+        pet.refresh_from_db()
+        assert pet.weight == Decimal('4.10')
+
+        visit.delete()
+        pet.refresh_from_db()
+        assert pet.weight == Decimal('3.00')
+
+    def test_falls_back_to_owner_weight_after_clear(self):
+        pet = PetFactory(weight=Decimal('3.00'), owner_weight=Decimal('3.00'))
+        visit = MedicalVisitFactory(medical_record__pet=pet, visit_date=START, weight=Decimal('4.10'))
+
+        visit.weight = None
+        visit.save()
+        pet.refresh_from_db()
+        assert pet.weight == Decimal('3.00')
+
+    def test_owner_weight_from_api(self, owner, owner_client):
+        pet = PetFactory(owner=owner)
+
+        response = owner_client.put(f'/api/pets/{pet.pk}/', {'weight': '3.20'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        pet.refresh_from_db()
+        assert (pet.weight, pet.owner_weight) == (Decimal('3.20'), Decimal('3.20'))
+
+    def test_series_downsampled(self):
+        pet = PetFactory()
+        for day in range(50):
+            weight = Decimal('9.00') if day == 20 else Decimal('4.00') + Decimal(day) / 100
+            MedicalVisitFactory(medical_record__pet=pet, visit_date=START + timedelta(days=day * 7), weight=weight)
+
+        series = get_weight_series(pet.pk, max_points=10)
+
+        assert len(series) == 10
+        assert series[0]['date'] == START
+        assert series[-1]['weight'] == Decimal('4.49')
+        assert Decimal('9.00') in {point['weight'] for point in series}
+
+    def test_api(self, owner, owner_client):
+        pet = PetFactory(owner=owner)
+        MedicalVisitFactory(medical_record__pet=pet, visit_date=START, weight=Decimal('4.10'))
+
+        response = owner_client.get(f'/api/medical/pets/{pet.pk}/weight/', {'points': 50})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == [{'date': '2022-01-01T00:00:00+03:00', 'weight': '4.10'}]
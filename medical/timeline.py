@@ -0,0 +1,137 @@
+"""
+Медицинская история питомца одной лентой.
+
+Визиты, вакцинации, процедуры и записи на прием читаются четырьмя
+запросами (каждый уже отсортирован по дате в БД, связанные объекты
+через select_related) и сливаются heapq.merge без общей сортировки.
+Готовая лента кешируется на питомца; любая запись в медицинские
+модели и переименование типов прививок, процедур и услуг сбрасывают
+кеш после коммита (medical.signals).
+"""
+
+import heapq
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Appointment, MedicalVisit, Treatment, Vaccination
+
+TIMELINE_CACHE_KEY = 'medical:timeline:{}'
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _visit_events(pet_id):
+    visits = (
+        MedicalVisit.objects.filter(medical_record__pet_id=pet_id)
+        .select_related('clinic', 'veterinarian__profile')
+        .order_by('-visit_date', '-pk')
+    )
+    for visit in visits:
+        yield visit.visit_date, {
+            'type': 'visit',
+            'id': visit.pk,
+            'title': visit.diagnosis,
+            'clinic': visit.clinic.name,
+            'veterinarian': visit.veterinarian.profile.full_name,
+            'details': {
+                'complaint': visit.complaint,
+                'treatment_plan': visit.treatment_plan,
+                'recommendations': visit.recommendations,
+                'weight': visit.weight,
+                'next_visit_date': visit.next_visit_date,
+            },
+        }
+
+
+def _vaccination_events(pet_id):
+    vaccinations = (
+        Vaccination.objects.filter(visit__medical_record__pet_id=pet_id)
+        .select_related('vaccine_type', 'visit__clinic')
+        .order_by('-vaccination_date', '-pk')
+    )
+    for vaccination in vaccinations:
+        yield _day_start(vaccination.vaccination_date), {
+            'type': 'vaccination',
+            'id': vaccination.pk,
+            'title': vaccination.vaccine_type.name,
+            'clinic': vaccination.visit.clinic.name,
+            'details': {
+                'vaccine_name': vaccination.vaccine_name,
+                'batch_number': vaccination.batch_number,
+                'next_vaccination_date': vaccination.next_vaccination_date,
+                'side_effects': vaccination.side_effects,
+            },
+        }
+
+
+def _treatment_events(pet_id):
+    treatments = (
+        Treatment.objects.filter(visit__medical_record__pet_id=pet_id)
+        .select_related('procedure_type', 'visit__clinic')
+        .order_by('-visit__visit_date', '-pk')
+    )
+    for treatment in treatments:
+        yield treatment.visit.visit_date, {
+            'type': 'treatment',
+            'id': treatment.pk,
+            'title': treatment.procedure_type.name,
+            'clinic': treatment.visit.clinic.name,
+            'details': {
+                'description': treatment.description,
+                'medications': treatment.medications,
+                'cost': treatment.cost,
+            },
+        }
+
+
+def _appointment_events(pet_id):
+    # Состоявшийся прием уже есть в ленте как визит
+    appointments = (
+        Appointment.objects.filter(pet_id=pet_id, medicalvisit__isnull=True)
+        .select_related('clinic', 'service', 'veterinarian__profile')
+        .order_by('-scheduled_date', '-pk')
+    )
+    for appointment in appointments:
+        yield appointment.scheduled_date, {
+            'type': 'appointment',
+            'id': appointment.pk,
+            'title': appointment.service.name,
+            'clinic': appointment.clinic.name,
+            'veterinarian': appointment.veterinarian.profile.full_name,
+            'details': {
+                'status': appointment.status,
+                'duration_minutes': appointment.duration_minutes,
+                'owner_notes': appointment.owner_notes,
+            },
+        }
+
+
+EVENT_SOURCES = (_visit_events, _vaccination_events, _treatment_events, _appointment_events)
+
+
+def build_timeline(pet_id):
+    """События питомца от новых к старым"""
+    streams = [source(pet_id) for source in EVENT_SOURCES]
+    return [
+        {'date': moment, **event}
+        for moment, event in heapq.merge(*streams, key=lambda item: item[0], reverse=True)
+    ]
+
+
+def get_pet_timeline(pet_id):
+    """Лента из кеша или построенная заново"""
+    key = TIMELINE_CACHE_KEY.format(pet_id)
+    timeline = cache.get(key)
+    if timeline is None:
+        timeline = build_timeline(pet_id)
+        cache.set(key, timeline, settings.CACHE_TIMEOUTS['long'])
+    return timeline
+
+
+def invalidate_pet_timeline(*pet_ids):
+    cache.delete_many([TIMELINE_CACHE_KEY.format(pet_id) for pet_id in pet_ids if pet_id])
@@ -0,0 +1,13 @@
+from django.urls import path
+from . import views
+
+app_name = 'medical'
+
+urlpatterns = [
+    path('vaccines/applicable/', views.applicable_vaccines, name='applicable_vaccines'),  # GET /api/medical/vaccines/applicable/?pet_ids=1,2
+    path('pets/<int:pet_id>/timeline/', views.pet_timeline, name='pet_timeline'),  # GET /api/medical/pets/1/timeline/
+    path('pets/<int:pet_id>/weight/', views.pet_weight_history, name='pet_weight_history'),  # GET /api/medical/pets/1/weight/
+    path('pets/<int:pet_id>/exports/', views.pet_export, name='pet_export'),  # POST /api/medical/pets/1/exports/
+    path('exports/<int:export_id>/', views.medical_export_detail, name='medical_export_detail'),
+    path('exports/<int:export_id>/download/', views.medical_export_download, name='medical_export_download'),
+]
@@ -1,3 +1,99 @@
-from django.shortcuts import render
+from django.http import FileResponse
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from .exports import request_export
+from .models import MedicalExport
+from .selectors import get_accessible_pets, get_applicable_vaccines
+from .serializers import (
+    MedicalExportSerializer, PetIdsParamsSerializer, VaccineTypeSerializer, WeightHistoryParamsSerializer, WeightPointSerializer
+)
+from .timeline import get_pet_timeline
+from .weights import get_weight_series
 
-# Create your views here.
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def applicable_vaccines(request):
+    """Применимые вакцины для нескольких питомцев сразу (?pet_ids=1,2,3)"""
+    params = PetIdsParamsSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    pets = get_accessible_pets(request.user).filter(pk__in=params.validated_data['pet_ids'])
+    vaccines = get_applicable_vaccines(pets)
+    return Response([
+        {'pet_id': pet_id, 'vaccines': VaccineTypeSerializer(pet_vaccines, many=True).data}
+        for pet_id, pet_vaccines in sorted(vaccines.items())
+    ])
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def pet_timeline(request, pet_id):
+    """Медицинская история питомца: визиты, прививки, процедуры и записи от новых к старым"""
+    if not get_accessible_pets(request.user).filter(pk=pet_id).exists():
+        return Response({'error': 'Питомец не найден'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(get_pet_timeline(pet_id))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def pet_weight_history(request, pet_id):
+    """График веса питомца по визитам, прореженный до points точек"""
+    params = WeightHistoryParamsSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    if not get_accessible_pets(request.user).filter(pk=pet_id).exists():
+        return Response({'error': 'Питомец не найден'}, status=status.HTTP_404_NOT_FOUND)
+
+    data = params.validated_data
+    series = get_weight_series(pet_id, data.get('start'), data.get('end'), data['points'])
+    return Response(WeightPointSerializer(series, many=True).data)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def pet_export(request, pet_id):
+    """
+    Запрос PDF медицинской карты. Если история не менялась с прошлой выгрузки,
+    возвращается она (200), иначе ставится задача (202) — статус опрашивается по id.
+    """
+    pet = get_accessible_pets(request.user).select_related('breed').filter(pk=pet_id).first()
+    if pet is None:
+        return Response({'error': 'Питомец не найден'}, status=status.HTTP_404_NOT_FOUND)
+
+    export, created = request_export(pet, request.user)
+    return Response(
+        MedicalExportSerializer(export).data,
+        status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+    )
+
+
+def _get_export(user, export_id):
+    return MedicalExport.objects.filter(pk=export_id, pet__in=get_accessible_pets(user)).first()
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def medical_export_detail(request, export_id):
+    """Статус выгрузки медицинской карты"""
+    export = _get_export(request.user, export_id)
+    if export is None:
+        return Response({'error': 'Выгрузка не найдена'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(MedicalExportSerializer(export).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def medical_export_download(request, export_id):
+    """Скачивание готового PDF"""
+    export = _get_export(request.user, export_id)
+    if export is None:
+        return Response({'error': 'Выгрузка не найдена'}, status=status.HTTP_404_NOT_FOUND)
+    if export.status != 'ready':
+        return Response({'error': 'Файл еще не готов'}, status=status.HTTP_409_CONFLICT)
+    return FileResponse(
+        export.file.open('rb'), as_attachment=True,
+        filename=f'medical-record-{export.pet_id}.pdf', content_type='application/pdf',
+    )
@@ -0,0 +1,44 @@
+"""
+История веса питомца.
+
+Вес записывается на визитах (MedicalVisit.weight). Pet.weight — копия
+веса с последнего визита, ее обновляет сигнал при изменении визитов,
+поэтому чтение питомца не требует запроса к визитам. Без взвешиваний
+Pet.weight возвращается к весу со слов владельца (Pet.owner_weight). Для графика ряд
+за годы прореживается LTTB до разрешения графика.
+"""
+
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.timeseries import lttb
+from pets.models import Pet
+from .models import MedicalVisit
+
+
+def sync_pet_weight(pet_id):
+    """Pet.weight = вес с последнего визита, где он записан (одним UPDATE)"""
+    latest = (
+        MedicalVisit.objects.filter(medical_record__pet_id=OuterRef('pk'), weight__isnull=False)
+        .order_by('-visit_date', '-pk')
+        .values('weight')[:1]
+    )
+    # Текущий Pet.weight может быть весом удаленного или очищенного визита
+    return Pet.objects.filter(pk=pet_id).update(weight=Coalesce(Subquery(latest), F('owner_weight')))
+
+
+def get_weight_series(pet_id, start=None, end=None, max_points=200):
+    """Вес по визитам на [start, end], прореженный до max_points точек"""
+    visits = MedicalVisit.objects.filter(medical_record__pet_id=pet_id, weight__isnull=False)
+    if start is not None:
+        visits = visits.filter(visit_date__gte=start)
+    if end is not None:
+        visits = visits.filter(visit_date__lte=end)
+    points = list(visits.order_by('visit_date', 'pk').values_list('visit_date', 'weight'))
+
+    selected = lttb(
+        [moment.timestamp() for moment, _ in points],
+        [float(weight) for _, weight in points],
+        max_points,
+    )
+    return [{'date': points[index][0], 'weight': points[index][1]} for index in selected]
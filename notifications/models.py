@@ -11,6 +11,10 @@ class Notification(TimeStampedMixin):
         ('appointment_cancelled', 'Запись отменена'),
         ('vaccination_due', 'Пора делать прививку'),
         ('new_message', 'Новое сообщение'),
+        ('order_created', 'Новый заказ'),
+        ('order_paid', 'Заказ оплачен'),
+        ('order_cancelled', 'Заказ отменен'),
+        ('low_stock', 'Заканчивается товар'),
         ('system', 'Системное уведомление'),
     ]
 
@@ -0,0 +1,13 @@
+"""
+Источник индекса автодополнения пород (см. core.autocomplete).
+Вес породы — количество питомцев этой породы.
+"""
+
+from django.db.models import Count
+
+from .models import Breed
+
+
+def breed_items():
+    """Породы: (id, название, количество питомцев)"""
+    return Breed.objects.annotate(pets_count=Count('pet')).values_list('pk', 'name', 'pets_count')
@@ -1,6 +1,7 @@
 from django.db import models
 from accounts.models import User
 from core.mixins import TimeStampedMixin
+from core.storage import content_storage
 
 
 class Breed(TimeStampedMixin):
@@ -52,6 +53,10 @@ class Pet(TimeStampedMixin):
     gender = models.CharField(max_length=10, choices=GENDERS, default='unknown', verbose_name='Пол')
     color = models.CharField(max_length=20, choices=COLORS, verbose_name='Окрас')
     weight = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True, verbose_name='Вес (кг)')
+    # Вес со слов владельца: Pet.weight возвращается к нему, если взвешиваний на визитах не осталось
+    owner_weight = models.DecimalField(
+        max_digits=6, decimal_places=2, null=True, blank=True, editable=False, verbose_name='Вес со слов владельца (кг)'
+    )
     
     passport_number = models.CharField(max_length=20, unique=True, null=True, blank=True, verbose_name='Номер паспорта')
     is_chipped = models.BooleanField(default=False, verbose_name='Чипирован')
@@ -61,7 +66,7 @@ class Pet(TimeStampedMixin):
     special_needs = models.TextField(blank=True, verbose_name='Особые потребности')
     # is_active = models.BooleanField(default=True, verbose_name='Активен') #?
     
-    main_photo = models.ImageField(upload_to='pets/main/', null=True, blank=True, verbose_name='Основное фото')
+    main_photo = models.ImageField(upload_to='pets/main/', storage=content_storage, null=True, blank=True, verbose_name='Основное фото')
 
     class Meta:
         verbose_name = 'Питомец'
@@ -81,7 +86,7 @@ class Pet(TimeStampedMixin):
 class PetPhoto(TimeStampedMixin):
     """Дополнительные фотографии питомца"""
     pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='photos')
-    photo = models.ImageField(upload_to='pets/photos/')
+    photo = models.ImageField(upload_to='pets/photos/', storage=content_storage)
     description = models.CharField(max_length=200, blank=True, verbose_name='Описание')
 
     class Meta:
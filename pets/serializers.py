@@ -35,6 +35,12 @@ class PetCreateSerializer(serializers.ModelSerializer):
             'chip_number', 'description', 'special_needs', 'main_photo'
         )
 
+    def validate(self, attrs):
+        # Вес, введенный владельцем, запоминается отдельно от веса с визитов
+        if 'weight' in attrs:
+            attrs['owner_weight'] = attrs['weight']
+        return attrs
+
     def create(self, validated_data):
         validated_data['owner'] = self.context['request'].user
         return super().create(validated_data)
\ No newline at end of file
@@ -0,0 +1,29 @@
+import factory
+from datetime import date
+from factory import SubFactory
+from factory.django import DjangoModelFactory
+from accounts.tests.factories import UserFactory
+from pets.models import Breed, Pet
+
+
+class BreedFactory(DjangoModelFactory):
+    """Фабрика для пород"""
+
+    class Meta:
+        model = Breed
+
+    name = factory.Sequence(lambda n: f'Порода {n}')
+    species = 'cat'
+
+
+class PetFactory(DjangoModelFactory):
+    """Фабрика для питомцев"""
+
+    class Meta:
+        model = Pet
+
+    owner = SubFactory(UserFactory)
+    name = factory.Sequence(lambda n: f'Питомец {n}')
+    breed = SubFactory(BreedFactory)
+    birthday = date(2020, 1, 1)
+    color = 'grey'
@@ -7,4 +7,5 @@ urlpatterns = [
     path('', views.pets_list, name='pets_list'),              # GET/POST /api/pets/
     path('<int:pet_id>/', views.pet_detail, name='pet_detail'), # GET/PUT/DELETE /api/pets/1/
     path('breeds/', views.breeds_list, name='breeds_list'),   # GET /api/pets/breeds/
+    path('breeds/autocomplete/', views.breeds_autocomplete, name='breeds_autocomplete'),  # GET /api/pets/breeds/autocomplete/?q=си
 ]
\ No newline at end of file
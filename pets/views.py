@@ -1,6 +1,7 @@
 from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from core.autocomplete import autocomplete
 from .models import Pet, Breed
 from .serializers import PetSerializer, PetCreateSerializer, BreedSerializer
 
@@ -63,4 +64,19 @@ def breeds_list(request):
     """Получить список всех пород"""
     breeds = Breed.objects.all()
     serializer = BreedSerializer(breeds, many=True)
-    return Response(serializer.data)
\ No newline at end of file
+    return Response(serializer.data)
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def breeds_autocomplete(request):
+    """Подсказки пород по началу слова, самые распространенные первыми"""
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'Параметр q обязателен'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+    except ValueError:
+        return Response({'error': 'limit должен быть числом'}, status=status.HTTP_400_BAD_REQUEST)
+
+    suggestions = autocomplete('breeds', query, limit)
+    return Response([{'id': item['id'], 'name': item['label']} for item in suggestions])
@@ -1,6 +1,7 @@
 from django.db import models
 from core.mixins import LikeMixin, TimeStampedMixin
 from accounts.models import User
+from core.storage import content_storage
 
 
 class Post(TimeStampedMixin, LikeMixin):
@@ -64,7 +65,7 @@ class PostPhoto(TimeStampedMixin, LikeMixin):
     """Дополнительные фото к постам"""
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE, related_name='photos')
-    photo = models.ImageField(upload_to='posts/photos/')
+    photo = models.ImageField(upload_to='posts/photos/', storage=content_storage)
 
     class Meta:
         verbose_name = 'Фото к посту'